@@ -0,0 +1 @@
+default_app_config = 'apps.carbon_intensity.apps.CarbonintensityConfig'
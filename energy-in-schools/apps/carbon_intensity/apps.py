@@ -1,5 +1,16 @@
+from celery.schedules import crontab
 from django.apps import AppConfig
 
 
 class CarbonintensityConfig(AppConfig):
     name = 'apps.carbon_intensity'
+
+    def ready(self):
+        from samsung_school import celery_app
+
+        from apps.carbon_intensity.tasks import refresh_carbon_intensity
+
+        celery_app.add_periodic_task(
+            crontab(minute='*/15'),  # often enough to keep the cached composition fresh
+            refresh_carbon_intensity.s(),
+        )
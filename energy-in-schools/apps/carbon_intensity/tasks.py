@@ -0,0 +1,7 @@
+from apps.carbon_intensity.views import CarbonIntensityViewSet
+from samsung_school import celery_app
+
+
+@celery_app.task(ignore_result=True)
+def refresh_carbon_intensity():
+    CarbonIntensityViewSet.refresh_composition()
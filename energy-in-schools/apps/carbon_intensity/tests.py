@@ -1,9 +1,15 @@
+from datetime import datetime, timedelta, timezone
 from http import HTTPStatus
+from unittest.mock import MagicMock, patch
+
+import funcy
 
 from apps.accounts.permissions import RoleName
 from apps.main.base_test_case import BaseTestCase
+from utilities.exceptions import NoContentError
 from utilities.requests_mock import RequestMock
-from .views import CarbonIntensityViewSet
+from .tasks import refresh_carbon_intensity
+from .views import CarbonIntensityComposition, CarbonIntensityViewSet, GenerationMix, carbon_intensity_cache
 
 INTENSITY_MOCK = RequestMock(
     request_url='https://api.carbonintensity.org.uk/intensity',
@@ -112,12 +118,13 @@ class TestCarbonIntensity(BaseTestCase):
 
     def setUp(self):
         super().setUp()
-        CarbonIntensityViewSet.get_intensity.invalidate_all()
-        CarbonIntensityViewSet.get_generation.invalidate_all()
+        carbon_intensity_cache.delete(CarbonIntensityViewSet.COMPOSITION_CACHE_KEY)
+        carbon_intensity_cache.delete(CarbonIntensityViewSet.REFRESH_SCHEDULED_CACHE_KEY)
 
     @RequestMock.assert_requests([INTENSITY_MOCK, GENERATION_MOCK])
     def test_carbon_fetch_data_success(self):
         """check response data"""
+        refresh_carbon_intensity()
         response = self.client.get(self.get_url())
 
         self.assertResponse(response)
@@ -126,6 +133,7 @@ class TestCarbonIntensity(BaseTestCase):
     @RequestMock.assert_requests([INTENSITY_FORECAST_ONLY_MOCK, GENERATION_MOCK])
     def test_carbon_only_forecast_fetch_data_success(self):
         """check response data"""
+        refresh_carbon_intensity()
         response = self.client.get(self.get_url())
 
         self.assertResponse(response)
@@ -134,16 +142,16 @@ class TestCarbonIntensity(BaseTestCase):
     @RequestMock.assert_requests([NO_CONTENT_MOCK_INTENSITY, NO_CONTENT_MOCK_INTENSITY, NO_CONTENT_MOCK_INTENSITY])
     def test_no_content_intensity_500(self):
         """Check intensity endpoint returned 500"""
-        response = self.client.get(self.get_url())
+        with self.assertRaises(NoContentError):
+            refresh_carbon_intensity()
 
-        self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
+        self.assertIsNone(carbon_intensity_cache.get(CarbonIntensityViewSet.COMPOSITION_CACHE_KEY))
 
     @RequestMock.assert_requests([INTENSITY_MOCK_NULL, INTENSITY_MOCK_NULL, INTENSITY_MOCK_NULL])
     def test_no_content_intensity_null(self):
         """Check intensity endpoint returned null"""
-        response = self.client.get(self.get_url())
-
-        self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
+        with self.assertRaises(NoContentError):
+            refresh_carbon_intensity()
 
     @RequestMock.assert_requests([INTENSITY_MOCK,
                                   NO_CONTENT_MOCK_GENERATION,
@@ -151,6 +159,36 @@ class TestCarbonIntensity(BaseTestCase):
                                   NO_CONTENT_MOCK_GENERATION])
     def test_no_content_generation(self):
         """Check generation endpoint returned 500 or null"""
-        response = self.client.get(self.get_url())
-
-        self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
+        with self.assertRaises(NoContentError):
+            refresh_carbon_intensity()
+
+    @patch('apps.carbon_intensity.tasks.refresh_carbon_intensity.delay')
+    def test_not_fetched_composition(self, delay_mock: MagicMock):
+        """Check the refresh is scheduled once and the request doesn't wait for it"""
+        for _ in range(2):
+            response = self.client.get(self.get_url())
+            self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
+
+        delay_mock.assert_called_once_with()
+
+    @patch('apps.carbon_intensity.tasks.refresh_carbon_intensity.delay')
+    def test_outdated_composition(self, delay_mock: MagicMock):
+        """Check the outdated composition is returned while it is refreshed"""
+        for label, fetched_ago, is_refresh_scheduled in (
+                ('Fresh', timedelta(minutes=5), False),
+                ('Outdated', timedelta(hours=1), True),
+        ):
+            with self.subTest(label):
+                delay_mock.reset_mock()
+                carbon_intensity_cache.set(CarbonIntensityViewSet.COMPOSITION_CACHE_KEY, CarbonIntensityComposition(
+                    intensity=CURRENT_CARBON_INTENSITY_RESPONSE['value'],
+                    intensity_index='moderate',
+                    generation_mix=GenerationMix(**funcy.omit(CURRENT_CARBON_INTENSITY_RESPONSE, ['value'])),
+                    fetched_at=datetime.now(tz=timezone.utc) - fetched_ago,
+                ))
+
+                response = self.client.get(self.get_url())
+
+                self.assertResponse(response)
+                self.assertEqual(CURRENT_CARBON_INTENSITY_RESPONSE, response.data)
+                self.assertEqual(is_refresh_scheduled, delay_mock.called)
@@ -1,5 +1,5 @@
 """carbon intensity api connector"""
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 from http import HTTPStatus
 from typing import NamedTuple
 
@@ -13,12 +13,17 @@ from rest_framework.response import Response
 from rest_framework.viewsets import ViewSet
 
 from apps.carbon_intensity.serializers import CarbonIntensitySerializer
+from utilities.caching import DefaultTimeoutRedisCache
 from utilities.exceptions import NoContentError
 from utilities.logger import logger
 
 CARBON_INTENSITY_CACHE_TIME = timedelta(minutes=30)
+CARBON_INTENSITY_STALE_TIME = timedelta(days=1)  # an outdated composition is still shown while it is refreshed
+CARBON_INTENSITY_REFRESH_SCHEDULE_TIME = timedelta(minutes=1)
 CARBON_INTENSITY_API_CALL_RETRY_INTERVAL = 5
 
+carbon_intensity_cache = DefaultTimeoutRedisCache(CARBON_INTENSITY_STALE_TIME)
+
 
 class GenerationMix(NamedTuple):
     """Supported energy type"""
@@ -33,12 +38,23 @@ class GenerationMix(NamedTuple):
     other: float
 
 
+class CarbonIntensityComposition(NamedTuple):
+    """Carbon intensity and generation mix fetched together"""
+    intensity: int
+    intensity_index: str
+    generation_mix: GenerationMix
+    fetched_at: datetime
+
+    @property
+    def is_fresh(self) -> bool:
+        return datetime.now(tz=timezone.utc) - self.fetched_at < CARBON_INTENSITY_CACHE_TIME
+
+
 class CarbonIntensityViewSet(ViewSet):
     """View set for carbon intensity and generation mix
 
-       WARNING funcy.cache can occur different values in different instances
-       funcy.cache only for one instance hosting
-       XXX TODO Replace in future
+       The composition is fetched by the periodic task and shared by all instances through Redis. Requests never
+       call api.carbonintensity.org.uk, they get the cached composition and schedule its refresh when it is outdated.
     """
     permission_classes = IsAuthenticated,
     SOURCE_INTENSITY = 'https://api.carbonintensity.org.uk/intensity'
@@ -48,8 +64,47 @@ class CarbonIntensityViewSet(ViewSet):
         'Accept': 'application/json'
     }
 
+    COMPOSITION_CACHE_KEY = 'carbon_intensity:composition'
+    REFRESH_SCHEDULED_CACHE_KEY = 'carbon_intensity:refresh_scheduled'
+
+    @classmethod
+    def refresh_composition(cls) -> CarbonIntensityComposition:
+        """Fetch the composition from the API and share it by the cache"""
+        intensity, intensity_index = cls.get_intensity()
+        composition = CarbonIntensityComposition(
+            intensity=intensity,
+            intensity_index=intensity_index,
+            generation_mix=cls.get_generation(),
+            fetched_at=datetime.now(tz=timezone.utc),
+        )
+        carbon_intensity_cache.set(cls.COMPOSITION_CACHE_KEY, composition)
+
+        return composition
+
+    @classmethod
+    def get_composition(cls) -> CarbonIntensityComposition:
+        """Get the cached composition, an outdated one is returned too, but its refresh is scheduled"""
+        composition = carbon_intensity_cache.get(cls.COMPOSITION_CACHE_KEY)
+
+        if not composition or not composition.is_fresh:
+            cls.schedule_refresh()
+
+        if not composition:
+            raise NoContentError('Carbon intensity is not fetched yet')
+
+        return composition
+
+    @classmethod
+    def schedule_refresh(cls):
+        from apps.carbon_intensity.tasks import refresh_carbon_intensity
+
+        if carbon_intensity_cache.get(cls.REFRESH_SCHEDULED_CACHE_KEY):
+            return  # another request has already scheduled it
+
+        carbon_intensity_cache.set(cls.REFRESH_SCHEDULED_CACHE_KEY, True, CARBON_INTENSITY_REFRESH_SCHEDULE_TIME)
+        refresh_carbon_intensity.delay()
+
     @classmethod
-    @funcy.cache(CARBON_INTENSITY_CACHE_TIME)
     @funcy.log_errors(logger.error)
     @funcy.retry(3, NoContentError, CARBON_INTENSITY_API_CALL_RETRY_INTERVAL)
     def get_intensity(cls) -> [int, str]:
@@ -75,7 +130,6 @@ class CarbonIntensityViewSet(ViewSet):
         return intensity, intensity_index
 
     @classmethod
-    @funcy.cache(CARBON_INTENSITY_CACHE_TIME)
     @funcy.log_errors(logger.error)
     @funcy.retry(3, NoContentError, CARBON_INTENSITY_API_CALL_RETRY_INTERVAL)
     def get_generation(cls) -> GenerationMix:
@@ -106,12 +160,15 @@ class CarbonIntensityViewSet(ViewSet):
                          responses={HTTPStatus.OK.value: CarbonIntensitySerializer})
     @action(detail=False)
     def composition(self, _: Request):
-        """Fetch data from api.carbonintensity and filter by serializer fields"""
+        """Get cached data from api.carbonintensity and filter by serializer fields"""
 
-        intensity_value, intensity_index = self.get_intensity()
-        generation_mix: GenerationMix = self.get_generation()
+        composition = self.get_composition()
 
-        serializer = CarbonIntensitySerializer(data={'value': intensity_value, 'index': intensity_index, **generation_mix._asdict()})
+        serializer = CarbonIntensitySerializer(data={
+            'value': composition.intensity,
+            'index': composition.intensity_index,
+            **composition.generation_mix._asdict(),
+        })
         serializer.is_valid(True)
 
         return Response(serializer.data)
@@ -1,16 +1,16 @@
-from datetime import datetime, timedelta, time
-from typing import Tuple, Union, List
+from collections import defaultdict
+from datetime import date, datetime, timedelta, time
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import pytz
-from django.db.models import QuerySet
-from django.db.transaction import atomic
+from django.db.models import Q
 
 from apps.learning_days.models import LearningDay
 from apps.resources.models import Resource
 from apps.energy_providers.providers.abstract import MeterType
 from apps.historical_data.utils import aggregations
 from apps.locations.models import Location
-from apps.resources.types import ResourceDataNotAvailable, Unit
+from apps.resources.types import TimeResolution, Unit
 
 CASH_BACK_CACHE_TIME = timedelta(hours=6)
 
@@ -50,75 +50,115 @@ class TOUCashBackTariffTimeRanges:
     )
 
 
-def _calculate_consumption_for_time_ranges(
-        time_ranges: Tuple[Tuple[time, time]],
-        resources: Union[QuerySet, List[Resource]],
-        day: datetime.date,
-        location_tz: datetime.tzinfo,
-):
-    resource_value = 0.0
+_TOU_TIME_RANGES_WITH_UNIT_RATES: Tuple[Tuple[Tuple[Tuple[time, time]], float]] = (
+    (TOUCashBackTariffTimeRanges.GREEN_TIME_RANGES, TOUCashBackTariffUnitRate.GREEN_UNIT_RATE),
+    (TOUCashBackTariffTimeRanges.AMBER_TIME_RANGES, TOUCashBackTariffUnitRate.AMBER_UNIT_RATE),
+    (TOUCashBackTariffTimeRanges.RED_TIME_RANGES, TOUCashBackTariffUnitRate.RED_UNIT_RATE),
+)
 
-    for time_range in time_ranges:
-        try:
-            resource_value += aggregations.aggregate_to_one(
-                resources=resources,
-                unit=Unit.KILOWATT_HOUR,
-                from_=location_tz.localize(datetime.combine(day, time_range[0])),
-                to=location_tz.localize(datetime.combine(day, time_range[1])),
-            ).value
 
-        except ResourceDataNotAvailable:
-            pass
+def calculate_daily_cash_back_for_location(
+        location: Location,
+        day: date,
+) -> float:
+    return calculate_daily_cash_back_for_locations([location], day, day)[location.id, day]
+
+
+def calculate_daily_cash_back_for_locations(
+        locations: Iterable[Location],
+        from_day: date,
+        to_day: date,
+) -> Dict[Tuple[int, date], float]:
+    """
+    Calculate cash back of every location for every day from from_day to to_day inclusive. Hourly consumption of
+    all electricity meters is fetched by one aggregation query and split by local days and TOU time ranges in memory.
+    """
+    locations = list(locations)
+    days = [from_day + timedelta(days=index) for index in range((to_day - from_day).days + 1)]
+    if not locations or not days:
+        return {}
+
+    location_tz_by_id = {location.id: pytz.timezone(location.timezone) for location in locations}
+    range_edges = [
+        location_tz.localize(datetime.combine(day, time()))
+        for location_tz in set(location_tz_by_id.values())
+        for day in (from_day, to_day + timedelta(days=1))
+    ]
+
+    # hourly buckets are split by local hours only when all time zones are shifted by whole hours
+    if all(range_edge.utcoffset() % timedelta(hours=1) == timedelta() for range_edge in range_edges):
+        time_resolution = TimeResolution.HOUR
+    else:
+        time_resolution = TimeResolution.HALF_HOUR
+
+    resources_by_location_id = _get_electricity_meters_by_location_id(location_tz_by_id.keys())
+    values_by_resource_id = aggregations.aggregate_to_list_by_resources(
+        resources={resource for resources in resources_by_location_id.values() for resource in resources},
+        unit=Unit.KILOWATT_HOUR,
+        time_resolution=time_resolution,
+        from_=min(range_edges).astimezone(pytz.utc),
+        to=max(range_edges).astimezone(pytz.utc),
+    )
 
-    return resource_value
+    # (location id, day) => [total consumption, consumption by TOU time ranges...]
+    consumption_by_location_day: Dict[Tuple[int, date], List[float]] = defaultdict(
+        lambda: [0.0] * (len(_TOU_TIME_RANGES_WITH_UNIT_RATES) + 1)
+    )
 
+    for location_id, resources in resources_by_location_id.items():
+        location_tz = location_tz_by_id[location_id]
 
-@atomic
-def calculate_daily_cash_back_for_location(
-        location: Location,
-        day: datetime.date,
-):
-    location_tz = pytz.timezone(location.timezone)
-    from_ = location_tz.localize(datetime.combine(day, time()))
-    to = location_tz.localize(datetime.combine(day + timedelta(days=1), time()))
-    energy_meters = Resource.get_location_energy_meters(location, MeterType.ELECTRICITY)
-    is_school_day = LearningDay.is_learning_day_by_default(from_.date())
-    avg_consumption = _AvgConsumption.SCHOOL_DAY if is_school_day else _AvgConsumption.NON_SCHOOL_DAY
-    adjustment_factor = _AdjustmentFactor.SCHOOL_DAY if is_school_day else _AdjustmentFactor.NON_SCHOOL_DAY
+        for resource in resources:
+            for time_value in values_by_resource_id.get(resource.id, ()):
+                local_time = time_value.time.astimezone(location_tz)
+                if not from_day <= local_time.date() <= to_day:
+                    continue
 
-    try:
-        day_total_consumption = aggregations.aggregate_to_one(
-            resources=energy_meters,
-            unit=Unit.KILOWATT_HOUR,
-            from_=from_,
-            to=to,
-        ).value
+                consumption = consumption_by_location_day[location_id, local_time.date()]
+                consumption[0] += time_value.value
 
-    except ResourceDataNotAvailable:
-        return 0.0
+                for index, (time_ranges, _) in enumerate(_TOU_TIME_RANGES_WITH_UNIT_RATES, start=1):
+                    if any(start <= local_time.time() < end for start, end in time_ranges):
+                        consumption[index] += time_value.value
+
+    is_school_day_by_day = {day: LearningDay.is_learning_day_by_default(day) for day in days}
 
-    if not day_total_consumption:  # if total 0
+    return {
+        (location_id, day): _calculate_cash_back(
+            consumption_by_location_day.get((location_id, day)),
+            is_school_day_by_day[day],
+        )
+        for location_id in location_tz_by_id
+        for day in days
+    }
+
+
+def _get_electricity_meters_by_location_id(location_ids: Iterable[int]) -> Dict[int, List[Resource]]:
+    location_ids = set(location_ids)
+    resources_by_location_id: Dict[int, List[Resource]] = defaultdict(list)
+    resources = Resource.filter_energy_meters(
+        Resource.objects.filter(Q(sub_location_id__in=location_ids) | Q(sub_location__parent_location_id__in=location_ids)),
+        MeterType.ELECTRICITY,
+    ).select_related('sub_location')
+
+    for resource in resources:
+        for location_id in {resource.sub_location_id, resource.sub_location.parent_location_id} & location_ids:
+            resources_by_location_id[location_id].append(resource)
+
+    return resources_by_location_id
+
+
+def _calculate_cash_back(consumption: Optional[List[float]], is_school_day: bool) -> float:
+    if not consumption or not consumption[0]:  # no data or total 0
         return 0.0
 
-    day_green_percent = \
-        _calculate_consumption_for_time_ranges(
-            TOUCashBackTariffTimeRanges.GREEN_TIME_RANGES, energy_meters, from_.date(), location_tz,
-        ) / day_total_consumption
-
-    day_amber_percent = \
-        _calculate_consumption_for_time_ranges(
-            TOUCashBackTariffTimeRanges.AMBER_TIME_RANGES, energy_meters, from_.date(), location_tz,
-        ) / day_total_consumption
-
-    day_red_percent = \
-        _calculate_consumption_for_time_ranges(
-            TOUCashBackTariffTimeRanges.RED_TIME_RANGES, energy_meters, from_.date(), location_tz,
-        ) / day_total_consumption
-
-    total = (avg_consumption * FlatCashBackTariff.UNIT_RATE) - (
-            day_green_percent * TOUCashBackTariffUnitRate.GREEN_UNIT_RATE * avg_consumption
-            + day_amber_percent * TOUCashBackTariffUnitRate.AMBER_UNIT_RATE * avg_consumption
-            + day_red_percent * TOUCashBackTariffUnitRate.RED_UNIT_RATE * avg_consumption
+    day_total_consumption, *time_ranges_consumption = consumption
+    avg_consumption = _AvgConsumption.SCHOOL_DAY if is_school_day else _AvgConsumption.NON_SCHOOL_DAY
+    adjustment_factor = _AdjustmentFactor.SCHOOL_DAY if is_school_day else _AdjustmentFactor.NON_SCHOOL_DAY
+
+    total = (avg_consumption * FlatCashBackTariff.UNIT_RATE) - sum(
+        time_range_consumption / day_total_consumption * unit_rate * avg_consumption
+        for time_range_consumption, (_, unit_rate) in zip(time_ranges_consumption, _TOU_TIME_RANGES_WITH_UNIT_RATES)
     ) + adjustment_factor
 
     return total if total > 0.0 else 0.0
@@ -1,12 +1,15 @@
 import logging
 from datetime import datetime, timezone, timedelta
+from typing import Iterable, Tuple
 
 from django.conf import settings
 from django.db import models, IntegrityError
 from django.db.models import Sum
+from django.db.transaction import atomic
 from django.core.validators import MinValueValidator
 
-from apps.cashback.cashback_calculation import calculate_daily_cash_back_for_location
+from apps.cashback.cashback_calculation import calculate_daily_cash_back_for_location, \
+    calculate_daily_cash_back_for_locations
 from apps.locations.models import Location
 from apps.main.models import BaseModel
 
@@ -47,6 +50,47 @@ class OffPeakyPoint(BaseModel):
             created = True
         return off_peaky_model_entry, created, updated
 
+    @classmethod
+    def create_or_update_for_locations(
+            cls,
+            locations: Iterable[Location],
+            from_day: datetime.date,
+            to_day: datetime.date,
+            recalculate_value: bool = False,
+    ) -> Tuple[int, int]:
+        """
+        Batched version of create_or_update_for_location for every location and day from from_day to to_day inclusive
+        :return: count of created and updated points
+        """
+        locations = list(locations)
+        values = calculate_daily_cash_back_for_locations(locations, from_day, to_day)
+        existing_points = {
+            (point.location_id, point.day): point
+            for point in cls.objects.filter(location__in=locations, day__gte=from_day, day__lte=to_day)
+        }
+
+        new_points = [
+            cls(location_id=location_id, day=day, value=value)
+            for (location_id, day), value in values.items()
+            if (location_id, day) not in existing_points
+        ]
+        updated_points = []
+
+        if recalculate_value:
+            for key, point in existing_points.items():
+                point.value = values[key]
+                updated_points.append(point)
+
+        elif existing_points:
+            logger.error(f'Off Peaky Points for {len(existing_points)} school days from {from_day} to {to_day} '
+                         f'already exist')
+
+        with atomic():
+            cls.objects.bulk_create(new_points)
+            cls.objects.bulk_update(updated_points, ['value'])
+
+        return len(new_points), len(updated_points)
+
     @classmethod
     def get_cash_back_for_location(
             cls, location: Location, from_: datetime.date = None, to: datetime.date = None) -> float:
@@ -1,5 +1,6 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
+import funcy
 import pytz
 
 from apps.cashback.models import OffPeakyPoint
@@ -11,9 +12,23 @@ from utilities.sqlalchemy_helpers import close_sa_session
 @celery_app.task(ignore_result=True)
 @close_sa_session
 def calculate_schools_cash_back():
-    for location in Location.get_schools():
-        """calculate Off Peaky points for yesterday in school's timezone"""
-        location_tz: datetime.tzinfo = pytz.timezone(location.timezone)
-        local_yesterday: datetime.date = datetime.now(tz=location_tz).date() - timedelta(days=1)
+    """calculate Off Peaky points for yesterday in school's timezone"""
+    schools_by_local_yesterday = funcy.group_by(
+        lambda location: datetime.now(tz=pytz.timezone(location.timezone)).date() - timedelta(days=1),
+        Location.get_schools(),
+    )
 
-        OffPeakyPoint.create_or_update_for_location(location=location, day=local_yesterday)
+    for local_yesterday, schools in schools_by_local_yesterday.items():
+        OffPeakyPoint.create_or_update_for_locations(schools, from_day=local_yesterday, to_day=local_yesterday)
+
+
+@celery_app.task(ignore_result=True)
+@close_sa_session
+def recalculate_schools_cash_back(from_day: str, to_day: str):
+    """recalculate Off Peaky points of all schools for the range of days in ISO format, both inclusive"""
+    OffPeakyPoint.create_or_update_for_locations(
+        Location.get_schools(),
+        from_day=date.fromisoformat(from_day),
+        to_day=date.fromisoformat(to_day),
+        recalculate_value=True,
+    )
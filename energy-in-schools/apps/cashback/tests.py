@@ -121,6 +121,37 @@ class TestLocationCashback(EnergyHistoryBaseTestCase, EnergyTariffBaseTestCase):
                     calculate_daily_cash_back_for_location(self.location, day)
                 )
 
+    def test_create_or_update_for_locations(self):
+        other_school = self.get_user(school_number=1).location
+        days = [date(2000, 1, 1 + index) for index in range(3)]
+
+        with self.subTest('Creation'):
+            self.assertEqual((6, 0), OffPeakyPoint.create_or_update_for_locations(
+                [self.location, other_school], days[0], days[-1]
+            ))
+            self.assertEqual(
+                {
+                    **{(self.location.id, day): value for day, value in zip(days, (3.972814, 0.0, 0.0))},
+                    **{(other_school.id, day): 0.0 for day in days},
+                },
+                {(point.location_id, point.day): round(point.value, 6) for point in OffPeakyPoint.objects.all()},
+            )
+
+        with self.subTest('Existing points are not changed'):
+            self._update_location_timezone(timezone='Poland')
+            self.assertEqual((0, 0), OffPeakyPoint.create_or_update_for_locations([self.location], days[0], days[-1]))
+            self.assertAlmostEqual(3.972814, OffPeakyPoint.objects.get(location=self.location, day=days[0]).value)
+
+        with self.subTest('Recalculation'):
+            self.assertEqual((0, 3), OffPeakyPoint.create_or_update_for_locations(
+                [self.location], days[0], days[-1], recalculate_value=True
+            ))
+            for day in days:
+                self.assertAlmostEqual(
+                    calculate_daily_cash_back_for_location(self.location, day),
+                    OffPeakyPoint.objects.get(location=self.location, day=day).value,
+                )
+
 
 class TestCustomCreateUpdateActions(BaseTestCase):
     URL = '/admin/cashback/offpeakypoint/{id}/change/'
@@ -1,5 +1,16 @@
+from celery.schedules import crontab
 from django.apps import AppConfig
 
 
 class EnergyMetersConfig(AppConfig):
     name = 'apps.energy_meters'
+
+    def ready(self):
+        from samsung_school import celery_app
+
+        from apps.energy_meters.tasks import resume_historical_data_backfills
+
+        celery_app.add_periodic_task(
+            crontab(minute='*/10'),
+            resume_historical_data_backfills.s(),
+        )
@@ -0,0 +1,33 @@
+# Generated by Django 2.2.28 on 2026-10-18 12:00
+
+import apps.energy_meters.types
+import apps.resources.types
+from django.db import migrations, models
+import django.db.models.deletion
+import enumfields.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('energy_meters', '0006_energymeter_live_values_meter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistoricalDataBackfill',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('time_resolution', enumfields.fields.EnumField(enum=apps.resources.types.TimeResolution, max_length=20)),
+                ('status', enumfields.fields.EnumField(default='pending', enum=apps.energy_meters.types.BackfillStatus, max_length=20)),
+                ('reset_history', models.BooleanField(default=False)),
+                ('started_at', models.DateTimeField(default=None, null=True)),
+                ('fetched_before', models.DateTimeField(default=None, null=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('meter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historical_data_backfills', to='energy_meters.EnergyMeter')),
+            ],
+        ),
+    ]
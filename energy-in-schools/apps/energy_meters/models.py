@@ -1,14 +1,19 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
-from typing import Any, List, Union
+from typing import Any, Iterable, Iterator, List, Optional, Tuple, Union
 
-from django.db import models
+import funcy
+from django.db import connections, models, transaction
 from django.db.models import BooleanField
 from django.core.validators import MinValueValidator
 from enumfields import EnumField
 
+from apps.energy_meters.types import BackfillStatus
 from apps.energy_providers.models import EnergyProviderAccount
 from apps.energy_providers.providers.abstract import MeterType, ProviderValidateError
 from apps.historical_data.models import DetailedHistoricalData, LongTermHistoricalData
+from apps.main.models import BaseModel
 from apps.resources.models import PullSupportedResource, Resource
 from apps.resources.types import DataCollectionMethod, ResourceChildType, ResourceValidationError, ResourceValue, \
     TimeResolution, Unit
@@ -16,6 +21,20 @@ from apps.smart_things_devices.types import DeviceStatus
 
 Type = MeterType
 
+BACKFILL_WINDOW_DURATIONS = {
+    TimeResolution.MINUTE: timedelta(days=2),
+    TimeResolution.HALF_HOUR: timedelta(days=10),
+}
+BACKFILL_MAX_DURATIONS = {
+    TimeResolution.MINUTE: timedelta(days=4),  # the half hour history is fetched until an empty window
+}
+BACKFILL_CONCURRENT_WINDOWS = 4
+BACKFILL_BATCH_SIZE = 1000
+BACKFILL_STALL_TIME = timedelta(minutes=15)
+BACKFILL_MAX_ATTEMPTS = 5
+
+logger = logging.getLogger(__name__)
+
 
 class EnergyMeter(PullSupportedResource):
     class Meta:
@@ -88,6 +107,21 @@ class EnergyMeter(PullSupportedResource):
     def fetch_current_value(self) -> Union[ResourceValue, List[ResourceValue]]:
         return self.provider_account.connection.get_consumption(self)
 
+    @classmethod
+    def collect_new_values_for_meters(cls, energy_meters: Iterable['EnergyMeter']):
+        """
+        Fetch values of meters of one provider account by one round of concurrent requests and save them by one batch
+        """
+        values_by_meter = {}
+
+        for meters in funcy.group_by(lambda meter: meter.provider_account_id, energy_meters).values():
+            connection = meters[0].provider_account.connection
+
+            for meter, values in connection.get_consumptions(meters).items():
+                values_by_meter[meter] = values if type(values) is list else [values]
+
+        Resource.add_values_for_resources(values_by_meter)
+
     def fetch_tariff(self, tariff_id: str):
         return self.provider_account.connection.get_tariff(tariff_id)
 
@@ -124,3 +158,166 @@ class EnergyMeter(PullSupportedResource):
 
         finally:
             return status
+
+
+class HistoricalDataBackfill(BaseModel):
+    """
+    Fetching the meter history from the provider by windows, from the newest to the oldest one. Windows that are
+    already in the database are skipped. fetched_before moves back after every saved window, so a failed or
+    interrupted backfill resumes from the last saved window.
+    """
+    meter = models.ForeignKey(EnergyMeter, on_delete=models.CASCADE, related_name='historical_data_backfills')
+    time_resolution = EnumField(TimeResolution, max_length=20, null=False)
+    status = EnumField(BackfillStatus, max_length=20, default=BackfillStatus.PENDING)
+    reset_history = models.BooleanField(default=False)  # remove the history of the time resolution before fetching
+    started_at = models.DateTimeField(null=True, default=None)  # the end of the newest window
+    fetched_before = models.DateTimeField(null=True, default=None)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+
+    @classmethod
+    def schedule(cls, meter: EnergyMeter, time_resolution: TimeResolution,
+                 reset_history: bool = False) -> 'HistoricalDataBackfill':
+        """
+        Create the backfill or restart the unfinished one and run it in background after the transaction commit
+        """
+        from apps.energy_meters.tasks import run_historical_data_backfill
+
+        unfinished_backfills = cls.objects.filter(meter=meter, time_resolution=time_resolution) \
+            .exclude(status=BackfillStatus.DONE)
+
+        if reset_history:
+            unfinished_backfills.delete()
+            backfill = None
+        else:
+            backfill = unfinished_backfills.first()
+
+        if backfill:
+            backfill.status = BackfillStatus.PENDING
+            backfill.attempts = 0
+            backfill.save()
+        else:
+            backfill = cls.objects.create(meter=meter, time_resolution=time_resolution, reset_history=reset_history)
+
+        transaction.on_commit(lambda: run_historical_data_backfill.delay(backfill.id))
+
+        return backfill
+
+    @classmethod
+    def get_ids_for_resuming(cls) -> List[int]:
+        return list(cls.objects.filter(
+            status__in=(BackfillStatus.PENDING, BackfillStatus.RUNNING, BackfillStatus.FAILED),
+            updated_at__lt=datetime.now(tz=timezone.utc) - BACKFILL_STALL_TIME,
+            attempts__lt=BACKFILL_MAX_ATTEMPTS,
+        ).values_list('id', flat=True))
+
+    @property
+    def history_model(self):
+        return DetailedHistoricalData if self.time_resolution is TimeResolution.MINUTE else LongTermHistoricalData
+
+    def run(self):
+        self.status = BackfillStatus.RUNNING
+        self.attempts += 1
+        self.error = ''
+        self.save()
+
+        try:
+            self._run()
+
+        except Exception as exception:
+            logger.error(f'Historical data backfill of "{self.meter}" by {self.time_resolution} is failed: {exception}')
+            self.status = BackfillStatus.FAILED
+            self.error = str(exception)
+            self.save()
+
+        else:
+            self.status = BackfillStatus.DONE
+            self.save()
+
+    def _run(self):
+        if self.reset_history:
+            self.history_model.objects.filter(resource_id=self.meter_id).delete()
+            self.reset_history = False
+            self.save()
+
+        if not self.started_at:
+            self.started_at = self._get_newest_window_end()
+            self.save()
+
+        connection = self.meter.provider_account.connection
+        connection.prepare_session()
+
+        def fetch_window(window: Tuple[datetime, datetime]) -> List[ResourceValue]:
+            window_from, window_to = window
+
+            try:  # the provider accepts UTC time without a time zone and includes the end of the range
+                return connection.get_historical_consumption(
+                    self.meter,
+                    window_from.replace(tzinfo=None),
+                    (window_to - self.time_resolution.duration).replace(tzinfo=None),
+                    self.time_resolution,
+                )
+
+            finally:
+                connections.close_all()  # only connections of the worker thread
+
+        with ThreadPoolExecutor(max_workers=BACKFILL_CONCURRENT_WINDOWS) as executor:
+            fetched_windows = (
+                (window, values)
+                for windows in funcy.chunks(BACKFILL_CONCURRENT_WINDOWS, self._iterate_missing_windows())
+                for window, values in zip(windows, executor.map(fetch_window, windows))
+            )
+
+            for window, values in fetched_windows:
+                if not any(value.value for value in values):
+                    break  # there is no history before the empty window
+
+                self._save_window_values(window, values)
+
+        if self.time_resolution is not TimeResolution.MINUTE:
+            self.meter.refresh_history_rollups()
+
+    def _get_newest_window_end(self) -> datetime:
+        now = datetime.now(tz=timezone.utc)
+
+        if self.time_resolution is TimeResolution.MINUTE:
+            return now.replace(second=0, microsecond=0)
+
+        return (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def _iterate_missing_windows(self) -> Iterator[Tuple[datetime, datetime]]:
+        window_duration = BACKFILL_WINDOW_DURATIONS[self.time_resolution]
+        max_duration: Optional[timedelta] = BACKFILL_MAX_DURATIONS.get(self.time_resolution)
+        expected_values_count = window_duration // self.time_resolution.duration
+        window_to = self.fetched_before or self.started_at
+
+        while not max_duration or window_to > self.started_at - max_duration:
+            window_from = window_to - window_duration
+
+            if self.history_model.objects.filter(
+                    resource_id=self.meter_id, time__gte=window_from, time__lt=window_to
+            ).count() < expected_values_count:
+                yield window_from, window_to
+
+            window_to = window_from
+
+    def _save_window_values(self, window: Tuple[datetime, datetime], values: List[ResourceValue]):
+        window_from, window_to = window
+        known_times = set(self.history_model.objects.filter(
+            resource_id=self.meter_id, time__gte=window_from, time__lt=window_to
+        ).values_list('time', flat=True))
+        new_rows = (
+            self.history_model(resource_id=self.meter_id, time=value.time, value=value.value)
+            for value in values
+            if value.time not in known_times
+        )
+
+        for rows in funcy.chunks(BACKFILL_BATCH_SIZE, new_rows):
+            self.history_model.objects.bulk_create(rows)
+
+        if self.time_resolution is TimeResolution.MINUTE and window_to == self.started_at:
+            minutes_delay = (self.started_at - values[-1].time) // timedelta(minutes=1)
+            EnergyMeter.objects.filter(id=self.meter_id).update(minutes_delay=minutes_delay)
+
+        self.fetched_before = window_from
+        self.save()
@@ -9,11 +9,11 @@ from apps.historical_data.serializers import HistoricalDataQuerySerializerSet
 from apps.locations.serializer_fileds import InOwnLocationPrimaryKeyRelatedField, OwnSubLocationField
 from apps.resources.models import Resource
 from apps.resources.types import ResourceValidationError, Unit
-from utilities.serializer_helpers import get_serializer_fields
+from utilities.serializer_helpers import SparseFieldsetSerializerMixin, get_serializer_fields
 from apps.energy_providers.providers.abstract import MeterType
 
 
-class EnergyMeterSerializer(EnumSupportSerializerMixin, serializers.ModelSerializer):
+class EnergyMeterSerializer(SparseFieldsetSerializerMixin, EnumSupportSerializerMixin, serializers.ModelSerializer):
     provider_account = InOwnLocationPrimaryKeyRelatedField(queryset=EnergyProviderAccount.objects.all())
     sub_location = OwnSubLocationField()
 
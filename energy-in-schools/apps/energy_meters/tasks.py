@@ -0,0 +1,16 @@
+from apps.energy_meters.models import HistoricalDataBackfill
+from samsung_school import celery_app
+from utilities.sqlalchemy_helpers import close_sa_session
+
+
+@celery_app.task(ignore_result=True)
+@close_sa_session
+def run_historical_data_backfill(backfill_id: int):
+    HistoricalDataBackfill.objects.select_related('meter__provider_account').get(id=backfill_id).run()
+
+
+@celery_app.task(ignore_result=True)
+@close_sa_session
+def resume_historical_data_backfills():
+    for backfill_id in HistoricalDataBackfill.get_ids_for_resuming():
+        run_historical_data_backfill.delay(backfill_id)
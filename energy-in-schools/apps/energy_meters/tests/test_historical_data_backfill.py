@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+from apps.energy_meters.models import HistoricalDataBackfill
+from apps.energy_meters.tests.base_test_case import EnergyHistoryBaseTestCase
+from apps.energy_meters.types import BackfillStatus
+from apps.energy_providers.models import EnergyProviderAccount
+from apps.energy_providers.providers.abstract import ProviderError
+from apps.energy_providers.providers.dummy import DummyProviderConnection
+from apps.historical_data.models import LongTermHistoricalData
+from apps.resources.types import ResourceValue, TimeResolution, Unit
+
+
+class TestHistoricalDataBackfill(EnergyHistoryBaseTestCase):
+    provider = EnergyProviderAccount.Provider.DUMMY
+
+    WINDOW_VALUES_COUNT = 10 * 48
+
+    def setUp(self):
+        super().setUp()
+        now = datetime.now(tz=timezone.utc)
+        self.newest_window_end = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        self.history_start = self.newest_window_end - timedelta(days=25)
+        self.failed_window_end = None
+
+    @patch.object(DummyProviderConnection, 'get_historical_consumption')
+    def test_backfill(self, fetch_mock: MagicMock):
+        fetch_mock.side_effect = self._fetch_history
+        backfill = HistoricalDataBackfill.schedule(self.energy_meter, TimeResolution.HALF_HOUR)
+
+        backfill.run()
+
+        self.assertEqual(BackfillStatus.DONE, backfill.status)
+        self.assertEqual(self.newest_window_end - timedelta(days=30), backfill.fetched_before)
+        self.assertEqual(3 * self.WINDOW_VALUES_COUNT, LongTermHistoricalData.objects.count())
+        self.assertEqual(
+            (self.newest_window_end - self.history_start) // TimeResolution.HALF_HOUR.duration,
+            LongTermHistoricalData.objects.filter(value=1).count()
+        )
+
+        with self.subTest('Only missing windows are fetched'):
+            fetch_mock.reset_mock()
+            HistoricalDataBackfill.schedule(self.energy_meter, TimeResolution.HALF_HOUR).run()
+
+            self.assertEqual(3 * self.WINDOW_VALUES_COUNT, LongTermHistoricalData.objects.count())
+            self.assertNotIn(
+                self._naive(self.newest_window_end - timedelta(days=10)),
+                [call[0][1] for call in fetch_mock.call_args_list]
+            )
+
+    @patch.object(DummyProviderConnection, 'get_historical_consumption')
+    def test_resume_failed_backfill(self, fetch_mock: MagicMock):
+        fetch_mock.side_effect = self._fetch_history
+        self.failed_window_end = self.newest_window_end - timedelta(days=10)
+        backfill = HistoricalDataBackfill.schedule(self.energy_meter, TimeResolution.HALF_HOUR)
+
+        backfill.run()
+
+        self.assertEqual(BackfillStatus.FAILED, backfill.status)
+        self.assertEqual(self.failed_window_end, backfill.fetched_before)
+        self.assertEqual(self.WINDOW_VALUES_COUNT, LongTermHistoricalData.objects.count())
+
+        self.failed_window_end = None
+        fetch_mock.reset_mock()
+        HistoricalDataBackfill.objects.filter(id=backfill.id).update(
+            updated_at=datetime.now(tz=timezone.utc) - timedelta(hours=1)
+        )
+        self.assertEqual([backfill.id], HistoricalDataBackfill.get_ids_for_resuming())
+
+        backfill.refresh_from_db()
+        backfill.run()
+
+        self.assertEqual(BackfillStatus.DONE, backfill.status)
+        self.assertEqual(2, backfill.attempts)
+        self.assertEqual(3 * self.WINDOW_VALUES_COUNT, LongTermHistoricalData.objects.count())
+        self.assertEqual(
+            self._naive(self.newest_window_end - timedelta(days=20)),
+            max(call[0][1] for call in fetch_mock.call_args_list)
+        )
+
+    def _fetch_history(self, _, from_: datetime, to: datetime, time_resolution: TimeResolution):
+        from_ = from_.replace(tzinfo=timezone.utc)
+        to = to.replace(tzinfo=timezone.utc)
+
+        if self.failed_window_end and to < self.failed_window_end:
+            raise ProviderError('The provider is not available')
+
+        return [
+            ResourceValue(time=a_time, value=1.0 if a_time >= self.history_start else 0.0, unit=Unit.WATT)
+            for a_time in (from_ + index * time_resolution.duration
+                           for index in range((to - from_) // time_resolution.duration + 1))
+        ]
+
+    @staticmethod
+    def _naive(a_time: datetime) -> datetime:
+        return a_time.replace(tzinfo=None)
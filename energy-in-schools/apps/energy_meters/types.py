@@ -0,0 +1,8 @@
+from enumfields import Enum
+
+
+class BackfillStatus(Enum):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    DONE = 'done'
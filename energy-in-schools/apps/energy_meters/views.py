@@ -4,7 +4,6 @@ import logging
 from operator import itemgetter
 from typing import Optional
 from safedelete.config import HARD_DELETE
-from datetime import datetime, timedelta
 
 from django.db.models import Q
 from rest_framework import status
@@ -17,7 +16,7 @@ from apps.energy_providers.providers.abstract import MeterType
 from apps.energy_tariffs.models import EnergyTariff, TariffType
 from apps.historical_data.models import DetailedHistoricalData, LongTermHistoricalData
 from apps.locations.models import Location
-from apps.energy_meters.models import EnergyMeter, Type
+from apps.energy_meters.models import EnergyMeter, HistoricalDataBackfill, Type
 from apps.energy_meters.serializers import EnergyMeterSerializer, serializer_set, common_serializer_set, \
     ExportDataQueryParamsSerializer, ManageHildebrandMeterSerializer
 from apps.historical_data.utils.aggregation_params_manager import AggregationOption
@@ -30,15 +29,17 @@ from apps.locations.filters import OwnLocationOnlyFilter
 from apps.main.view_mixins import SoftDeleteCreateModelViewSetMixin
 from apps.resources.types import Unit, ResourceChildType, TimeResolution
 from apps.resources.models import Resource
+from utilities.pagination import OptInCursorPagination
 
 logger = logging.getLogger(__name__)
 
 class EnergyMeterViewSet(SoftDeleteCreateModelViewSetMixin, ModelViewSet):
     serializer_class = EnergyMeterSerializer
+    pagination_class = OptInCursorPagination
 
     @own_location_only
     def get_queryset(self):
-        return EnergyMeter.objects.all()
+        return EnergyMeter.objects.select_related('hh_values_meter')
 
 
 class CommonEnergyMeterFilterSet(ResourceHistoryFilterSet):
@@ -183,73 +184,28 @@ class ManageHildebrandMetersViewSet(ViewSet):
         ) for tariff in tariffs])
 
     @staticmethod
-    def fetch_historical_data_query(resource, data, _from, _to, period):
-        historical_consumption = resource.fetch_historical_consumption(_from, _to, period)
-        count = sum(1 if resource_value.value else 0 for resource_value in historical_consumption)
-        if count:
-            data.extend(
-                    DetailedHistoricalData(
-                        time=resource_value.time,
-                        value=resource_value.value,
-                        resource=resource.resource_ptr
-                    ) if period.value == 'minute' else LongTermHistoricalData(
-                        time=resource_value.time,
-                        value=resource_value.value,
-                        resource=resource.resource_ptr
-                    ) for resource_value in historical_consumption
-            )
-
-        return data, count
-
-    def fetch_historical_data(self, resource, period):
-        data = []
-
-        if period.value == 'minute':
-            to_time = datetime.now() - timedelta(minutes=1)
-            from_time = to_time - timedelta(days=2)
-            data, _ = self.fetch_historical_data_query(resource, data, from_time, to_time, period)
-
-            if len(data):
-                now = datetime.now().replace(second=0, microsecond=0)
-                last_timestamp = data[-1].time.timestamp()
-                minutes_delay = (now - datetime.fromtimestamp(last_timestamp)).seconds // 60
-                resource.minutes_delay = minutes_delay
-                resource.save()
-
-            to_time = from_time - timedelta(minutes=1)
-            from_time = to_time - timedelta(days=2)
-            data, _ = self.fetch_historical_data_query(resource, data, from_time, to_time, period)
-
-            DetailedHistoricalData.objects.bulk_create(data)
+    def schedule_historical_data_backfills(meter, reset_history=False):
+        if meter.is_half_hour_meter:
+            HistoricalDataBackfill.schedule(meter, TimeResolution.HALF_HOUR, reset_history)
         else:
-            tomorrow = datetime.now() + timedelta(days=1)
-            to_time = tomorrow.replace(hour=0, minute=0, second=0, microsecond=0)
-            from_time = to_time - timedelta(days=10)
-            while True:
-                data, last_period_count = self.fetch_historical_data_query(resource, data, from_time, to_time - timedelta(minutes=30), period)
-                to_time = from_time
-                from_time = to_time - timedelta(days=10)
+            HistoricalDataBackfill.schedule(meter, TimeResolution.MINUTE, reset_history)
 
-                if last_period_count == 0:
-                    break
+            if not EnergyMeter.objects.filter(live_values_meter=meter.id).exists():
+                HistoricalDataBackfill.schedule(meter, TimeResolution.HALF_HOUR, reset_history)
 
-            LongTermHistoricalData.objects.bulk_create(data)
+            elif reset_history:
+                # the long term history isn't refilled for the live values meter, but the old one is of another meter
+                LongTermHistoricalData.objects.filter(resource_id=meter.id).delete()
+                meter.refresh_history_rollups()
 
-    def refresh_historical_data(self, meter):
-        DetailedHistoricalData.objects.filter(resource=meter.resource_ptr).delete()
-        LongTermHistoricalData.objects.filter(resource=meter.resource_ptr).delete()
+    def refresh_historical_data(self, meter, reset_history=False):
+        if reset_history and meter.is_half_hour_meter:
+            # the detailed history of the meter isn't refilled, it is kept only for a few days so it is small
+            DetailedHistoricalData.objects.filter(resource=meter.resource_ptr).delete()
 
-        if meter.is_half_hour_meter:
-            meter.minutes_delay = None
-            self.fetch_historical_data(meter, TimeResolution.HALF_HOUR)
-        else:
-            meter.minutes_delay = 0
-            self.fetch_historical_data(meter, TimeResolution.MINUTE)
-            try:
-                EnergyMeter.objects.get(live_values_meter=meter.id)
-            except EnergyMeter.DoesNotExist:
-                self.fetch_historical_data(meter, TimeResolution.HALF_HOUR)
+        meter.minutes_delay = None if meter.is_half_hour_meter else 0
         meter.save()
+        self.schedule_historical_data_backfills(meter, reset_history)
 
     def create(self, request):
         self.check_permission(request)
@@ -286,26 +242,14 @@ class ManageHildebrandMetersViewSet(ViewSet):
                     live_meter = None
 
                 if live_meter:
-                    self.fetch_historical_data(live_meter, TimeResolution.MINUTE)
+                    HistoricalDataBackfill.schedule(live_meter, TimeResolution.MINUTE)
             meter.save()
         except Exception as err:
             logger.error(f'create hildebrand meter: {err}')
             meter = None
 
         if meter:
-            try:
-                if meter.is_half_hour_meter:
-                    self.fetch_historical_data(meter, TimeResolution.HALF_HOUR)
-                else:
-                    self.fetch_historical_data(meter, TimeResolution.MINUTE)
-                    try:
-                        EnergyMeter.objects.get(live_values_meter=meter.id)
-                    except EnergyMeter.DoesNotExist:
-                        self.fetch_historical_data(meter, TimeResolution.HALF_HOUR)
-            except Exception as err:
-                logger.error(f'create hildebrand meter: (fetch data) {err}')
-                meter.delete(force_policy=HARD_DELETE)
-                meter = None
+            self.schedule_historical_data_backfills(meter)
 
         if meter and tariff_id:
             try:
@@ -357,8 +301,7 @@ class ManageHildebrandMetersViewSet(ViewSet):
                     live_meter.save()
 
                     if old_live_meter_id != live_meter_id:
-                        DetailedHistoricalData.objects.filter(resource__id=live_meter.pk).delete()
-                        self.fetch_historical_data(live_meter, TimeResolution.MINUTE)
+                        HistoricalDataBackfill.schedule(live_meter, TimeResolution.MINUTE, reset_history=True)
                 else:
                     try:
                         live_meter = self.create_meter(
@@ -373,10 +316,10 @@ class ManageHildebrandMetersViewSet(ViewSet):
                         live_meter = None
 
                     if live_meter:
-                        self.fetch_historical_data(live_meter, TimeResolution.MINUTE)
+                        HistoricalDataBackfill.schedule(live_meter, TimeResolution.MINUTE)
 
             if was_half_hour_meter is not is_half_hour_meter or old_meter_id != meter_id:
-                self.refresh_historical_data(meter)
+                self.refresh_historical_data(meter, reset_history=True)
 
         except Exception as err:
             logger.error(f'edit hildebrand meter: {err}')
@@ -405,5 +348,5 @@ class ManageHildebrandMetersViewSet(ViewSet):
             meter = None
         
         if meter:
-            return Response('Hildebrand meter data is successfully refreshed!', status=200)
+            return Response('Hildebrand meter data refresh is started!', status=200)
         return Response('Can not refresh Hildebrand meter data!', status=400)
@@ -6,7 +6,7 @@ from apps.resources.models import Resource
 from apps.energy_meters_billing_info.models import EnergyMeterBillingInfo, EnergyMeterBillingInfoConsumption
 from apps.locations.serializer_fileds import OwnLocationField, InOwnLocationPrimaryKeyRelatedField
 from apps.mug_service.constants import PeriodsByRateType
-from utilities.serializer_helpers import get_serializer_fields
+from utilities.serializer_helpers import SparseFieldsetSerializerMixin, get_serializer_fields
 
 
 class EnergyMeterBillingInfoConsumptionSerializer(EnumSupportSerializerMixin, serializers.ModelSerializer):
@@ -20,7 +20,8 @@ class EnergyMeterBillingInfoConsumptionSerializer(EnumSupportSerializerMixin, se
         )
 
 
-class EnergyMeterBillingInfoSerializer(EnumSupportSerializerMixin, serializers.ModelSerializer):
+class EnergyMeterBillingInfoSerializer(SparseFieldsetSerializerMixin, EnumSupportSerializerMixin,
+                                       serializers.ModelSerializer):
     location_id = OwnLocationField(source='location', required=False)
     resource_id = InOwnLocationPrimaryKeyRelatedField(
         queryset=Resource.objects.all(), source='resource', required=False,
@@ -26,6 +26,7 @@ from apps.resources.models import Resource
 from apps.locations.models import Location
 
 from apps.registration_requests.models import RegistrationRequest
+from utilities.pagination import OptInCursorPagination
 
 
 logger = logging.getLogger(__name__)
@@ -126,10 +127,13 @@ class EnergyMeterBillingInfoFilter(FilterSet):
 class EnergyMeterBillingInfoViewSet(ModelViewSet):
     serializer_class = EnergyMeterBillingInfoSerializer
     filterset_class = EnergyMeterBillingInfoFilter
+    pagination_class = OptInCursorPagination
 
     @own_location_only
     def get_queryset(self):
-        return EnergyMeterBillingInfo.objects.filter(location__id=self.request.user.location.id)
+        return EnergyMeterBillingInfo.objects \
+            .filter(location__id=self.request.user.location.id) \
+            .prefetch_related('consumption_by_rates')
 
     def get_serializer(self, *args, **kwargs):
         if self.action == self.bulk_create.__name__:
@@ -156,11 +160,14 @@ class EnergyMeterBillingInfoViewSet(ModelViewSet):
 
     def list(self, request):
         queryset = self.get_queryset()
-        serializer = EnergyMeterBillingInfoSerializer(queryset, many=True)
         download = request.GET.get('download', '')
         if download:
-            return self.export_to_excel(serializer.data)
-        return Response(serializer.data)
+            return self.export_to_excel(EnergyMeterBillingInfoSerializer(queryset, many=True).data)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(queryset, many=True).data)
 
     def retrieve(self, request, pk=None):
         queryset = self.get_queryset()
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ProvidersConfig(AppConfig):
     name = 'apps.energy_providers'
 
+    def ready(self):
+        # activate listeners:
+        # noinspection PyUnresolvedReferences
+        import apps.energy_providers.signals
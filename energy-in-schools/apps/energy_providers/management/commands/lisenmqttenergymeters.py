@@ -4,5 +4,12 @@ from apps.energy_providers.utils.mqtt_manager import MqttEnergyProviderConnectio
 
 
 class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument('--shard-index', type=int, default=0)
+        parser.add_argument('--shards-count', type=int, default=1)
+
     def handle(self, *args, **options):
-        MqttEnergyProviderConnectionManager().run_forever()
+        MqttEnergyProviderConnectionManager(
+            shard_index=options['shard_index'],
+            shards_count=options['shards_count'],
+        ).run_forever()
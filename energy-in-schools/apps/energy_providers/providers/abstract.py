@@ -1,12 +1,19 @@
 import json
+import logging
+import threading
 from abc import ABCMeta, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, NamedTuple, Optional, TYPE_CHECKING, Union
+from typing import Dict, List, NamedTuple, Optional, Sequence, TYPE_CHECKING, Tuple, Union
 
-import funcy
+import requests
+from django.db import connections
 from enumfields import Enum
 
 from apps.resources.types import ResourceDataNotAvailable, ResourceValue, TimeResolution
+from apps.smart_things_apps.types import AuthCredentialsError
+from utilities.caching import TwoTierCache, two_tier_cache
+from utilities.http_sessions import get_http_session
 
 
 if TYPE_CHECKING:
@@ -14,9 +21,21 @@ if TYPE_CHECKING:
     from apps.energy_meters.models import EnergyMeter
 
 METER_VALUE_CACHE = timedelta(seconds=1)
+METER_VALUE_CACHE_SIZE = 10_000
 ENERGY_METER_CACHE = timedelta(minutes=1)
+ENERGY_METER_CACHE_SIZE = 10_000
 RETRY_COUNT = 3
 SECONDS_BETWEEN_ATTEMPTS = timedelta(milliseconds=300).total_seconds()
+MAX_CONCURRENT_REQUESTS = 4
+
+logger = logging.getLogger(__name__)
+
+meter_value_cache = TwoTierCache('meter_value', METER_VALUE_CACHE, max_size=METER_VALUE_CACHE_SIZE)
+# model instances are kept only in the process
+energy_meter_cache = TwoTierCache('energy_meter', ENERGY_METER_CACHE, max_size=ENERGY_METER_CACHE_SIZE,
+                                  remote_cache=None)
+_concurrent_requests_semaphores: Dict[type, threading.BoundedSemaphore] = {}
+_concurrent_requests_semaphores_lock = threading.Lock()
 
 
 class ProviderError(Exception):
@@ -66,7 +85,7 @@ class Meter(NamedTuple):
             provider_account_id=self.provider_account_id,
         )
 
-    @funcy.cache(ENERGY_METER_CACHE)
+    @two_tier_cache(energy_meter_cache, key_func=lambda meter: meter)
     def get_energy_meter(self) -> 'EnergyMeter':
         from apps.energy_meters.models import EnergyMeter
 
@@ -114,10 +133,20 @@ class ProviderCredentials(NamedTuple):
         return json.dumps(self._asdict())
 
 
+def get_concurrent_requests_semaphore(connection_class: type) -> threading.BoundedSemaphore:
+    with _concurrent_requests_semaphores_lock:
+        if connection_class not in _concurrent_requests_semaphores:
+            _concurrent_requests_semaphores[connection_class] = \
+                threading.BoundedSemaphore(connection_class.max_concurrent_requests)
+
+        return _concurrent_requests_semaphores[connection_class]
+
+
 class AbstractProviderConnection(metaclass=ABCMeta):
     session_payload_class = None
     credentials_class = ProviderCredentials
     supported_time_resolutions = frozenset()
+    max_concurrent_requests = MAX_CONCURRENT_REQUESTS  # per provider within the process
 
     def __init__(self, config_container: ProviderConfigContainer):
         self.__config_container = config_container
@@ -126,6 +155,62 @@ class AbstractProviderConnection(metaclass=ABCMeta):
     def get_consumption(self, meter: 'Union[EnergyMeter, Meter]') -> ResourceValue:
         pass
 
+    def get_consumptions(self, meters: 'Sequence[Union[EnergyMeter, Meter]]') \
+            -> 'Dict[Union[EnergyMeter, Meter], Union[ResourceValue, List[ResourceValue]]]':
+        """
+        Fetch the consumption of the provider account's meters concurrently. Meters with failed requests are skipped,
+        meters rejected by the provider auth are fetched again after a new login and auth errors of the retry are raised
+        """
+        if not meters:
+            return {}
+
+        self.prepare_session()
+        consumptions, unauthorized_meters = self._fetch_consumptions(meters)
+
+        if unauthorized_meters:
+            self.prepare_session(relogin=True)  # the session might be revoked before its expiration
+            retried_consumptions, unauthorized_meters = self._fetch_consumptions(unauthorized_meters)
+            consumptions.update(retried_consumptions)
+
+            if unauthorized_meters:
+                raise unauthorized_meters[0][1]
+
+        return consumptions
+
+    def _fetch_consumptions(self, meters: 'Sequence[Union[EnergyMeter, Meter]]') \
+            -> 'Tuple[Dict[Union[EnergyMeter, Meter], Union[ResourceValue, List[ResourceValue]]], ' \
+               'List[Tuple[Union[EnergyMeter, Meter], Exception]]]':
+        semaphore = get_concurrent_requests_semaphore(type(self))
+
+        def get_consumption(meter):
+            try:
+                with semaphore:
+                    return self.get_consumption(meter), None
+
+            except (ProviderAuthError, AuthCredentialsError) as exception:
+                return None, exception
+
+            except Exception as exception:
+                logger.error(f'Consumption for "{meter}" is not fetched. Error: {exception}')
+                return None, None
+
+            finally:
+                connections.close_all()  # only connections of the worker thread
+
+        with ThreadPoolExecutor(max_workers=min(len(meters), self.max_concurrent_requests)) as executor:
+            results = dict(zip(meters, executor.map(get_consumption, meters)))
+
+        return (
+            {meter: consumption for meter, (consumption, _) in results.items() if consumption is not None},
+            [(meter, auth_error) for meter, (_, auth_error) in results.items() if auth_error],
+        )
+
+    def prepare_session(self, relogin: bool = False):
+        """
+        Called before concurrent requests for doing the shared work, like a login, only once
+        """
+        pass
+
     def get_historical_consumption(self, meter: 'Union[EnergyMeter, Meter]',
                                    from_date: datetime, to_date: Optional[datetime] = None,
                                    time_resolution: TimeResolution = TimeResolution.DAY) \
@@ -158,6 +243,10 @@ class AbstractProviderConnection(metaclass=ABCMeta):
     def credentials(self):
         return self.credentials_class.from_json(self.__config_container.credentials)
 
+    @property
+    def http_session(self) -> requests.Session:
+        return get_http_session((type(self).__name__, self.__config_container.credentials))
+
     def _validate_time_resolution(self, time_resolution: TimeResolution):
         if time_resolution not in self.supported_time_resolutions:
             raise TimeResolutionIsUnsupportedError
@@ -175,4 +264,4 @@ def cache_meter_value(func):
 
         return keys
 
-    return funcy.cache(METER_VALUE_CACHE, cache_key)(func)
+    return two_tier_cache(meter_value_cache, cache_key)(func)
@@ -2,13 +2,13 @@ from datetime import datetime, timedelta
 from typing import TYPE_CHECKING, Union
 
 import funcy
-import requests
 from requests import RequestException
 
 from apps.energy_providers.providers.abstract import AbstractProviderConnection, Meter, ProviderCredentials, \
     RETRY_COUNT, \
     SECONDS_BETWEEN_ATTEMPTS, UnknownProviderRequestError
 from apps.resources.types import ResourceDataNotAvailable, ResourceValue
+from utilities.http_sessions import get_http_session
 
 
 if TYPE_CHECKING:
@@ -34,7 +34,7 @@ class ChameleonProviderConnection(AbstractProviderConnection):
         :return:
             cached parsed response
         """
-        response = requests.post(
+        response = get_http_session(cls.__name__).post(
             ChameleonApiUrls.USAGE,
             json={
                 'eventType': 'power',
@@ -4,7 +4,6 @@ from http import HTTPStatus
 from typing import List, TYPE_CHECKING, Union
 
 import funcy
-import requests
 from requests import RequestException
 
 from apps.energy_providers.providers.abstract import Meter, MeterType, RETRY_COUNT, SECONDS_BETWEEN_ATTEMPTS, \
@@ -39,7 +38,7 @@ class GeoProviderConnection(RestProviderConnection):
     USE_NOW_INSTEAD_REAL_TIMESTAMP = True  # todo: remote this when GEO will be fixed
 
     def login(self):
-        response = requests.post(
+        response = self.http_session.post(
             GeoApiUrls.LOGIN,
             json={'emailAddress': self.credentials.login, 'password': self.credentials.password},
             headers={'Content-type': 'application/json'}
@@ -58,7 +57,7 @@ class GeoProviderConnection(RestProviderConnection):
         Retry on MeterDataNotFound is required because a response with an empty power field can be returned at the
         first attempt.
         """
-        response = requests.get(
+        response = self.http_session.get(
             GeoApiUrls.LIVE_USAGE.format(system_id=meter.meter_id),
             headers=self.get_auth_headers()
         )
@@ -91,7 +90,7 @@ class GeoProviderConnection(RestProviderConnection):
             TimeResolution.MONTH: 'month'
         }[time_resolution]
 
-        response = requests.get(
+        response = self.http_session.get(
             GeoApiUrls.HISTORICAL_USAGE.format(time_part=time_url_part, system_id=meter.meter_id),
             headers=self.get_auth_headers(),
             params={
@@ -123,7 +122,7 @@ class GeoProviderConnection(RestProviderConnection):
         ]
 
     def get_meters(self) -> List[Meter]:
-        response = requests.get(GeoApiUrls.USER_SYSTEMS, headers=self.get_auth_headers())
+        response = self.http_session.get(GeoApiUrls.USER_SYSTEMS, headers=self.get_auth_headers())
         self._check_response(response)
 
         return [
@@ -1,5 +1,4 @@
 import logging
-import requests
 
 from datetime import datetime, timezone, timedelta
 from typing import TYPE_CHECKING, Union, Optional
@@ -61,7 +60,7 @@ TIME_RESOLUTION_TO_PERIOD = {
 
 class HildebrandProviderConnection(RestProviderConnection):
     def login(self):
-        response = requests.post(
+        response = self.http_session.post(
             HildebrandApiUrls.LOGIN,
             json={'username': self.credentials.login, 'password': self.credentials.password},
             headers={'Content-type': 'application/json'}
@@ -92,7 +91,7 @@ class HildebrandProviderConnection(RestProviderConnection):
             function: str = 'sum',
             offset: int = 0,
     ):
-        response = requests.get(
+        response = self.http_session.get(
             HildebrandApiUrls.GET_RESOURCE_DATA.format(resource_id=resource_id),
             headers={
                 'token': self.get_auth_token(),
@@ -155,7 +154,7 @@ class HildebrandProviderConnection(RestProviderConnection):
         return next(index for index, (_, value) in reverse(list(enumerate(data))) if value is not None)
 
     def get_tariff(self, tariff_id: str):
-        response = requests.get(
+        response = self.http_session.get(
             HildebrandApiUrls.GET_TARIFF.format(resource_id=tariff_id),
             headers={
                 'token': self.get_auth_token(),
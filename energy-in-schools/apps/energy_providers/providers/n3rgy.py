@@ -2,12 +2,12 @@ from datetime import datetime, timedelta
 from typing import TYPE_CHECKING, Union
 
 import funcy
-import requests
 from requests import RequestException
 
 from apps.energy_providers.providers.abstract import Meter, RETRY_COUNT, SECONDS_BETWEEN_ATTEMPTS, \
     UnknownProviderRequestError
 from apps.energy_providers.providers.rest import RestProviderConnection
+from utilities.http_sessions import get_http_session
 from utilities.rest import RestSessionPayload
 from apps.resources.types import ResourceDataNotAvailable, ResourceValue, Unit
 
@@ -27,7 +27,7 @@ N3RGY_REQUEST_TIMEDELTA = timedelta(minutes=10)  # XXX TODO should be discussed
 class N3RGYProviderConnection(RestProviderConnection):
 
     def login(self):
-        response = requests.get(
+        response = self.http_session.get(
             N3RGYApiUrls.API_KEYS,
             params={
                 'email': self.credentials.login,
@@ -59,7 +59,7 @@ class N3RGYProviderConnection(RestProviderConnection):
         cached parsed response
         curl "https://sandboxapi.data.n3rgy.com/1234567891000/electricity/consumption/1?start=20130501&end=20130514?granularity=day" -H "authorization: bcb5bc36-6826-430d-9cda-e7785d1500d0"
         """
-        response = requests.get(
+        response = get_http_session(cls.__name__).get(
             N3RGYApiUrls.USAGE.format(
                 meter_id=meter_id,
                 energy_type=energy_type.lower(),
@@ -3,7 +3,6 @@ from http import HTTPStatus
 from typing import Dict, List
 
 import funcy
-import requests
 
 from apps.energy_providers.providers.abstract import Meter, MeterType, ProviderError, cache_meter_value
 from apps.energy_providers.providers.rest import RestProviderConnection
@@ -29,7 +28,7 @@ TYPE_LABEL_TO_METER_TYPE = {
 
 class OvoProviderConnection(RestProviderConnection):
     def login(self):
-        response = requests.post(
+        response = self.http_session.post(
             OvoApiUrls.LOGIN,
             json={'rememberMe': True, 'username': self.credentials.login, 'password': self.credentials.password},
             headers={'Content-type': 'application/json'}
@@ -43,7 +42,7 @@ class OvoProviderConnection(RestProviderConnection):
     @funcy.retry(3)
     def get_consumption(self, meter_id: str) -> float:
         url = OvoApiUrls.LIVE_USAGE.format(meter_id=meter_id)
-        response = requests.get(url, headers=self.get_auth_headers())
+        response = self.http_session.get(url, headers=self.get_auth_headers())
 
         if response.status_code != HTTPStatus.OK:
             raise ProviderError(response.text or response.status_code)
@@ -55,7 +54,7 @@ class OvoProviderConnection(RestProviderConnection):
         raise NotImplementedError
 
     def get_meters(self) -> List[Meter]:
-        response = requests.get(OvoApiUrls.ACCOUNTS, headers=self.get_auth_headers())
+        response = self.http_session.get(OvoApiUrls.ACCOUNTS, headers=self.get_auth_headers())
 
         return [
             Meter(
@@ -39,6 +39,12 @@ class RestProviderConnection(AbstractProviderConnection):
         except (ProviderAuthError, ProviderError) as error:
             raise ProviderValidateError from error
 
+    def prepare_session(self, relogin: bool = False):
+        if relogin:
+            self._session_payload = self.login()
+        else:
+            self.get_auth_token()
+
     def get_auth_token(self) -> str:
         try:
             payload = self._session_payload
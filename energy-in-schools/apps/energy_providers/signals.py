@@ -0,0 +1,56 @@
+from typing import Optional, Sequence
+
+import funcy
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from safedelete.signals import post_softdelete
+
+from apps.energy_meters.models import EnergyMeter
+from apps.energy_providers.models import EnergyProviderAccount
+from apps.energy_providers.utils.mqtt_manager import publish_provider_account_changes
+
+
+MQTT_SUBSCRIPTION_FIELDS = ('meter_id', 'type', 'provider_account_id', 'deleted')
+MQTT_SUBSCRIPTION_UPDATE_FIELDS = {*MQTT_SUBSCRIPTION_FIELDS, 'provider_account'}
+
+
+@receiver(pre_save, sender=EnergyMeter, dispatch_uid='check_mqtt_meter_subscription_changes')
+def check_mqtt_energy_meter_subscription_changes(instance: EnergyMeter, update_fields: Optional[Sequence[str]] = None,
+                                                 **_):
+    """
+    Meters are saved often without changes of subscriptions, for example by adding of long term history
+    """
+    if instance.pk is None:
+        is_changed = True
+
+    elif update_fields is not None:
+        is_changed = bool(MQTT_SUBSCRIPTION_UPDATE_FIELDS & set(update_fields))
+
+    else:
+        is_changed = tuple(getattr(instance, field) for field in MQTT_SUBSCRIPTION_FIELDS) != \
+            EnergyMeter.all_objects.filter(pk=instance.pk).values_list(*MQTT_SUBSCRIPTION_FIELDS).first()
+
+    instance._is_mqtt_subscription_changed = is_changed
+
+
+@receiver(post_save, sender=EnergyMeter, dispatch_uid='publish_mqtt_meter_changes')
+def publish_mqtt_energy_meter_changes_on_save(instance: EnergyMeter, **kwargs):
+    if getattr(instance, '_is_mqtt_subscription_changed', True):
+        publish_mqtt_energy_meter_changes(instance, **kwargs)
+
+
+@receiver((post_delete, post_softdelete), sender=EnergyMeter, dispatch_uid='publish_mqtt_meter_deletions')
+@funcy.ignore(EnergyProviderAccount.DoesNotExist)
+def publish_mqtt_energy_meter_changes(instance: EnergyMeter, **_):
+    if instance.provider_account.provider.is_support_mqtt:
+        # the manager should read the changes only after the atomic block:
+        transaction.on_commit(lambda: publish_provider_account_changes(instance.provider_account_id))
+
+
+@receiver((post_save, post_delete, post_softdelete), sender=EnergyProviderAccount,
+          dispatch_uid='publish_mqtt_provider_account_changes')
+def publish_mqtt_provider_account_changes(instance: EnergyProviderAccount, **_):
+    if instance.provider.is_support_mqtt:
+        # credentials can be changed, so the connection is reopened:
+        transaction.on_commit(lambda: publish_provider_account_changes(instance.id, reconnect=True))
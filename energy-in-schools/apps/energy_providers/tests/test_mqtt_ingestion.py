@@ -0,0 +1,107 @@
+import threading
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+from apps.energy_providers.providers.abstract import Meter, MeterType
+from apps.energy_providers.tests.base_test_case import EnergyProviderBaseTestCase
+from apps.energy_providers.tests.test_mqtt_subscriber import FakeMqttProviderConnection, MqttClientMock
+from apps.energy_providers.utils.mqtt_ingestion import MqttIngestionMetrics, MqttIngestionPipeline
+from apps.energy_providers.utils.mqtt_subscriber import MqttEnergySubscriber
+from apps.resources.types import ResourceValue, Unit
+
+
+@patch('apps.energy_providers.models.EnergyProviderAccount.get_connection_class',
+       return_value=FakeMqttProviderConnection)
+@patch('apps.energy_providers.utils.mqtt_subscriber.MqttClient', new=MqttClientMock)
+class TestMqttIngestionPipeline(EnergyProviderBaseTestCase):
+    def test_on_event_enqueues_value(self, _):
+        pipeline = MqttIngestionPipeline()
+        mqtt_subscriber = MqttEnergySubscriber(
+            provider_connection=self.energy_provider.connection,
+            energy_meters=(Meter.get_only_unique_fields(self.energy_meter),),
+            ingestion_pipeline=pipeline,
+        )
+        message = MagicMock()
+        message.payload = 'any'
+
+        event_callback = mqtt_subscriber.client.message_callback_add.call_args[0][1]
+        event_callback(None, None, message)
+
+        self.assertEqual(0, self.energy_meter.detailed_historical_data.count())
+        self.assertEqual(1, pipeline.metrics.queued_values)
+
+        pipeline.flush()
+
+        self.assertEqual(42, self.energy_meter.detailed_historical_data.get().value)
+        self.assertEqual(
+            MqttIngestionMetrics(
+                queued_values=0,
+                enqueued_values=1,
+                dropped_values=0,
+                written_values=1,
+                failed_values=0,
+                written_batches=1,
+            ),
+            pipeline.metrics
+        )
+
+    def test_batch_write(self, _):
+        pipeline = MqttIngestionPipeline(writers_count=1, batch_size=10)
+        another_meter = self.create_energy_meter()
+
+        for minute in range(15):
+            for energy_meter in (self.energy_meter, another_meter):
+                pipeline.put(energy_meter, self._get_value(minute))
+
+        pipeline.put(Meter(meter_id='removed', type=MeterType.GAS, provider_account_id=self.energy_provider.id),
+                     self._get_value(0))
+
+        pipeline.flush()
+
+        self.assertEqual(15, self.energy_meter.detailed_historical_data.count())
+        self.assertEqual(15, another_meter.detailed_historical_data.count())
+        self.assertEqual(30, pipeline.metrics.written_values)
+        self.assertEqual(1, pipeline.metrics.failed_values)
+        self.assertEqual(4, pipeline.metrics.written_batches)
+
+    def test_full_queue(self, _):
+        pipeline = MqttIngestionPipeline(queue_size=1, writers_count=1)
+
+        self.assertTrue(pipeline.put(self.energy_meter, self._get_value(0)))
+        self.assertFalse(pipeline.put(self.energy_meter, self._get_value(1)))
+
+        self.assertEqual(1, pipeline.metrics.queued_values)
+        self.assertEqual(1, pipeline.metrics.dropped_values)
+
+    def test_stop_with_busy_writer(self, _):
+        pipeline = MqttIngestionPipeline(writers_count=1, batch_size=1)
+        write_started, write_released = threading.Event(), threading.Event()
+
+        def write(_):
+            write_started.set()
+            write_released.wait()
+
+        with patch.object(pipeline, '_write', side_effect=write) as write_mock:
+            pipeline.put(self.energy_meter, self._get_value(0))
+            pipeline.start()
+            write_started.wait()
+            pipeline.put(self.energy_meter, self._get_value(1))
+
+            pipeline.stop(timeout=timedelta(milliseconds=100))
+
+            self.assertTrue(pipeline.is_running)
+            self.assertEqual(1, write_mock.call_count)
+            self.assertEqual(1, pipeline.metrics.queued_values)
+
+            write_released.set()
+            pipeline.stop()
+
+            self.assertFalse(pipeline.is_running)
+
+    @staticmethod
+    def _get_value(minute: int) -> ResourceValue:
+        return ResourceValue(
+            time=datetime(2000, 10, 10, tzinfo=timezone.utc) + timedelta(minutes=minute),
+            value=minute,
+            unit=Unit.WATT
+        )
@@ -1 +1,72 @@
-# todo test MqttEnergyProviderConnectionManager
+import json
+from unittest.mock import MagicMock, patch
+
+from apps.energy_providers.providers.abstract import Meter
+from apps.energy_providers.tests.base_test_case import EnergyProviderBaseTestCase
+from apps.energy_providers.utils.mqtt_manager import MqttEnergyProviderConnectionManager
+
+
+@patch('apps.energy_providers.utils.mqtt_manager.MqttEnergySubscriber')
+class TestMqttEnergyProviderConnectionManager(EnergyProviderBaseTestCase):
+    def test_update_provider_account_subscriptions(self, subscriber_mock: MagicMock):
+        manager = self._create_manager()
+
+        with self.subTest('open connection'):
+            manager.update_provider_account_subscriptions(self.energy_provider.id)
+
+            subscriber_mock.return_value.connect.assert_called_once_with()
+            subscriber_mock.return_value.update_subscriptions.assert_called_once_with(
+                {Meter.get_only_unique_fields(self.energy_meter)}
+            )
+
+        with self.subTest('close connection'):
+            self.energy_meter.delete()
+            manager.update_provider_account_subscriptions(self.energy_provider.id)
+
+            subscriber_mock.return_value.disconnect.assert_called_once_with()
+            self.assertEqual({}, manager.connections)
+
+    def test_handle_provider_account_changes(self, subscriber_mock: MagicMock):
+        manager = self._create_manager()
+        manager.update_provider_account_subscriptions(self.energy_provider.id)
+
+        manager.handle_provider_account_changes(json.dumps(dict(
+            provider_account_id=self.energy_provider.id,
+            reconnect=True,
+        )).encode())
+
+        subscriber_mock.return_value.disconnect.assert_called_once_with()
+        self.assertEqual(2, subscriber_mock.return_value.connect.call_count)
+        self.assertIn(self.energy_provider.id, manager.connections)
+
+    def test_collect_closed_connections(self, subscriber_mock: MagicMock):
+        manager = self._create_manager()
+        manager.update_provider_account_subscriptions(self.energy_provider.id)
+        subscriber_mock.return_value.is_running = False
+
+        manager.collect_closed_connections()
+
+        subscriber_mock.return_value.disconnect.assert_called_once_with()
+        self.assertEqual(2, subscriber_mock.return_value.connect.call_count)
+        self.assertEqual(2, subscriber_mock.return_value.update_subscriptions.call_count)
+        self.assertIn(self.energy_provider.id, manager.connections)
+
+    def test_sharding(self, _):
+        managers = [self._create_manager(shard_index, shards_count=3) for shard_index in range(3)]
+
+        for provider_account_id in range(100):
+            self.assertEqual(1, sum(manager.is_own_provider_account(provider_account_id) for manager in managers))
+
+        self.assertTrue(all(
+            any(manager.is_own_provider_account(provider_account_id) for provider_account_id in range(100))
+            for manager in managers
+        ))
+
+    def _create_manager(self, shard_index: int = 0, shards_count: int = 1) -> MqttEnergyProviderConnectionManager:
+        manager = MqttEnergyProviderConnectionManager(
+            ingestion_pipeline=MagicMock(),
+            shard_index=shard_index,
+            shards_count=shards_count
+        )
+        manager.__dict__['_mqtt_providers'] = [self.energy_provider.provider]
+        return manager
@@ -1,13 +1,16 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import List, Optional, Union
 from unittest.mock import patch
 
 from apps.energy_meters.models import EnergyMeter
-from apps.energy_providers.providers.abstract import Meter, ProviderCredentials
+from apps.energy_providers.providers.abstract import Meter, MeterType, ProviderAuthError, ProviderConfigContainer, \
+    ProviderCredentials, cache_meter_value, meter_value_cache
 from apps.energy_providers.providers.rest import RestProviderConnection
 from utilities.rest import RestSessionPayload
 from apps.energy_providers.tests.base_test_case import EnergyProviderBaseTestCase
-from apps.resources.types import ResourceValue, TimeResolution
+from apps.resources.types import ResourceDataNotAvailable, ResourceValue, TimeResolution, Unit
 
 
 class FakeProvider(RestProviderConnection):
@@ -27,6 +30,42 @@ class FakeProvider(RestProviderConnection):
         pass
 
 
+class FakeBulkProvider(FakeProvider):
+    max_concurrent_requests = 2
+
+    def get_consumption(self, meter: 'Union[EnergyMeter, Meter]') -> ResourceValue:
+        if meter.meter_id == 'broken':
+            raise ResourceDataNotAvailable
+
+        return ResourceValue(time=datetime(2000, 10, 10, tzinfo=timezone.utc), value=int(meter.meter_id),
+                             unit=Unit.WATT)
+
+
+class FakeRevokedSessionProvider(FakeBulkProvider):
+    logins_count = 0
+
+    def login(self) -> RestSessionPayload:
+        self.logins_count += 1
+        return RestSessionPayload(f'token {self.logins_count}', datetime.now() + timedelta(hours=1))
+
+    def get_consumption(self, meter: 'Union[EnergyMeter, Meter]') -> ResourceValue:
+        if self.get_auth_token() == 'token 1' and meter.meter_id != '1':
+            raise ProviderAuthError
+
+        return super().get_consumption(meter)
+
+
+class FakeCachedProvider(FakeProvider):
+    calls_count = 0
+
+    @cache_meter_value
+    def get_consumption(self, meter: 'Union[EnergyMeter, Meter]') -> ResourceValue:
+        time.sleep(0.1)
+        FakeCachedProvider.calls_count += 1
+
+        return ResourceValue(time=datetime(2000, 10, 10, tzinfo=timezone.utc), value=42, unit=Unit.WATT)
+
+
 @patch('apps.energy_providers.models.EnergyProviderAccount.get_connection_class', return_value=FakeProvider)
 class TestEnergyProvider(EnergyProviderBaseTestCase):
     def test_session_data(self, _):
@@ -54,3 +93,55 @@ class TestEnergyProvider(EnergyProviderBaseTestCase):
             self.energy_provider.connection.get_auth_token()
 
             self.assertEqual(session_payload, self.energy_provider.connection._session_payload)
+
+    def test_http_session(self, _):
+        self.assertIs(self.energy_provider.connection.http_session, self.energy_provider.connection.http_session)
+        self.assertIsNot(
+            self.energy_provider.connection.http_session,
+            FakeProvider(ProviderConfigContainer('{"login": "other", "password": "passsss"}')).http_session
+        )
+
+    def test_get_consumptions(self, _):
+        connection = FakeBulkProvider(ProviderConfigContainer('{"login": "log", "password": "passsss"}'))
+        meters = [Meter(meter_id=meter_id, type=MeterType.ELECTRICITY) for meter_id in ('1', '2', 'broken', '3')]
+
+        consumptions = connection.get_consumptions(meters)
+
+        self.assertEqual(
+            {meter.meter_id: float(meter.meter_id) for meter in meters if meter.meter_id != 'broken'},
+            {meter.meter_id: consumption.value for meter, consumption in consumptions.items()}
+        )
+        self.assertEqual({}, connection.get_consumptions([]))
+
+    def test_get_consumptions_with_revoked_session(self, _):
+        connection = FakeRevokedSessionProvider(ProviderConfigContainer('{"login": "log", "password": "passsss"}'))
+        meters = [Meter(meter_id=meter_id, type=MeterType.ELECTRICITY) for meter_id in ('1', '2', '3')]
+
+        consumptions = connection.get_consumptions(meters)
+
+        self.assertEqual(2, connection.logins_count)
+        self.assertEqual(
+            {meter.meter_id: float(meter.meter_id) for meter in meters},
+            {meter.meter_id: consumption.value for meter, consumption in consumptions.items()}
+        )
+
+        with self.subTest('Revoked session after the login'), self.assertRaises(ProviderAuthError):
+            connection = FakeRevokedSessionProvider(ProviderConfigContainer('{"login": "log", "password": "passsss"}'))
+            connection.login = lambda: RestSessionPayload('token 1', datetime.now() + timedelta(hours=1))
+
+            connection.get_consumptions(meters)
+
+    def test_cache_meter_value(self, _):
+        FakeCachedProvider.get_consumption.invalidate_all()
+        connection = FakeCachedProvider(ProviderConfigContainer('{"login": "log", "password": "passsss"}'))
+        meter = Meter(meter_id='cached', type=MeterType.ELECTRICITY, provider_account_id=-1)
+        stats_before = meter_value_cache.stats
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            values = list(executor.map(lambda _: connection.get_consumption(meter), range(4)))
+
+        stats = meter_value_cache.stats
+        self.assertEqual(1, FakeCachedProvider.calls_count)
+        self.assertEqual([values[0]] * 4, values)
+        self.assertEqual(1, stats.misses - stats_before.misses)
+        self.assertEqual(3, sum(stats) - sum(stats_before) - 1)  # all others are hits or coalesced calls
@@ -0,0 +1,183 @@
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, List, NamedTuple, Optional, TYPE_CHECKING, Tuple, Union
+
+import funcy
+from django.db import close_old_connections
+
+from apps.energy_providers.providers.abstract import Meter
+from apps.resources.types import ResourceValue
+
+
+if TYPE_CHECKING:
+    from apps.energy_meters.models import EnergyMeter
+
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 10_000
+WRITERS_COUNT = 2
+BATCH_SIZE = 500
+FLUSH_INTERVAL = timedelta(seconds=5)
+
+
+class MqttIngestionMetrics(NamedTuple):
+    queued_values: int
+    enqueued_values: int
+    dropped_values: int
+    written_values: int
+    failed_values: int
+    written_batches: int
+
+
+class MqttIngestionPipeline:
+    """
+    Decouples MQTT callbacks from the database: callbacks only put parsed values to bounded queues and the writer
+    threads save them by batches. Values of one meter always go to the same writer, so they are written in order.
+    When a queue is full new values are dropped and counted in the metrics.
+    """
+
+    def __init__(
+            self,
+            queue_size: int = QUEUE_SIZE,
+            writers_count: int = WRITERS_COUNT,
+            batch_size: int = BATCH_SIZE,
+            flush_interval: timedelta = FLUSH_INTERVAL,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queues: List[queue.Queue] = [queue.Queue(maxsize=queue_size) for _ in range(writers_count)]
+        self._writers: List[threading.Thread] = []
+        self._stop_event = threading.Event()
+        self._metrics_lock = threading.Lock()
+        self._counters = defaultdict(int)
+
+    def put(self, meter: 'Union[EnergyMeter, Meter]', value: ResourceValue) -> bool:
+        meter = Meter.get_only_unique_fields(meter)
+
+        try:
+            self._get_queue(meter).put_nowait((meter, value))
+
+        except queue.Full:
+            self._count('dropped_values')
+            logger.warning(f'MQTT ingestion queue is full, value for "{meter}" is dropped')
+            return False
+
+        self._count('enqueued_values')
+        return True
+
+    def start(self):
+        self._stop_event.clear()
+        self._writers = [
+            threading.Thread(target=self._run_writer, args=(values_queue,), name=f'mqtt-writer-{index}', daemon=True)
+            for index, values_queue in enumerate(self._queues)
+        ]
+
+        for writer in self._writers:
+            writer.start()
+
+    def stop(self, timeout: Optional[timedelta] = None):
+        self._stop_event.set()
+
+        for writer in self._writers:
+            writer.join(timeout.total_seconds() if timeout else None)
+
+        self._writers = [writer for writer in self._writers if writer.is_alive()]
+
+        if self._writers:  # flushing would drain the queues together with the writers
+            logger.warning(f'MQTT ingestion writers are not stopped in {timeout}, queued values are not flushed')
+            return
+
+        self.flush()
+
+    def flush(self):
+        """
+        Write all queued values in the current thread. Use it only when writers are not running
+        """
+        for values_queue in self._queues:
+            while not values_queue.empty():
+                self._write(self._get_batch(values_queue, block=False))
+
+    @property
+    def is_running(self) -> bool:
+        return any(writer.is_alive() for writer in self._writers)
+
+    @property
+    def metrics(self) -> MqttIngestionMetrics:
+        with self._metrics_lock:
+            return MqttIngestionMetrics(
+                queued_values=sum(values_queue.qsize() for values_queue in self._queues),
+                enqueued_values=self._counters['enqueued_values'],
+                dropped_values=self._counters['dropped_values'],
+                written_values=self._counters['written_values'],
+                failed_values=self._counters['failed_values'],
+                written_batches=self._counters['written_batches'],
+            )
+
+    def _get_queue(self, meter: Meter) -> queue.Queue:
+        return self._queues[hash(meter) % len(self._queues)]
+
+    def _run_writer(self, values_queue: queue.Queue):
+        while not self._stop_event.is_set():
+            batch = self._get_batch(values_queue, block=True)
+
+            if batch:
+                close_old_connections()
+                self._write(batch)
+
+    def _get_batch(self, values_queue: queue.Queue, block: bool) -> List[Tuple[Meter, ResourceValue]]:
+        batch = []
+        flush_time = time.monotonic() + self.flush_interval.total_seconds()
+
+        while len(batch) < self.batch_size:
+            timeout = flush_time - time.monotonic()
+
+            try:
+                if block and timeout > 0:
+                    batch.append(values_queue.get(timeout=timeout))
+                else:
+                    batch.append(values_queue.get_nowait())
+
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _write(self, batch: List[Tuple[Meter, ResourceValue]]):
+        from apps.energy_meters.models import EnergyMeter
+        from apps.resources.models import Resource
+
+        values_by_energy_meter: Dict[EnergyMeter, List[ResourceValue]] = defaultdict(list)
+
+        for meter, values in funcy.group_values(batch).items():
+            try:
+                values_by_energy_meter[meter.get_energy_meter()].extend(values)
+            except EnergyMeter.DoesNotExist:
+                self._count('failed_values', len(values))  # the meter can be removed already
+
+        try:
+            Resource.add_values_for_resources(values_by_energy_meter)
+            self._count('written_values', sum(map(len, values_by_energy_meter.values())))
+
+        except Exception as exception:
+            logger.error(f'Batch of MQTT values is not saved, saving values per meter. Error: {exception}')
+
+            for energy_meter, values in values_by_energy_meter.items():
+                try:
+                    energy_meter.add_values(values)
+                    self._count('written_values', len(values))
+
+                except Exception as error:
+                    logger.error(f'MQTT values for "{energy_meter}" are not saved. Error: {error}')
+                    self._count('failed_values', len(values))
+
+        self._count('written_batches')
+
+    def _count(self, counter_name: str, value: int = 1):
+        with self._metrics_lock:
+            self._counters[counter_name] += value
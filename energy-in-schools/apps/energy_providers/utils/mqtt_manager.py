@@ -1,26 +1,84 @@
+import hashlib
+import json
+import logging
 import time
 from datetime import timedelta
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Set
 
 import funcy
+from cacheops.redis import redis_client
 
 from apps.energy_meters.models import EnergyMeter
 from apps.energy_providers.models import EnergyProviderAccount
 from apps.energy_providers.providers.abstract import Meter
+from apps.energy_providers.utils.mqtt_ingestion import MqttIngestionPipeline
 from apps.energy_providers.utils.mqtt_subscriber import MqttEnergySubscriber
 
 
+logger = logging.getLogger(__name__)
+
+PROVIDER_ACCOUNTS_CHANGES_CHANNEL = 'mqtt_provider_accounts_changes'
+
+
+@funcy.silent
+@funcy.log_errors(logger.error)
+def publish_provider_account_changes(provider_account_id: int, reconnect: bool = False):
+    redis_client.publish(
+        PROVIDER_ACCOUNTS_CHANGES_CHANNEL,
+        json.dumps(dict(provider_account_id=provider_account_id, reconnect=reconnect))
+    )
+
+
 class MqttEnergyProviderConnectionManager:
-    UPDATE_PROVIDERS_DELAY = timedelta(minutes=5)
+    """
+    Subscriptions are updated by changes of energy meters and provider accounts published to Redis, the full update
+    is made from time to time only as a fail over for lost changes.
+    Provider accounts can be split between several managers by shard_index and shards_count.
+    """
+    UPDATE_PROVIDERS_DELAY = timedelta(hours=1)
+    COLLECT_CLOSED_CONNECTIONS_DELAY = timedelta(seconds=30)
+
+    def __init__(self, ingestion_pipeline: MqttIngestionPipeline = None, shard_index: int = 0, shards_count: int = 1):
+        assert 0 <= shard_index < shards_count, 'shard_index must be in the range [0, shards_count)'
 
-    def __init__(self):
         self.connections: Dict[int, MqttEnergySubscriber] = {}  # {provider_id: client}
+        self.ingestion_pipeline = ingestion_pipeline or MqttIngestionPipeline()
+        self.shard_index = shard_index
+        self.shards_count = shards_count
 
     def run_forever(self):
-        while True:
-            self.collect_closed_connections()
-            self.update_subscriptions()
-            time.sleep(self.UPDATE_PROVIDERS_DELAY.total_seconds())
+        self.ingestion_pipeline.start()
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(PROVIDER_ACCOUNTS_CHANGES_CHANNEL)
+        next_update_time = 0
+
+        try:
+            while True:
+                if time.monotonic() >= next_update_time:
+                    self.update_subscriptions()
+                    next_update_time = time.monotonic() + self.UPDATE_PROVIDERS_DELAY.total_seconds()
+
+                message = pubsub.get_message(timeout=self.COLLECT_CLOSED_CONNECTIONS_DELAY.total_seconds())
+
+                if message:
+                    self.handle_provider_account_changes(message['data'])
+
+                self.collect_closed_connections()
+
+        finally:
+            pubsub.close()
+            self.ingestion_pipeline.stop()
+
+    @funcy.silent
+    @funcy.log_errors(logger.error)
+    def handle_provider_account_changes(self, message_data: bytes):
+        changes = json.loads(message_data)
+        provider_account_id = changes['provider_account_id']
+
+        if changes.get('reconnect') and provider_account_id in self.connections:
+            self.close_connection(provider_account_id)
+
+        self.update_provider_account_subscriptions(provider_account_id)
 
     def update_subscriptions(self):
         fresh_meters = self._get_fresh_meters()
@@ -36,8 +94,36 @@ class MqttEnergyProviderConnectionManager:
 
             self.connections[provider_account_id].update_subscriptions(fresh_meters_per_provider)
 
+    def update_provider_account_subscriptions(self, provider_account_id: int):
+        if not self.is_own_provider_account(provider_account_id):
+            return
+
+        fresh_meters = self._get_fresh_meters(provider_account_id)
+
+        if not fresh_meters:
+            if provider_account_id in self.connections:
+                self.close_connection(provider_account_id)
+            return
+
+        if provider_account_id not in self.connections:
+            self.open_connection(provider_account_id)
+
+        self.connections[provider_account_id].update_subscriptions(fresh_meters)
+
+    def is_own_provider_account(self, provider_account_id: int) -> bool:
+        """
+        Rendezvous hashing: only accounts of the removed or added shard are moved when shards count is changed
+        """
+        return self.shard_index == max(
+            range(self.shards_count),
+            key=lambda shard_index: hashlib.md5(f'{shard_index}:{provider_account_id}'.encode()).digest()
+        )
+
     def open_connection(self, provider_id: int):
-        connection = MqttEnergySubscriber(EnergyProviderAccount.objects.get(id=provider_id).connection)
+        connection = MqttEnergySubscriber(
+            EnergyProviderAccount.objects.get(id=provider_id).connection,
+            ingestion_pipeline=self.ingestion_pipeline,
+        )
         connection.connect()
         self.connections[provider_id] = connection
 
@@ -45,16 +131,20 @@ class MqttEnergyProviderConnectionManager:
         self.connections[provider_id].disconnect()
         del self.connections[provider_id]
 
-    def _get_fresh_meters(self) -> Set[Meter]:
+    def _get_fresh_meters(self, provider_account_id: Optional[int] = None) -> Set[Meter]:
+        queryset = EnergyMeter.objects.filter(provider_account__provider__in=self._mqtt_providers)
+
+        if provider_account_id is not None:
+            queryset = queryset.filter(provider_account_id=provider_account_id)
+
         return set(
             Meter(**energy_meter_data)
             for energy_meter_data in
-            EnergyMeter
-                .objects
-                .filter(provider_account__provider__in=self._mqtt_providers)
+            queryset
                 .values('meter_id', 'type', 'provider_account_id')
                 .order_by('provider_account_id')
                 .all()
+            if self.is_own_provider_account(energy_meter_data['provider_account_id'])
         )
 
     @funcy.cached_property
@@ -69,3 +159,10 @@ class MqttEnergyProviderConnectionManager:
         for provider_id, mqtt_energy_subscriber in self.connections.copy().items():
             if not mqtt_energy_subscriber.is_running:
                 self.close_connection(provider_id)
+                self.reopen_connection(provider_id)
+
+    @funcy.silent
+    @funcy.log_errors(logger.error)
+    def reopen_connection(self, provider_id: int):
+        """the connection is reopened here, not by the hourly full update, so live values are lost only shortly"""
+        self.update_provider_account_subscriptions(provider_id)
@@ -17,6 +17,7 @@ logger = logging.getLogger(__name__)
 if TYPE_CHECKING:
     from apps.energy_meters.models import EnergyMeter
     from apps.energy_providers.providers.mqtt import MqttProviderConnection
+    from apps.energy_providers.utils.mqtt_ingestion import MqttIngestionPipeline
 
 
 class MqttEnergySubscriberError(Exception):
@@ -27,9 +28,14 @@ class MqttEnergySubscriber:
     def __init__(
             self,
             provider_connection: 'MqttProviderConnection',
-            energy_meters: 'Iterable[Union[EnergyMeter, Meter]]' = ()
+            energy_meters: 'Iterable[Union[EnergyMeter, Meter]]' = (),
+            ingestion_pipeline: 'MqttIngestionPipeline' = None,
     ):
+        """
+        :param ingestion_pipeline: values are passed to the pipeline instead of saving them in the network thread
+        """
         self.provider_connection: 'MqttProviderConnection' = provider_connection
+        self.ingestion_pipeline = ingestion_pipeline
         self._subscribed_meters: Set[Meter] = set()
         self._connect_result = None
         self.last_value: ResourceValue = None
@@ -121,6 +127,10 @@ class MqttEnergySubscriber:
         logger.debug(f'MQTT event for meter meter_id: "{energy_meter.meter_id}": "{message.payload}"')
         self.last_value = self.provider_connection.parse_message(message.payload, energy_meter)
 
+        if self.ingestion_pipeline:
+            self.ingestion_pipeline.put(energy_meter, self.last_value)
+            return
+
         if isinstance(energy_meter, Meter):
             try:
                 energy_meter = energy_meter.get_energy_meter()
@@ -4,13 +4,14 @@ from taggit_serializer.serializers import TagListSerializerField, TaggitSerializ
 
 from apps.forum.models.topic import Topic
 from apps.forum.serializers.comment import CommentSerializer
-from utilities.serializer_helpers import get_serializer_fields, get_serializer_kwargs
+from utilities.serializer_helpers import SparseFieldsetSerializerMixin, get_serializer_fields, get_serializer_kwargs
 
 
 VALID_TOPIC_TAGS = ['schools_portal', 'problem', 'new_functionality', 'how_to', 'dashboard', 'bug', 'proposal', 'other']
 
 
-class TopicSerializer(EnumSupportSerializerMixin, TaggitSerializer, serializers.ModelSerializer):
+class TopicSerializer(SparseFieldsetSerializerMixin, EnumSupportSerializerMixin, TaggitSerializer,
+                      serializers.ModelSerializer):
     comments = CommentSerializer(many=True, read_only=True)
     location = serializers.SlugRelatedField(slug_field='uid', read_only=True)
     tags = TagListSerializerField()
@@ -73,6 +73,20 @@ class TestTopics(ForumBaseTestCase):
         self.assertEqual(HTTPStatus.OK, response.status_code)
         self.assertEqual(1, len(response.data))
 
+    def test_list_by_cursor_with_fields(self):
+        another_topic = Topic.objects.create(type=TopicType.QUESTION, content="another test", tags=["bug"],
+                                             location=self.location, author=self.teacher)
+
+        response = self.client.get(self.get_url(query_param=dict(page_size=1, fields='id,content')))
+        self.assertResponse(response)
+        self.assertEqual([dict(id=self.topic.id, content=self.topic.content)], response.data['results'])
+        self.assertIsNone(response.data['previous'])
+
+        response = self.client.get(response.data['next'])
+        self.assertResponse(response)
+        self.assertEqual([dict(id=another_topic.id, content=another_topic.content)], response.data['results'])
+        self.assertIsNone(response.data['next'])
+
     def test_update(self):
         request_data = {
             'content': 'some updated feedback',
@@ -10,6 +10,7 @@ from apps.forum.author_permissions import IsAuthorOrReadOnly
 from apps.forum.models.topic import Topic
 from apps.forum.serializers.topic import TopicSerializer
 from apps.locations.filtersets import OwnLocationOnlyFilterSet
+from utilities.pagination import OptInCursorPagination
 
 
 class TopicsFilterSet(OwnLocationOnlyFilterSet):
@@ -21,10 +22,11 @@ class TopicsFilterSet(OwnLocationOnlyFilterSet):
 class TopicsViewSet(viewsets.ModelViewSet):
     serializer_class = TopicSerializer
     filterset_class = TopicsFilterSet
+    pagination_class = OptInCursorPagination
 
     def get_queryset(self):
         # ./manage.py migrate doesn't work when `queryset` field is populated. (don't know why)
-        return Topic.objects.all()
+        return Topic.objects.select_related('location').prefetch_related('comments', 'tags')
 
     def check_object_permissions(self, request, obj: Topic):
         permission = IsAuthorOrReadOnly()
@@ -7,6 +7,7 @@ from rest_framework.request import Request
 
 from apps.historical_data.models import DetailedHistoricalData, LongTermHistoricalData
 from apps.historical_data.forms import DeleteHistoricalDataByResourceTimeRange
+from apps.resources.models import Resource
 
 DELETE_LIMIT = 500
 
@@ -45,6 +46,12 @@ class HistoricalDataAdmin(admin.ModelAdmin):
                                              f'Not allowed to delete more than {DELETE_LIMIT} entries per time')
                     else:
                         deleted_rows = data_to_delete.delete()
+
+                        if self.model is LongTermHistoricalData:
+                            Resource.objects.get(id=form.cleaned_data['related_resource']).refresh_history_rollups(
+                                from_=form.cleaned_data['from_date']
+                            )
+
                         messages.add_message(request,
                                              messages.SUCCESS,
                                              f'{deleted_rows[0]} {self.model._meta.verbose_name.upper()} entries were deleted')
@@ -5,8 +5,8 @@ from apps.energy_meters.models import EnergyMeter
 from apps.energy_providers.models import EnergyProviderAccount
 from apps.historical_data.utils.aggregation_params_manager import AggregationOption, AggregationParams, \
     AggregationParamsManager, PreConverter
-from apps.historical_data.utils.aggregation_params_utils import avg_func, combine, count_func, one_if_equal, sum_func, \
-    to_kilo, watts_to_watt_hours, zero_or_more
+from apps.historical_data.utils.aggregation_params_utils import avg_func, combine, count_func, one_if_equal, \
+    rollup_avg_func, sum_func, to_kilo, watts_to_watt_hours, zero_or_more
 from apps.historical_data.utils.button_events_aggregation_utils import ButtonAggregationOption
 from apps.historical_data.utils.energy_cost_calculation_utils import CostAggregationOption, \
     aggregate_tariff_by_resources, \
@@ -22,7 +22,8 @@ AggregationParamsManager().register_aggregation_params(AggregationParams(
     source_unit=Unit.WATT,
     target_unit=Unit.WATT,
     aggregate_by_time=avg_func,
-    aggregate_by_resources=sum_func
+    aggregate_by_resources=sum_func,
+    aggregate_rollup_by_time=rollup_avg_func,
 ))
 
 AggregationParamsManager().register_aggregation_params(AggregationParams(
@@ -30,7 +31,8 @@ AggregationParamsManager().register_aggregation_params(AggregationParams(
     target_unit=Unit.KILOWATT,
     aggregate_by_time=avg_func,
     aggregate_by_resources=sum_func,
-    pre_converter=to_kilo
+    pre_converter=to_kilo,
+    aggregate_rollup_by_time=rollup_avg_func,
 ))
 
 AggregationParamsManager().register_aggregation_params(AggregationParams(
@@ -38,7 +40,8 @@ AggregationParamsManager().register_aggregation_params(AggregationParams(
     target_unit=Unit.WATT_HOUR,
     aggregate_by_time=sum_func,
     aggregate_by_resources=sum_func,
-    pre_converter=watts_to_watt_hours
+    pre_converter=watts_to_watt_hours,
+    aggregate_rollup_by_time=sum_func,
 ))
 
 AggregationParamsManager().register_aggregation_params(AggregationParams(
@@ -46,7 +49,8 @@ AggregationParamsManager().register_aggregation_params(AggregationParams(
     target_unit=Unit.KILOWATT_HOUR,
     aggregate_by_time=sum_func,
     aggregate_by_resources=sum_func,
-    pre_converter=combine(watts_to_watt_hours, to_kilo)
+    pre_converter=combine(watts_to_watt_hours, to_kilo),
+    aggregate_rollup_by_time=sum_func,
 ))
 
 AggregationParamsManager().register_aggregation_params(AggregationParams(
@@ -99,6 +103,7 @@ AggregationParamsManager().register_aggregation_params(
         target_unit=Unit.CELSIUS,
         aggregate_by_time=avg_func,
         aggregate_by_resources=avg_func,
+        aggregate_rollup_by_time=rollup_avg_func,
     )
 )
 
@@ -108,6 +113,7 @@ AggregationParamsManager().register_aggregation_params(
         target_unit=Unit.UNKNOWN,
         aggregate_by_time=avg_func,
         aggregate_by_resources=avg_func,
+        aggregate_rollup_by_time=rollup_avg_func,
     )
 )
 
@@ -0,0 +1,33 @@
+# Generated by Django 2.2.28 on 2026-10-18 10:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+import enumfields.fields
+
+import apps.resources.types
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0013_resource_history_rollups_ready'),
+        ('historical_data', '0004_auto_20200204_0958'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupHistoricalData',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('time', models.DateTimeField()),
+                ('value', models.FloatField()),
+                ('time_resolution', enumfields.fields.EnumField(enum=apps.resources.types.TimeResolution, max_length=20)),
+                ('values_count', models.IntegerField()),
+                ('resource', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollup_historical_data', to='resources.Resource')),
+            ],
+            options={
+                'verbose_name_plural': 'Rollup historical data',
+                'unique_together': {('resource', 'time_resolution', 'time')},
+            },
+        ),
+    ]
@@ -5,6 +5,7 @@ from typing import Any, Union
 import funcy
 from django.db import models
 from django.db.models import F
+from enumfields import EnumField
 
 from apps.main.model_mixins import ReprMixin
 from apps.resources.models import Resource
@@ -67,3 +68,32 @@ class LongTermHistoricalData(AbstractHistoricalData):
         null=False,
         related_name='long_term_historical_data'
     )
+
+
+class RollupHistoricalData(AbstractHistoricalData):
+    """
+    Long term history precomputed for hours, days and months (UTC) of every resource: the value is the sum of long
+    term values of the period, so averages are calculated as value / values_count
+    """
+    class Meta:
+        unique_together = ('resource', 'time_resolution', 'time')
+        verbose_name_plural = "Rollup historical data"
+
+    time_resolutions = (TimeResolution.MONTH, TimeResolution.DAY, TimeResolution.HOUR)  # from the coarsest
+
+    resource = models.ForeignKey(
+        Resource,
+        on_delete=models.CASCADE,
+        null=False,
+        related_name='rollup_historical_data'
+    )
+    time_resolution = EnumField(TimeResolution, max_length=20, null=False)
+    values_count = models.IntegerField(null=False)
+
+    STR_ATTRIBUTES = (
+        'resource_id',
+        'time_resolution',
+        'time',
+        'value',
+        'values_count',
+    )
@@ -9,7 +9,7 @@ from enumfields import Enum
 from enumfields.drf import EnumField, EnumSupportSerializerMixin
 from rest_framework import serializers
 
-from apps.historical_data.types import PeriodicConsumptionType
+from apps.historical_data.types import PeriodicConsumptionType, StreamFormat
 from apps.resources.types import ButtonState, ContactState, MotionState, TimeResolution, Unit
 from utilities.custom_serializer_fields import UnitAbbreviationEnumField
 
@@ -138,6 +138,13 @@ class DateTimeFieldWithOffset(serializers.DateTimeField):
         return value
 
 
+class StreamQuerySerializer(BaseQuerySerializer):
+    stream = EnumField(StreamFormat)
+    from_ = DateTimeFieldWithOffset(required=False)
+    to = DateTimeFieldWithOffset(required=False)
+    limit = serializers.IntegerField(required=False, default=None, allow_null=True, min_value=1)
+
+
 class PeriodType(Enum):
     HOURS = 'hours'
     DAYS = 'days'
@@ -173,6 +180,8 @@ class HistoricalDataQuerySerializerSet:
         time_resolution = EnumField(TimeResolution, required=False, default=TimeResolution.DAY, allow_blank=True)
         unit = EnumField(Unit, required=False, default=None)
         fill_gaps = serializers.BooleanField(default=False)
+        stream = EnumField(StreamFormat, required=False, default=None, allow_null=True)
+        limit = serializers.IntegerField(required=False, default=None, allow_null=True, min_value=1)
 
     class _PeriodicConsumptionQueryParamsSerializer(BaseQuerySerializer):
         period = EnumField(PeriodicConsumptionType)
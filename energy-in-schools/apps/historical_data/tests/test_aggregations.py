@@ -291,3 +291,29 @@ class TestEnergyHistory(EnergyHistoryBaseTestCase):
              (datetime(2000, 10, 10, tzinfo=timezone.utc), 20.0)],
             result,
         )
+
+    def test_aggregate_latest_values_by_groups(self):
+        energy_meter_2 = self._create_energy_meter()
+        energy_meter_3 = self.create_energy_meter()
+        now = datetime.now(tz=timezone.utc)
+        self.create_energy_history(extra_rows=(
+            (self.energy_meter, now - timedelta(minutes=20)),  # is too old
+            (self.energy_meter, now - timedelta(minutes=10)),
+            (self.energy_meter, now - timedelta(minutes=5)),
+            (energy_meter_2, now - timedelta(minutes=1)),
+        ), default_rows=False)
+
+        resources_by_group = {
+            'first meter': [self.energy_meter],
+            'both meters': [self.energy_meter, energy_meter_2],
+            'no data': [energy_meter_3],
+        }
+        latest_values = aggregations.aggregate_latest_values_by_groups(resources_by_group, Unit.WATT)
+
+        self.assertEqual({'first meter', 'both meters'}, set(latest_values))
+        for group in ('first meter', 'both meters'):
+            with self.subTest(group):
+                self.assertEqual(
+                    aggregations.aggregate_latest_value(resources_by_group[group], Unit.WATT),
+                    latest_values[group],
+                )
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta, timezone
+
+from apps.energy_meters.models import EnergyMeter
+from apps.energy_meters.tests.base_test_case import EnergyHistoryBaseTestCase
+from apps.historical_data.models import RollupHistoricalData
+from apps.historical_data.utils import aggregations
+from apps.historical_data.utils.aggregation_params_manager import AggregationParamsManager
+from apps.historical_data.utils.history_rollups import select_rollup_time_resolution
+from apps.resources.models import Resource
+from apps.resources.tasks import refresh_history_rollups
+from apps.resources.types import ResourceValue, TimeResolution, Unit
+
+
+class TestHistoryRollups(EnergyHistoryBaseTestCase):
+    FROM = datetime(2000, 10, 1, tzinfo=timezone.utc)
+    TO = datetime(2000, 11, 1, tzinfo=timezone.utc)
+
+    def test_aggregate_to_list_by_rollups(self):
+        energy_meter_2 = self.create_energy_meter()
+        self.create_energy_history(extra_rows=(
+            (self.energy_meter, datetime(2000, 10, 10, 12, 0, tzinfo=timezone.utc)),
+            (self.energy_meter, datetime(2000, 10, 10, 12, 30, tzinfo=timezone.utc)),
+            (self.energy_meter, datetime(2000, 10, 11, 23, 30, tzinfo=timezone.utc)),
+            (self.energy_meter, datetime(2000, 10, 20, 0, 0, tzinfo=timezone.utc)),
+            (energy_meter_2, datetime(2000, 10, 10, 12, 0, tzinfo=timezone.utc)),
+            (energy_meter_2, datetime(2000, 10, 31, 23, 30, tzinfo=timezone.utc)),
+        ), is_detailed_history=False)
+
+        cases = (
+            (Unit.WATT, TimeResolution.HOUR, TimeResolution.HOUR),
+            (Unit.KILOWATT, TimeResolution.DAY, TimeResolution.DAY),
+            (Unit.WATT_HOUR, TimeResolution.WEEK, TimeResolution.DAY),
+            (Unit.KILOWATT_HOUR, TimeResolution.MONTH, TimeResolution.MONTH),
+        )
+        expected_results = [
+            self._aggregate_to_list([self.energy_meter, energy_meter_2], unit, time_resolution, None)
+            for unit, time_resolution, _ in cases
+        ]
+
+        for energy_meter in (self.energy_meter, energy_meter_2):
+            energy_meter.refresh_history_rollups()
+
+        self.assertEqual(
+            {self.energy_meter.id, energy_meter_2.id},
+            set(RollupHistoricalData.objects.values_list('resource_id', flat=True))
+        )
+
+        for (unit, time_resolution, rollup_time_resolution), expected_result in zip(cases, expected_results):
+            with self.subTest(f'{unit} by {time_resolution}'):
+                self.assertEqual(
+                    expected_result,
+                    self._aggregate_to_list(
+                        [EnergyMeter.objects.get(id=self.energy_meter.id),
+                         EnergyMeter.objects.get(id=energy_meter_2.id)],
+                        unit,
+                        time_resolution,
+                        rollup_time_resolution,
+                    )
+                )
+
+    def test_refresh_dirty_history_rollups(self):
+        Resource.objects.filter(id=self.energy_meter.id).update(detailed_time_resolution=None)
+        resource = Resource.objects.get(id=self.energy_meter.id)
+
+        resource.add_value(ResourceValue(time=datetime(2000, 10, 10, 12, 10, tzinfo=timezone.utc), value=42))
+        resource.add_value(ResourceValue(time=datetime(2000, 10, 10, 11, 10, tzinfo=timezone.utc), value=24))
+
+        self.assertEqual(
+            datetime(2000, 10, 10, 11, 0, tzinfo=timezone.utc),
+            Resource.objects.get(id=resource.id).history_rollups_dirty_since
+        )
+        self.assertFalse(RollupHistoricalData.objects.exists())
+
+        refresh_history_rollups([resource.id])
+
+        resource = Resource.objects.get(id=resource.id)
+        self.assertIsNone(resource.history_rollups_dirty_since)
+        self.assertTrue(resource.history_rollups_ready)
+        self.assertTrue(RollupHistoricalData.objects.filter(resource_id=resource.id).exists())
+
+    def test_select_rollup_time_resolution(self):
+        for label, expected_rollup, time_resolution, from_, tz_info in (
+                ('Coarsest', TimeResolution.MONTH, TimeResolution.YEAR, self.FROM, timezone.utc),
+                ('Not aligned range', TimeResolution.HOUR, TimeResolution.DAY, self.FROM.replace(hour=1),
+                 timezone.utc),
+                ('Local time', TimeResolution.HOUR, TimeResolution.DAY, self.FROM, timezone(timedelta(hours=1))),
+                ('Not aligned time zone', None, TimeResolution.DAY, self.FROM, timezone(timedelta(minutes=90))),
+                ('Detailed time resolution', None, TimeResolution.HALF_HOUR, self.FROM, timezone.utc),
+        ):
+            with self.subTest(label):
+                self.assertEqual(
+                    expected_rollup,
+                    select_rollup_time_resolution(TimeResolution.HALF_HOUR, time_resolution, from_, None, tz_info)
+                )
+
+    def _aggregate_to_list(self, resources, unit, time_resolution, expected_rollup_time_resolution):
+        aggregation_rules = AggregationParamsManager().get_aggregation_rules(
+            resources=resources,
+            unit=unit,
+            time_resolution=time_resolution,
+            from_=self.FROM,
+            to=self.TO,
+        )
+        self.assertEqual(expected_rollup_time_resolution, aggregation_rules.rollup_time_resolution)
+
+        return [
+            (row.time, round(row.value, 6))
+            for row in aggregations.aggregate_to_list(aggregation_rules)
+        ]
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta, timezone
+
+from apps.historical_data.utils.long_term_rollup import calculate_period_averages
+from apps.main.base_test_case import BaseTestCase
+from apps.resources.types import ResourceValue, TimeResolution
+
+
+class TestLongTermRollup(BaseTestCase):
+    __START = datetime(2000, 10, 10, tzinfo=timezone.utc)
+
+    def test_calculate_period_averages(self):
+        values = [
+            *(self._get_value(timedelta(minutes=minute), 10) for minute in range(31)),
+            *(self._get_value(timedelta(days=5, minutes=minute), 20) for minute in range(31)),
+        ]
+
+        self.assertEqual(
+            [
+                self._get_value(timedelta(), 10),
+                self._get_value(timedelta(minutes=30), 10),  # the last known value is used until the next one
+                self._get_value(timedelta(days=5), 20),
+            ],
+            [
+                value._replace(value=round(value.value, 6))
+                for value in calculate_period_averages(
+                    values=values,
+                    previous_value=None,
+                    period_start=self.__START,
+                    period_duration=TimeResolution.HALF_HOUR.duration,
+                    max_interpolation_range=TimeResolution.HALF_HOUR.duration,
+                )
+            ]
+        )
+
+    def test_unfinished_period_is_not_returned(self):
+        self.assertEqual([], list(calculate_period_averages(
+            values=[self._get_value(timedelta(minutes=minute), 10) for minute in range(30)],
+            previous_value=None,
+            period_start=self.__START,
+            period_duration=TimeResolution.HALF_HOUR.duration,
+            max_interpolation_range=TimeResolution.HALF_HOUR.duration,
+        )))
+
+    @classmethod
+    def _get_value(cls, offset: timedelta, value: float) -> ResourceValue:
+        return ResourceValue(time=cls.__START + offset, value=value)
@@ -56,3 +56,18 @@ class PeriodicConsumptionType(Enum):
     @property
     def period_range(self) -> PeriodRange:
         return self._period_range_
+
+
+class StreamFormat(Enum):
+    CSV = 'csv', 'text/csv; charset=utf-8'
+    NDJSON = 'ndjson', 'application/x-ndjson'
+
+    def __new__(cls, value, content_type):
+        obj = object.__new__(cls)
+        obj._value_ = value
+        obj._content_type_ = content_type
+        return obj
+
+    @property
+    def content_type(self) -> str:
+        return self._content_type_
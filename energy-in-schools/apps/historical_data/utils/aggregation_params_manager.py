@@ -6,7 +6,9 @@ from singleton_decorator import singleton
 from sqlalchemy.orm import Query
 from sqlalchemy.sql import sqltypes
 
-from apps.historical_data.models import AbstractHistoricalData, DetailedHistoricalData, LongTermHistoricalData
+from apps.historical_data.models import AbstractHistoricalData, DetailedHistoricalData, LongTermHistoricalData, \
+    RollupHistoricalData
+from apps.historical_data.utils.history_rollups import select_rollup_time_resolution
 from apps.main.models import BaseModel
 from apps.resources.models import Resource
 from apps.resources.types import HistoryType, ResourceDataNotAvailable, TimeResolution, Unit
@@ -94,6 +96,8 @@ class AggregationParams(NamedTuple):
     get_by_time_step_extra_fields: GetByTimeStepExtraField = lambda _, __, ___: ()
     join_extra_models: JoinExtraModels = lambda query, *_: query
     aggregation_option: Optional[AggregationOption] = None
+    # aggregate_by_time for RollupHistoricalData, params without it never use rollups
+    aggregate_rollup_by_time: Optional[AggregateByTime] = None
 
     def is_supported(self, source_unit: Unit, target_unit: Unit, aggregation_option: AggregationOption) -> bool:
         return self.source_unit == source_unit and \
@@ -122,6 +126,11 @@ class AggregationRules(NamedTuple):
     time_resolution: TimeResolution
     from_: datetime
     to: datetime
+    rollup_time_resolution: Optional[TimeResolution] = None
+
+    @property
+    def aggregate_by_time(self) -> AggregateByTime:
+        return self.params.aggregate_rollup_by_time if self.rollup_time_resolution else self.params.aggregate_by_time
 
     @property
     def tz_info(self) -> tzinfo:
@@ -178,14 +187,19 @@ class AggregationParamsManager:
         self._validate_parameters_count(accepted_parameters)
         self._validate_time_resolution(native_time_resolution, time_resolution)
 
+        rollup_time_resolution = self._select_rollup_time_resolution(
+            accepted_parameters[0], model, resources, native_time_resolution, time_resolution, from_, to
+        )
+
         return AggregationRules(
             params=accepted_parameters[0],
-            model=model,
+            model=RollupHistoricalData if rollup_time_resolution else model,
             native_time_resolution=native_time_resolution,
             resources=resources,
             time_resolution=time_resolution,
             from_=from_,
             to=to,
+            rollup_time_resolution=rollup_time_resolution,
         )
 
     @staticmethod
@@ -207,6 +221,28 @@ class AggregationParamsManager:
                 f'can not be converted to "{time_resolution.value}"!'
             )
 
+    @staticmethod
+    def _select_rollup_time_resolution(
+            aggregation_params: AggregationParams,
+            model: Type[AbstractHistoricalData],
+            resources: List[Resource],
+            native_time_resolution: TimeResolution,
+            time_resolution: TimeResolution,
+            from_: datetime,
+            to: datetime,
+    ) -> Optional[TimeResolution]:
+        if model is not LongTermHistoricalData or not aggregation_params.aggregate_rollup_by_time or \
+                not all(resource.history_rollups_ready for resource in resources):
+            return None
+
+        return select_rollup_time_resolution(
+            native_time_resolution,
+            time_resolution,
+            from_,
+            to,
+            from_.tzinfo if from_ else to.tzinfo if to else None,
+        )
+
     @staticmethod
     def _select_history_type(
             consisted_resource_params: ConsistedResourceParams,
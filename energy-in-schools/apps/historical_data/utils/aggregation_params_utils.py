@@ -29,6 +29,11 @@ def sum_func(_, value, __):
     return func.sum(value)
 
 
+def rollup_avg_func(_, value, aggregation_rules: AggregationRules):
+    """Average of long term values by sums and counts from RollupHistoricalData"""
+    return func.sum(value) / func.sum(aggregation_rules.model.sa.values_count)
+
+
 def count_func(_, value, __):
     return func.count(value)
 
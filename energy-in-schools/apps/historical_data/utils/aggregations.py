@@ -1,7 +1,8 @@
 from datetime import datetime, timedelta, timezone, tzinfo
 from functools import partial
-from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Union, cast, Tuple
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, NamedTuple, Optional, Union, cast, Tuple
 
+import funcy
 from aldjemy.orm import get_session
 from django.db.models import QuerySet
 from sqlalchemy import Column, DateTime, and_, or_, case, func, literal_column, extract
@@ -14,9 +15,9 @@ from apps.energy_providers.models import EnergyProviderAccount
 from apps.historical_data.constants import LATEST_VALUE_AGGREGATION_TIME
 from apps.historical_data.models import AbstractHistoricalData
 from apps.historical_data.types import PeriodicConsumptionType, PeriodRange
-from apps.historical_data.utils.aggregation_params_manager import AggregationOption, AggregationParamsManager, \
-    AggregationRules
-from apps.historical_data.utils.aggregation_params_utils import avg_func
+from apps.historical_data.utils.aggregation_params_manager import AggregationOption, AggregationParams, \
+    AggregationParamsManager, AggregationRules, UnsupportedConditions
+from apps.historical_data.utils.aggregation_params_utils import avg_func, sum_func
 from apps.historical_data.utils.sqlalchemy_functions import TruncDateTime
 from apps.resources.models import Resource
 from apps.resources.types import AlwaysOnValue, BoundaryValue, ResourceDataNotAvailable, ResourceValue, TimeResolution, \
@@ -61,6 +62,10 @@ def aggregate_to_list(
     return query
 
 
+ALWAYS_ON_START_HOUR = 1
+ALWAYS_ON_END_HOUR = 3
+
+
 def get_always_on(
         resources: Resources,
         from_: datetime = None,
@@ -72,9 +77,79 @@ def get_always_on(
     :param to: not inclusive
     :return:
     """
-    always_on_start_hour = 1
-    always_on_end_hour = 3
+    always_on_by_resource: Query = _get_always_on_by_resource_query(resources, from_, to)
+
+    always_on_query: Query = get_session().query(
+        func.sum(literal_column('sub.always_on_by_resource')).label('value')
+    ).select_from(
+        always_on_by_resource.subquery('sub')
+    )
+
+    result = always_on_query.scalar()
+
+    if result is None:
+        raise ResourceDataNotAvailable
+
+    return AlwaysOnValue(
+        value=result,
+        unit=Unit.WATT,
+    )
+
+
+def get_always_on_by_resources(
+        resources: Iterable[Resource],
+        from_: datetime = None,
+        to: datetime = None
+) -> Dict[int, float]:
+    """
+    Batched version of get_always_on: one query per group of resources with consisted params, usually the only one.
+    Resources without data are absent in the result.
+    """
+    resources_by_params = funcy.group_by(
+        lambda resource: (resource.unit, resource.detailed_time_resolution, resource.long_term_time_resolution),
+        resources,
+    )
+
+    return {
+        row.resource_id: row.always_on_by_resource
+        for resources_group in resources_by_params.values()
+        for row in _get_always_on_by_resource_query(resources_group, from_, to)
+    }
 
+
+def aggregate_to_list_by_resources(
+        resources: Iterable[Resource],
+        unit: Unit,
+        time_resolution: TimeResolution,
+        from_: datetime = None,
+        to: datetime = None,
+) -> Dict[int, List[TimeValuePair]]:
+    """
+    Like aggregate_to_list, but values are not summed by resources: one query per group of resources with consisted
+    params, usually the only one. Resources without data are absent in the result.
+    """
+    resources_by_params = funcy.group_by(
+        lambda resource: (resource.unit, resource.detailed_time_resolution, resource.long_term_time_resolution),
+        resources,
+    )
+    values_by_resource_id: Dict[int, List[TimeValuePair]] = {}
+
+    for resources_group in resources_by_params.values():
+        aggregation_rules = AggregationParamsManager().get_aggregation_rules(
+            resources=resources_group,
+            unit=unit,
+            time_resolution=time_resolution,
+            from_=from_,
+            to=to,
+        )
+
+        for row in get_aggregate_by_time_query(aggregation_rules=aggregation_rules):
+            values_by_resource_id.setdefault(row.resource_id, []).append(TimeValuePair(time=row.time, value=row.value))
+
+    return values_by_resource_id
+
+
+def _get_always_on_by_resource_query(resources: Resources, from_: Optional[datetime], to: Optional[datetime]) -> Query:
     aggregation_rules = AggregationParamsManager().get_aggregation_rules(
         resources=resources,
         unit=Unit.WATT,
@@ -88,10 +163,11 @@ def get_always_on(
     )
 
     filtered_between_hours = aggregate_by_time_query.filter(
-        func.date_part('hour', literal_column('time')).between(always_on_start_hour, always_on_end_hour)
+        func.date_part('hour', literal_column('time')).between(ALWAYS_ON_START_HOUR, ALWAYS_ON_END_HOUR)
     )
 
-    always_on_by_resource: Query = get_session().query(
+    return get_session().query(
+        literal_column('sub.resource_id').label('resource_id'),
         func.avg(literal_column('sub.value')).label('always_on_by_resource')
     ).select_from(
         filtered_between_hours.subquery('sub')
@@ -99,22 +175,6 @@ def get_always_on(
         'resource_id'
     )
 
-    always_on_query: Query = get_session().query(
-        func.sum(literal_column('sub.always_on_by_resource')).label('value')
-    ).select_from(
-        always_on_by_resource.subquery('sub')
-    )
-
-    result = always_on_query.scalar()
-
-    if result is None:
-        raise ResourceDataNotAvailable
-
-    return AlwaysOnValue(
-        value=result,
-        unit=Unit.WATT,
-    )
-
 
 def get_boundary_live_data(
         resources: Resources,
@@ -357,6 +417,61 @@ def aggregate_latest_value(
     )
 
 
+def aggregate_latest_values_by_groups(
+        resources_by_group: Dict[Hashable, Iterable[Resource]],
+        unit: Unit,
+        duration: timedelta = LATEST_VALUE_AGGREGATION_TIME
+) -> Dict[Hashable, ResourceValue]:
+    """
+    Batched version of aggregate_latest_value for many groups of resources, a resource can be in several groups.
+    Latest values of all resources are calculated by one query per group of resources with consisted params,
+    usually the only one, and summed by groups, so only units that are summed by resources are supported.
+    Groups without data are absent in the result.
+    """
+    from_ = datetime.now(tz=timezone.utc) - duration
+    resources = {resource.id: resource for resources in resources_by_group.values() for resource in resources}
+    resources_by_params = funcy.group_by(
+        lambda resource: (resource.unit, resource.detailed_time_resolution, resource.long_term_time_resolution),
+        resources.values(),
+    )
+    latest_values_by_resource_id: Dict[int, TimeValuePair] = {}
+    target_unit = unit
+
+    for resources_group in resources_by_params.values():
+        aggregation_rules = AggregationParamsManager().get_aggregation_rules(
+            resources=resources_group,
+            unit=unit,
+            from_=from_,
+        )
+        if aggregation_rules.params.aggregate_by_resources is not sum_func or \
+                aggregation_rules.params.by_resources_step_pre_process_query is not \
+                AggregationParams._field_defaults['by_resources_step_pre_process_query']:
+            raise UnsupportedConditions(f'Latest values in "{unit.value}" can not be summed by groups!')
+
+        target_unit = aggregation_rules.params.target_unit
+        latest_values_by_resource_id.update(
+            (row.resource_id, TimeValuePair(time=row.time, value=row.value))
+            for row in get_aggregate_by_time_query(aggregation_rules=aggregation_rules)
+        )
+
+    latest_values_by_group = {}
+    for group, group_resources in resources_by_group.items():
+        latest_values = [
+            latest_values_by_resource_id[resource.id]
+            for resource in group_resources
+            if resource.id in latest_values_by_resource_id
+        ]
+
+        if latest_values:
+            latest_values_by_group[group] = ResourceValue(
+                time=max(latest_value.time for latest_value in latest_values),
+                value=sum(latest_value.value for latest_value in latest_values),
+                unit=target_unit,
+            )
+
+    return latest_values_by_group
+
+
 def get_aggregated_to_one_query(
         aggregated_by_meters_query: Query,
         aggregation_rules: AggregationRules
@@ -410,7 +525,7 @@ def get_aggregate_by_time_query(
     query = get_session().query(
         trunc_function(time_field).label('time'),
         resource_id_field.label('resource_id'),
-        aggregation_rules.params.aggregate_by_time(
+        aggregation_rules.aggregate_by_time(
             time_field,
             aggregation_rules.params.pre_converter(time_field, value_field, aggregation_rules),
             aggregation_rules,
@@ -423,6 +538,8 @@ def get_aggregate_by_time_query(
         *((trunc_function(time_field).label('time'),) if aggregation_rules.time_resolution else ()),
     ).filter(
         resource_id_field.in_(resources),
+        *((sa_model.time_resolution == aggregation_rules.rollup_time_resolution.value,)
+          if aggregation_rules.rollup_time_resolution else ()),
         *((time_field >= aggregation_rules.from_,) if aggregation_rules.from_ else ()),
         *((time_field < aggregation_rules.to,) if aggregation_rules.to else ()),
     )
@@ -19,6 +19,7 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.serializers import Serializer
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
+from sqlalchemy.orm import Query
 
 from apps.historical_data.serializers import (
     AlwaysOnValueSerializer, BaseSerializer, ResourceHistoryValueSerializer, 
@@ -26,13 +27,14 @@ from apps.historical_data.serializers import (
     PeriodicConsumptionSerializer, ResourceHistoricalDataWithUnitAbbreviationSerializer,
     PeriodType
 )
-from apps.historical_data.types import PeriodicConsumptionType
+from apps.historical_data.types import PeriodicConsumptionType, StreamFormat
 from apps.historical_data.constants import LATEST_VALUE_AGGREGATION_TIME
 from apps.historical_data.utils import aggregations
 from apps.historical_data.utils.aggregation_params_manager import(
     AggregationOption, AggregationParamsManager,
     ConsistedResourceParamsError, UnsupportedConditions
 )
+from apps.historical_data.utils.streaming_export import EXPORT_CHUNK_SIZE, get_streaming_response
 from apps.locations.filtersets import ByLocationFilterSet
 from apps.resources.models import Resource
 from apps.resources.types import ResourceDataNotAvailable, TimeResolution, Unit, ResourceChildType
@@ -95,6 +97,8 @@ class QueryParams(NamedTuple):
     format: str = None
     period_type: PeriodType = None
     periods_ago: int = None
+    stream: StreamFormat = None
+    limit: int = None
 
 
 class ResourceHistoryFilterSet(EnumSupportFilterSet, ByLocationFilterSet):
@@ -171,6 +175,9 @@ class ResourceHistoryMixin(GenericViewSet):
                 aggregation_rules=aggregation_rules
             )
 
+            if query_params.stream:
+                result_query = self._get_streamed_query(result_query, query_params)
+
         # noinspection PyProtectedMember
         result_iterator = (item._asdict() for item in result_query)
 
@@ -183,6 +190,18 @@ class ResourceHistoryMixin(GenericViewSet):
                 query_params.to.astimezone(timezone.utc) if query_params.to else None,
             )
 
+        if query_params.stream:
+            value_unit = aggregation_rules.params.target_unit.abbreviation
+            fields = ('time', 'value', 'cmp_value', 'value_unit') if query_params.compare_from and \
+                query_params.compare_to else ('time', 'value', 'value_unit')
+
+            return get_streaming_response(
+                ({**item, 'value_unit': value_unit} for item in result_iterator),
+                fields,
+                query_params.stream,
+                limit=query_params.limit,
+            )
+
         # Request duration:
         #   without drf cache - 800
         #   with drf cache - 280
@@ -210,6 +229,10 @@ class ResourceHistoryMixin(GenericViewSet):
         result_query = aggregations.aggregate_to_list(
             aggregation_rules=aggregation_rules
         )
+
+        if query_params.stream:
+            result_query = self._get_streamed_query(result_query, query_params)
+
         result_iterator = (
             {**item._asdict(), 'value_unit': aggregation_rules.params.target_unit.abbreviation} for item in result_query
         )
@@ -220,6 +243,15 @@ class ResourceHistoryMixin(GenericViewSet):
             query_params.to.astimezone(timezone.utc) if query_params.to else None,
         )
 
+        if query_params.stream:
+            return get_streaming_response(
+                result_iterator,
+                ('time', 'value', 'value_unit'),
+                query_params.stream,
+                filename=f'{export_filename}_{self._get_school_sign()}',
+                limit=query_params.limit,
+            )
+
         historical_data = ResourceHistoricalDataWithUnitAbbreviationSerializer(
             data=dict(values=list(result_iterator))
         )
@@ -234,6 +266,16 @@ class ResourceHistoryMixin(GenericViewSet):
             }
         )
 
+    @staticmethod
+    def _get_streamed_query(query: Query, query_params: QueryParams) -> Query:
+        """
+        Fetch rows by a server side cursor, the limit is applied to the rows before filling gaps
+        """
+        if query_params.limit:
+            query = query.limit(query_params.limit)
+
+        return query.yield_per(EXPORT_CHUNK_SIZE)
+
     def _get_school_sign(self):
         if hasattr(self.request.user, 'location') and self.request.user.location:
             return f'{self.request.user.location.name}-{self.request.user.location.uid}'
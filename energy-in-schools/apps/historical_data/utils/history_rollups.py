@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Iterable, Optional, Sequence
+
+from django.db import connection
+
+from apps.historical_data.models import LongTermHistoricalData, RollupHistoricalData
+from apps.resources.types import TimeResolution
+
+
+def truncate_time(a_time: datetime, time_resolution: TimeResolution) -> datetime:
+    a_time = a_time.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+    if time_resolution in (TimeResolution.DAY, TimeResolution.MONTH):
+        a_time = a_time.replace(hour=0)
+
+    if time_resolution is TimeResolution.MONTH:
+        a_time = a_time.replace(day=1)
+
+    return a_time
+
+
+def refresh_history_rollups(resource_ids: Sequence[int], from_: Optional[datetime] = None):
+    """
+    Recalculate rollups of all periods that start after from_ or contain it, all rollups if from_ is None
+    """
+    if not resource_ids:
+        return
+
+    rollup_table = RollupHistoricalData._meta.db_table
+    long_term_table = LongTermHistoricalData._meta.db_table
+
+    periods_filter = ' OR '.join(['(time_resolution = %s AND time >= %s)'] * len(RollupHistoricalData.time_resolutions))
+    select_query = f'''
+        SELECT resource_id, %s, date_trunc(%s, time AT TIME ZONE 'UTC') AT TIME ZONE 'UTC', SUM(value), COUNT(*)
+        FROM {long_term_table}
+        WHERE resource_id = ANY(%s) AND time >= %s
+        GROUP BY 1, 3
+    '''
+    min_time = datetime.min.replace(tzinfo=timezone.utc)
+    periods_starts = [
+        (time_resolution.value, truncate_time(from_, time_resolution) if from_ else min_time)
+        for time_resolution in RollupHistoricalData.time_resolutions
+    ]
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {rollup_table} WHERE resource_id = ANY(%s) AND ({periods_filter})',
+            [list(resource_ids), *(param for period_start in periods_starts for param in period_start)],
+        )
+        cursor.execute(
+            f'INSERT INTO {rollup_table} (resource_id, time_resolution, time, value, values_count) '
+            + ' UNION ALL '.join([select_query] * len(periods_starts)),
+            [
+                param
+                for time_resolution_value, period_start in periods_starts
+                for param in (time_resolution_value, time_resolution_value, list(resource_ids), period_start)
+            ],
+        )
+
+
+def select_rollup_time_resolution(
+        native_time_resolution: TimeResolution,
+        time_resolution: Optional[TimeResolution],
+        from_: Optional[datetime],
+        to: Optional[datetime],
+        tz_info: Optional[tzinfo],
+) -> Optional[TimeResolution]:
+    """
+    Select the coarsest rollup that gives the same result as the long term history. Rollups are truncated in UTC,
+    so the requested periods and the time range should consist of whole rollup periods.
+    """
+    if not time_resolution or not time_resolution.is_aggregatable:
+        return None
+
+    utc_offset = tz_info.utcoffset(None) if tz_info and tz_info.utcoffset(None) else timedelta()
+
+    for rollup_time_resolution in RollupHistoricalData.time_resolutions:
+        if rollup_time_resolution.duration > time_resolution.duration or \
+                native_time_resolution.duration > rollup_time_resolution.duration:
+            continue
+
+        if rollup_time_resolution is TimeResolution.HOUR:
+            is_aligned_time_zone = utc_offset % timedelta(hours=1) == timedelta()
+        else:
+            is_aligned_time_zone = utc_offset == timedelta()
+
+        if is_aligned_time_zone and _is_aligned(filter(None, (from_, to)), rollup_time_resolution):
+            return rollup_time_resolution
+
+    return None
+
+
+def _is_aligned(times: Iterable[datetime], time_resolution: TimeResolution) -> bool:
+    return all(a_time.tzinfo and truncate_time(a_time, time_resolution) == a_time for a_time in times)
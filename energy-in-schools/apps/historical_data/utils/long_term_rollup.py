@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, Optional
+
+import funcy
+
+from apps.resources.types import ResourceValue
+from utilities.interpolations import get_line_coefficients
+
+
+def get_integral_value(
+        left: Optional[ResourceValue],
+        right: ResourceValue,
+        period_start: datetime,
+        period_end: datetime,
+        max_interpolation_range: timedelta,
+) -> float:
+    if left and max(period_start - left.time, right.time - period_end) < max_interpolation_range:
+        if left.time < period_start or right.time > period_end:
+            # if one row is out of the period we should interpolate the point on the end of the period
+            # maximal interpolation range is equal to max_interpolation_range
+            a, b = get_line_coefficients(
+                left.time.timestamp(),
+                left.value,
+                right.time.timestamp(),
+                right.value
+            )
+            left_time = max(period_start, left.time)
+            left_value = a + b * left_time.timestamp()
+            right_time = min(period_end, right.time)
+            right_value = a + b * right_time.timestamp()
+
+        else:
+            left_time = left.time
+            left_value = left.value
+            right_time = right.time
+            right_value = right.value
+
+        return (left_value + right_value) / 2 * (right_time - left_time).total_seconds()
+
+    elif right.time <= period_end:
+        return right.value * (min(period_end, right.time) - period_start).total_seconds()
+
+    else:
+        return left.value * (period_end - left.time).total_seconds()
+
+
+def calculate_period_averages(
+        values: Iterable[ResourceValue],
+        previous_value: Optional[ResourceValue],
+        period_start: datetime,
+        period_duration: timedelta,
+        max_interpolation_range: timedelta,
+) -> Iterator[ResourceValue]:
+    """
+    Integrate ordered detailed values in one pass and yield the average value for every finished period.
+    Periods without values are skipped at once, an unfinished sequence isn't yielded.
+    """
+    period_end = period_start + period_duration
+    integral_per_period = 0
+    value_exists = False
+
+    for new_value, previous_new_value in funcy.with_prev(values, previous_value):
+        if new_value.time < period_start:
+            continue
+
+        if new_value.time >= period_end:
+            if value_exists:
+                if previous_new_value.time != period_end:
+                    integral_per_period += get_integral_value(
+                        previous_new_value, new_value, period_start, period_end, max_interpolation_range
+                    )
+
+                yield ResourceValue(
+                    time=period_start,
+                    value=integral_per_period / period_duration.total_seconds()
+                )
+
+            value_exists = False
+            integral_per_period = 0
+            period_start += (new_value.time - period_start) // period_duration * period_duration
+            period_end = period_start + period_duration
+
+        integral_per_period += get_integral_value(
+            previous_new_value, new_value, period_start, period_end, max_interpolation_range
+        )
+        value_exists = True
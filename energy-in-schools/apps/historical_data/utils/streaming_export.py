@@ -0,0 +1,71 @@
+import csv
+import io
+import json
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence
+
+import funcy
+from django.http import StreamingHttpResponse
+from rest_framework import serializers
+from rest_framework.utils.encoders import JSONEncoder
+
+from apps.historical_data.types import StreamFormat
+
+
+EXPORT_CHUNK_SIZE = 2000  # rows per fetch from the database and per yielded chunk
+
+
+def get_streaming_response(
+        rows: Iterable[Dict[str, Any]],
+        fields: Sequence[str],
+        stream_format: StreamFormat,
+        filename: Optional[str] = None,
+        limit: Optional[int] = None,
+) -> StreamingHttpResponse:
+    """
+    Stream rows by chunks, so memory usage doesn't depend on the number of rows. Rows should be fetched lazily
+    """
+    response = StreamingHttpResponse(
+        iterate_export_chunks(islice(rows, limit) if limit else rows, fields, stream_format),
+        content_type=stream_format.content_type,
+    )
+
+    if filename:
+        response['Content-Disposition'] = f'attachment; filename={filename}.{stream_format.value}'
+
+    return response
+
+
+def iterate_export_chunks(
+        rows: Iterable[Dict[str, Any]],
+        fields: Sequence[str],
+        stream_format: StreamFormat,
+) -> Iterator[str]:
+    time_field = serializers.DateTimeField()
+
+    def to_representation(value: Any) -> Any:
+        return time_field.to_representation(value) if isinstance(value, datetime) else value
+
+    buffer = io.StringIO()
+    csv_writer = csv.DictWriter(buffer, fields, extrasaction='ignore')
+
+    if stream_format is StreamFormat.CSV:
+        csv_writer.writeheader()
+
+    for chunk in funcy.chunks(EXPORT_CHUNK_SIZE, rows):
+        for row in chunk:
+            row = {field: to_representation(row.get(field)) for field in fields}
+
+            if stream_format is StreamFormat.CSV:
+                csv_writer.writerow(row)
+            else:
+                buffer.write(json.dumps(row, cls=JSONEncoder))
+                buffer.write('\n')
+
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()  # the header of an empty export
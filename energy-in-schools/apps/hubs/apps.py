@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class HubsConfig(AppConfig):
     name = 'apps.hubs'
+
+    def ready(self):
+        # activate listeners:
+        # noinspection PyUnresolvedReferences
+        import apps.hubs.signals
@@ -1,6 +1,5 @@
-from typing import NamedTuple, Union, Tuple
+from typing import NamedTuple, Optional, Union, Tuple
 
-import funcy
 from django.core.exceptions import ValidationError
 from rest_framework import authentication, exceptions
 from rest_framework.request import Request
@@ -10,6 +9,19 @@ from apps.accounts.permissions import RoleName
 from apps.hubs.models import Hub
 from apps.locations.models import Location
 from django.conf import settings
+from utilities.caching import LRUCache, TwoTierCache
+
+HUB_AUTH_CACHE_SIZE = 10_000
+
+hub_auth_cache = TwoTierCache(
+    'hub_auth',
+    settings.RASPBERRY_PI_AUTH_SHARED_CACHE_TIME,
+    max_size=HUB_AUTH_CACHE_SIZE,
+    local_timeout=settings.RASPBERRY_PI_AUTH_CACHE_TIME,
+)
+# failed attempts are cached only in the process, so unknown ids of requests don't add keys to Redis
+failed_hub_auth_cache = LRUCache(HUB_AUTH_CACHE_SIZE, settings.RASPBERRY_PI_AUTH_CACHE_TIME)
+
 
 # TODO rename to hub auth
 class RaspberryPiAuthData(NamedTuple):
@@ -17,6 +29,73 @@ class RaspberryPiAuthData(NamedTuple):
     raspberry_hub: Hub
 
 
+def get_hub_auth_cache_key(pi_id: str, school_id: str) -> str:
+    return f'{pi_id}:{school_id}'
+
+
+def get_hub_auth_hub_tag(pi_id: str) -> str:
+    return f'hub:{pi_id}'
+
+
+def get_hub_auth_location_tag(school_id: str) -> str:
+    return f'location:{school_id}'
+
+
+def get_auth_data(pi_id: str, school_id: str) -> Union[Tuple[User, RaspberryPiAuthData], Exception]:
+    cache_key = get_hub_auth_cache_key(pi_id, school_id)
+
+    if failed_hub_auth_cache.get(cache_key):
+        return exceptions.AuthenticationFailed()
+
+    auth_data = hub_auth_cache.get_or_set(
+        cache_key,
+        lambda: _load_auth_data(pi_id, school_id),
+        tags=(get_hub_auth_hub_tag(pi_id), get_hub_auth_location_tag(school_id)),
+    )
+
+    if auth_data is None:
+        failed_hub_auth_cache.set(cache_key, True)
+        return exceptions.AuthenticationFailed()
+
+    return auth_data
+
+
+def invalidate_hub_auth(tag: str = None):
+    """
+    Delete the shared auth data of the tag or all of them, failed attempts of the process are forgotten
+    """
+    failed_hub_auth_cache.clear()
+
+    if tag:
+        hub_auth_cache.delete_tagged(tag)
+    else:
+        hub_auth_cache.clear()
+
+
+get_auth_data.invalidate_all = invalidate_hub_auth
+
+
+def _load_auth_data(pi_id: str, school_id: str) -> Optional[Tuple[User, RaspberryPiAuthData]]:
+    try:
+        raspberry_hub = Hub.objects.select_related('sub_location__parent_location').get(uid=pi_id)
+        location = Location.objects.get(uid=school_id)
+        user = User.objects.get(
+            groups__name=RoleName.PUPIL,
+            location=location
+        )
+    except (Hub.DoesNotExist, Location.DoesNotExist, User.DoesNotExist, ValidationError):
+        return None
+
+    is_hub_in_current_location = location.id == raspberry_hub.sub_location_id
+    is_hub_in_current_sub_location = (raspberry_hub.sub_location.parent_location and
+                                      location.id == raspberry_hub.sub_location.parent_location.id)
+
+    if not (is_hub_in_current_location or is_hub_in_current_sub_location):
+        return None
+
+    return user, RaspberryPiAuthData(location, raspberry_hub)
+
+
 class RaspberryPiAuthentication(authentication.BaseAuthentication):
     def authenticate_header(self, request: Request):
         return 'WWW-Authenticate: Custom realm="api"'
@@ -32,25 +111,4 @@ class RaspberryPiAuthentication(authentication.BaseAuthentication):
 
         return auth_result
 
-    @staticmethod
-    @funcy.cache(settings.RASPBERRY_PI_AUTH_CACHE_TIME)
-    @funcy.ignore(exceptions.AuthenticationFailed, exceptions.AuthenticationFailed())
-    def get_auth_data(pi_id: str, school_id: str) -> Union[Tuple[User, RaspberryPiAuthData], Exception]:
-        try:
-            raspberry_hub = Hub.objects.get(uid=pi_id)
-            location = Location.objects.get(uid=school_id)
-            user = User.objects.get(
-                groups__name=RoleName.PUPIL,
-                location=location
-            )
-        except (Hub.DoesNotExist, Location.DoesNotExist, User.DoesNotExist, ValidationError) as exception:
-            raise exceptions.AuthenticationFailed() from exception
-
-        is_hub_in_current_location = location.id == raspberry_hub.sub_location_id
-        is_hub_in_current_sub_location = (raspberry_hub.sub_location.parent_location and
-                                          location.id == raspberry_hub.sub_location.parent_location.id)
-
-        if not (is_hub_in_current_location or is_hub_in_current_sub_location):
-            raise exceptions.AuthenticationFailed()
-
-        return user, RaspberryPiAuthData(location, raspberry_hub)
+    get_auth_data = staticmethod(get_auth_data)
@@ -0,0 +1,54 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from apps.accounts.models import User
+from apps.accounts.permissions import RoleName
+from apps.hubs.authentication import get_hub_auth_hub_tag, get_hub_auth_location_tag, invalidate_hub_auth
+from apps.hubs.models import Hub
+from apps.locations.models import Location
+
+
+@receiver((post_save, post_delete), sender=Hub, dispatch_uid='invalidate_hub_auth_for_hub')
+def invalidate_hub_auth_for_hub(instance: Hub, **__):
+    invalidate_hub_auth(get_hub_auth_hub_tag(instance.uid))
+
+
+@receiver((post_save, post_delete), sender=Location, dispatch_uid='invalidate_hub_auth_for_location')
+def invalidate_hub_auth_for_location(instance: Location, **__):
+    invalidate_hub_auth(get_hub_auth_location_tag(instance.uid))
+
+
+@receiver(post_save, sender=User, dispatch_uid='invalidate_hub_auth_for_user')
+def invalidate_hub_auth_for_user(instance: User, update_fields=None, **__):
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return  # logins of pupils are frequent and don't change the auth data
+
+    if instance.location_id and instance.groups.filter(name=RoleName.PUPIL).exists():
+        invalidate_hub_auth(get_hub_auth_location_tag(instance.location.uid))
+
+
+@receiver(post_delete, sender=User, dispatch_uid='invalidate_hub_auth_for_deleted_user')
+def invalidate_hub_auth_for_deleted_user(instance: User, **__):
+    # groups of the deleted user are not available already
+    if instance.location_id:
+        invalidate_hub_auth(get_hub_auth_location_tag(instance.location.uid))
+
+
+@receiver(m2m_changed, sender=User.groups.through, dispatch_uid='invalidate_hub_auth_for_user_groups')
+def invalidate_hub_auth_for_user_groups(instance, action: str, reverse: bool, model, pk_set=None, **__):
+    if not action.startswith('post_'):
+        return
+
+    if reverse:  # users of the group are changed
+        if instance.name != RoleName.PUPIL:
+            return
+
+        if pk_set is None:  # the group is cleared
+            invalidate_hub_auth()
+            return
+
+        for location_uid in set(User.objects.filter(id__in=pk_set).values_list('location__uid', flat=True)) - {None}:
+            invalidate_hub_auth(get_hub_auth_location_tag(location_uid))
+
+    elif instance.location_id and (pk_set is None or model.objects.filter(id__in=pk_set, name=RoleName.PUPIL).exists()):
+        invalidate_hub_auth(get_hub_auth_location_tag(instance.location.uid))
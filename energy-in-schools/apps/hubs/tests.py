@@ -3,8 +3,11 @@ from http import HTTPStatus
 from unittest.mock import patch
 
 from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
 
 from apps.accounts.permissions import RoleName
+from apps.hubs.authentication import RaspberryPiAuthentication, get_hub_auth_cache_key, hub_auth_cache
+from apps.hubs.base_test_case import HubBaseTestCase
 from apps.hubs.models import Hub
 from apps.main.base_test_case import BaseTestCase
 
@@ -129,3 +132,36 @@ class TestRaspberryHubs(BaseTestCase):
                 'description': 'new hub description',
                 'uid': 'new_t',
                 'sub_location_id': location.id}
+
+
+class TestRaspberryPiAuthentication(HubBaseTestCase):
+    def test_auth_data_cache(self):
+        get_auth_data = RaspberryPiAuthentication.get_auth_data
+        hub = self.hub
+        location_uid = self.location.uid
+
+        with self.subTest('Cached'):
+            user, auth_data = get_auth_data(hub.uid, location_uid)
+            self.assertEqual(hub, auth_data.raspberry_hub)
+            self.assertEqual(self.location, auth_data.location)
+
+            with self.assertNumQueries(0):
+                self.assertEqual(user, get_auth_data(hub.uid, location_uid)[0])
+
+        with self.subTest('Failed attempt is cached'):
+            self.assertIsInstance(get_auth_data('new', location_uid), AuthenticationFailed)
+
+            with self.assertNumQueries(0):
+                self.assertIsInstance(get_auth_data('new', location_uid), AuthenticationFailed)
+
+            self.assertIsNone(hub_auth_cache.remote_cache.get(
+                hub_auth_cache._get_remote_key(get_hub_auth_cache_key('new', location_uid))
+            ))
+
+        with self.subTest('Invalidated by the hub changes'):
+            Hub.objects.create(name='new hub', uid='new', sub_location=self.location)
+            self.assertEqual(self.location, get_auth_data('new', location_uid)[1].location)
+
+            hub.sub_location = self.get_user(school_number=1).location
+            hub.save()
+            self.assertIsInstance(get_auth_data(hub.uid, location_uid), AuthenticationFailed)
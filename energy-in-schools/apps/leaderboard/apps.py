@@ -1,5 +1,16 @@
+from celery.schedules import crontab
 from django.apps import AppConfig
 
 
-class Leaderboard(AppConfig):
+class LeaderboardConfig(AppConfig):
     name = 'apps.leaderboard'
+
+    def ready(self):
+        from samsung_school import celery_app
+
+        from apps.leaderboard.tasks import refresh_always_on_leaderboard
+
+        celery_app.add_periodic_task(
+            crontab(minute=40),  # after long term history is saved
+            refresh_always_on_leaderboard.s(),
+        )
@@ -0,0 +1,26 @@
+# Generated by Django 2.2.28 on 2026-10-18 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('locations', '0017_auto_20220412_1216'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlwaysOnLeaderboardSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('value', models.FloatField(blank=True, null=True)),
+                ('location', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='always_on_snapshot', to='locations.Location')),
+            ],
+        ),
+    ]
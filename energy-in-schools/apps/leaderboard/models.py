@@ -0,0 +1,85 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from django.db import models
+from django.db.models import Q
+from django.db.transaction import atomic
+
+from apps.energy_providers.providers.abstract import MeterType
+from apps.historical_data.utils.aggregations import get_always_on_by_resources
+from apps.locations.models import Location
+from apps.main.models import BaseModel
+from apps.resources.models import Resource
+
+
+ALWAYS_ON_PERIOD_DURATION = timedelta(weeks=5)
+ALWAYS_ON_SNAPSHOT_MAX_AGE = timedelta(hours=6)
+
+
+class AlwaysOnLeaderboardSnapshot(BaseModel):
+    location = models.OneToOneField(Location, on_delete=models.CASCADE, related_name='always_on_snapshot')
+    value = models.FloatField(null=True, blank=True)  # None if location meters have no data for the period
+
+    @classmethod
+    def get_for_locations(cls, locations: Iterable[Location]) -> Dict[Location, Optional[float]]:
+        """
+        Return always on values from snapshots, missed and outdated snapshots are refreshed at once
+        """
+        locations = list(locations)
+        fresh_snapshots_start = datetime.now(tz=timezone.utc) - ALWAYS_ON_SNAPSHOT_MAX_AGE
+        values_by_location_id = dict(
+            cls.objects.filter(location__in=locations, updated_at__gte=fresh_snapshots_start)
+                .values_list('location_id', 'value')
+        )
+
+        values_by_location_id.update(
+            cls.refresh_for_locations([location for location in locations if location.id not in values_by_location_id])
+        )
+
+        return {location: values_by_location_id[location.id] for location in locations}
+
+    @classmethod
+    def refresh_for_locations(cls, locations: Iterable[Location]) -> Dict[int, Optional[float]]:
+        values_by_location_id = calculate_always_on_for_locations(locations)
+
+        with atomic():
+            for location_id, value in values_by_location_id.items():
+                cls.objects.update_or_create(location_id=location_id, defaults=dict(value=value))
+
+        return values_by_location_id
+
+
+def calculate_always_on_for_locations(locations: Iterable[Location]) -> Dict[int, Optional[float]]:
+    """
+    Calculate always on values of electricity meters for all locations by one aggregation query
+    """
+    location_ids = {location.id for location in locations}
+    if not location_ids:
+        return {}
+
+    resources_by_location_id: Dict[int, List[Resource]] = defaultdict(list)
+    resources = Resource.filter_energy_meters(
+        Resource.objects.filter(Q(sub_location_id__in=location_ids) | Q(sub_location__parent_location_id__in=location_ids)),
+        MeterType.ELECTRICITY,
+    ).select_related('sub_location')
+
+    for resource in resources:
+        for location_id in {resource.sub_location_id, resource.sub_location.parent_location_id} & location_ids:
+            resources_by_location_id[location_id].append(resource)
+
+    always_on_by_resource_id = get_always_on_by_resources(
+        {resource for location_resources in resources_by_location_id.values() for resource in location_resources},
+        from_=datetime.now(tz=timezone.utc) - ALWAYS_ON_PERIOD_DURATION,
+    )
+
+    values_by_location_id = {}
+    for location_id in location_ids:
+        values = [
+            always_on_by_resource_id[resource.id]
+            for resource in resources_by_location_id[location_id]
+            if resource.id in always_on_by_resource_id
+        ]
+        values_by_location_id[location_id] = sum(values) if values else None
+
+    return values_by_location_id
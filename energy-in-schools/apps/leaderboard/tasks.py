@@ -0,0 +1,10 @@
+from apps.leaderboard.models import AlwaysOnLeaderboardSnapshot
+from apps.locations.models import Location
+from samsung_school import celery_app
+from utilities.sqlalchemy_helpers import close_sa_session
+
+
+@celery_app.task(ignore_result=True)
+@close_sa_session
+def refresh_always_on_leaderboard():
+    AlwaysOnLeaderboardSnapshot.refresh_for_locations(Location.get_schools())
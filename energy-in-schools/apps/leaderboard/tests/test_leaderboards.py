@@ -9,6 +9,8 @@ from apps.cashback.models import OffPeakyPoint
 from apps.energy_meters.tests.base_test_case import EnergyHistoryBaseTestCase
 from apps.energy_tariffs.base_test_case import EnergyTariffBaseTestCase
 from apps.energy_providers.models import Provider
+from apps.leaderboard.models import AlwaysOnLeaderboardSnapshot
+from apps.leaderboard.tasks import refresh_always_on_leaderboard
 from apps.smart_things_sensors.base_test_case import SmartThingsSensorsBaseTestCase
 
 if TYPE_CHECKING:
@@ -71,6 +73,32 @@ class TestLeaderboard(EnergyHistoryBaseTestCase, EnergyTariffBaseTestCase, Smart
             'unit': 'watt',
         }, first_school['always_on_energy'])
 
+    def test_always_on_leaderboard_snapshot(self):
+        mock_energy_value_date = datetime.now(tz=timezone.utc).replace(hour=2)
+        self.create_energy_history(
+            default_rows=False,
+            is_detailed_history=False,
+            long_term_history_in_watt_hour=True,
+            extra_rows=(
+                (self.energy_meter, mock_energy_value_date - timedelta(weeks=8)),
+                (self.energy_meter, mock_energy_value_date - timedelta(weeks=3)),
+            ),
+        )
+
+        refresh_always_on_leaderboard()
+
+        self.assertEqual(
+            {self.location.id: 10.0},
+            dict(AlwaysOnLeaderboardSnapshot.objects.exclude(value=None).values_list('location_id', 'value'))
+        )
+
+        AlwaysOnLeaderboardSnapshot.objects.filter(location=self.location).update(value=15.0)
+
+        response = self.client.get(self.get_url('always-on'))
+
+        self.assertResponse(response)
+        self.assertEqual({'value': 15.0, 'unit': 'watt'}, response.data[0]['always_on_energy'])
+
     def test_always_on_leaderboard_no_data(self):
         response = self.client.get(self.get_url('always-on'))
 
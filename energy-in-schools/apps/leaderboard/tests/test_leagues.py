@@ -13,6 +13,7 @@ from apps.energy_meters.tests.base_test_case import EnergyHistoryBaseTestCase
 from apps.energy_tariffs.base_test_case import EnergyTariffBaseTestCase
 from apps.historical_data.models import DetailedHistoricalData, LongTermHistoricalData
 from apps.leaderboard.serializers import LeaguePointsUnit
+from apps.locations.live_values import live_values_cache
 from apps.locations.models import Location
 from apps.registration_requests.models import RegistrationRequest
 from apps.registration_requests.types import Status
@@ -22,6 +23,10 @@ class TestLeagues(EnergyHistoryBaseTestCase, EnergyTariffBaseTestCase):
     FORCE_LOGIN_AS = RoleName.ES_USER
     URL = '/api/v1/leaderboard/leagues/'
 
+    def setUp(self):
+        super().setUp()
+        live_values_cache.clear()
+
     @override_settings(TEST_MODE=False)
     def test_leaderboard_only_for_accepted_locations(self):
         self._create_location_meters_and_energy_data()
@@ -6,23 +6,18 @@ from django.db.models import QuerySet
 
 from apps.locations.models import Location
 from apps.energy_providers.providers.abstract import MeterType
-from apps.historical_data.utils.aggregations import aggregate_latest_value, aggregate_to_one
+from apps.historical_data.utils.aggregations import aggregate_to_one
 from apps.leaderboard.views.leaderboard import get_always_on_for_locations
+from apps.locations.live_values import get_electricity_live_values
 from apps.leaderboard.serializers import LeaguePointsUnit
 from apps.resources.models import Resource, Unit
 from apps.resources.types import ResourceDataNotAvailable
 
-LIVE_VALUE_LEAGUE_CACHE_TIMEOUT = int(timedelta(minutes=30).total_seconds())
 YESTERDAY_VALUE_LEAGUE_CACHE_TIMEOUT = int(timedelta(hours=1).total_seconds())
 
 
-@cached(timeout=LIVE_VALUE_LEAGUE_CACHE_TIMEOUT)
 def _get_live_electricity_usage_for_location(location: Location) -> Optional[float]:
-    location_meters = Resource.get_location_energy_meters(location, MeterType.ELECTRICITY)
-    try:
-        return aggregate_latest_value(location_meters, unit=Unit.WATT).value
-    except ResourceDataNotAvailable:
-        return None
+    return get_electricity_live_values().get(location.id)
 
 
 @cached(timeout=YESTERDAY_VALUE_LEAGUE_CACHE_TIMEOUT)
@@ -1,7 +1,5 @@
-from datetime import datetime, timedelta, timezone
 from http import HTTPStatus
 
-from cacheops import cached
 from django.conf import settings
 from django.db.models import Q
 from drf_yasg.utils import swagger_auto_schema
@@ -11,16 +9,10 @@ from rest_framework.viewsets import GenericViewSet
 
 from apps.accounts.models import User
 from apps.cashback.models import OffPeakyPoint
-from apps.energy_providers.providers.abstract import MeterType
-from apps.resources.models import Resource
-from apps.historical_data.utils.aggregations import get_always_on
+from apps.leaderboard.models import AlwaysOnLeaderboardSnapshot
 from apps.leaderboard.serializers import AlwaysOnLeaderboardMemberSerializer, CashbackLeaderboardMemberSerializer
 from apps.locations.models import Location
-from apps.resources.types import ResourceDataNotAvailable
-
-
-ALWAYS_ON_PERIOD_DURATION = timedelta(weeks=5)
-CACHE_TIMEOUT = int(timedelta(hours=6).total_seconds())
+from apps.resources.types import AlwaysOnValue, Unit
 
 
 class LeaderboardViewSet(GenericViewSet):
@@ -73,27 +65,15 @@ class LeaderboardViewSet(GenericViewSet):
         return Response(result_serializer.data)
 
 
-@cached(timeout=CACHE_TIMEOUT)
-def _get_always_on_energy_for_location(location):
-    always_on_start_date = datetime.now(tz=timezone.utc) - ALWAYS_ON_PERIOD_DURATION
-    location_meters = Resource.get_location_energy_meters(location, MeterType.ELECTRICITY)
-    try:
-        return get_always_on(location_meters, from_=always_on_start_date)
-    except ResourceDataNotAvailable:
-        return None
-
-
 def get_always_on_for_locations(locations):
     always_on_data_per_location = []
 
-    for location in locations:
-        location_always_on_energy = _get_always_on_energy_for_location(location)
-
-        if not location_always_on_energy:
+    for location, value in AlwaysOnLeaderboardSnapshot.get_for_locations(locations).items():
+        if value is None:
             continue
 
         always_on_data_per_location.append({
-            'always_on_energy': location_always_on_energy.as_dict(),
+            'always_on_energy': AlwaysOnValue(value=value, unit=Unit.WATT).as_dict(),
             'location_name': location.name,
             'location_uid': location.uid,
         })
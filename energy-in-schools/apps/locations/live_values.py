@@ -0,0 +1,55 @@
+from datetime import timedelta
+from typing import Dict, Hashable, Iterator, Set, Tuple
+
+import funcy
+
+from apps.energy_meters.models import EnergyMeter
+from apps.energy_providers.providers.abstract import MeterType
+from apps.historical_data.utils.aggregations import aggregate_latest_values_by_groups
+from apps.resources.models import Resource
+from apps.resources.types import Unit
+from utilities.caching import TwoTierCache
+
+
+LIVE_VALUES_CACHE_TIMEOUT = timedelta(minutes=1)
+
+live_values_cache = TwoTierCache('live_values', LIVE_VALUES_CACHE_TIMEOUT, max_size=10)
+
+
+def get_energy_meters_live_values() -> Dict[Tuple[int, MeterType], float]:
+    """
+    Live values in watts of energy meters for every location, including sub locations, and meter type
+    """
+    return live_values_cache.get_or_set('energy_meters', lambda: _calculate_live_values(
+        ((location_id, energy_meter.type), energy_meter)
+        for energy_meter in EnergyMeter.objects.select_related('sub_location')
+        for location_id in _get_location_ids(energy_meter)
+    ))
+
+
+def get_electricity_live_values() -> Dict[int, float]:
+    """
+    Live values in watts of electricity meters except dummy ones for every location, including sub locations
+    """
+    return live_values_cache.get_or_set('electricity', lambda: _calculate_live_values(
+        (location_id, resource)
+        for resource in Resource.filter_energy_meters(
+            Resource.objects.select_related('sub_location'),
+            MeterType.ELECTRICITY,
+        )
+        for location_id in _get_location_ids(resource)
+    ))
+
+
+def _calculate_live_values(resources_by_group: Iterator[Tuple[Hashable, Resource]]) -> Dict[Hashable, float]:
+    return {
+        group: resource_value.value
+        for group, resource_value in aggregate_latest_values_by_groups(
+            funcy.group_values(resources_by_group),
+            unit=Unit.WATT,
+        ).items()
+    }
+
+
+def _get_location_ids(resource: Resource) -> Set[int]:
+    return {resource.sub_location_id, resource.sub_location.parent_location_id} - {None}
@@ -64,7 +64,7 @@ class Location(BaseModel, NameAndDescriptionMixin):
 
     @property
     def is_sub_location(self) -> bool:
-        return bool(self.parent_location)
+        return self.parent_location_id is not None
 
     @property
     def with_sub_locations(self) -> Union[models.QuerySet, Collection['Location']]:
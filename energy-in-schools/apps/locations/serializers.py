@@ -6,10 +6,10 @@ from rest_framework.exceptions import ValidationError
 from apps.addresses.models import Address
 from apps.addresses.serializers import AddressSerializer
 from apps.locations.models import Location
-from utilities.serializer_helpers import get_serializer_fields, get_serializer_kwargs
+from utilities.serializer_helpers import SparseFieldsetSerializerMixin, get_serializer_fields, get_serializer_kwargs
 
 
-class LocationSerializer(serializers.ModelSerializer):
+class LocationSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     address = AddressSerializer()
 
     class Meta:
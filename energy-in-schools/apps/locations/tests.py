@@ -6,6 +6,7 @@ from datetime import date
 from apps.accounts.permissions import RoleName
 from apps.addresses.models import Address
 from apps.energy_meters.tests.base_test_case import EnergyHistoryBaseTestCase
+from apps.locations.live_values import live_values_cache
 from apps.locations.models import Location
 from apps.cashback.models import OffPeakyPoint
 from apps.main.base_test_case import BaseTestCase, AdminBaseTestCase
@@ -31,6 +32,7 @@ class TestLocations(EnergyHistoryBaseTestCase):
     def setUp(self):
         super().setUp()
         self.client.force_login(self.get_user())
+        live_values_cache.clear()
 
     @staticmethod
     def get_request_data():
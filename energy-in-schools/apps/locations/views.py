@@ -1,5 +1,5 @@
 from http import HTTPStatus
-from typing import Dict, List, Union
+from typing import Dict
 
 from django.conf import settings
 from django.db.models import QuerySet
@@ -10,16 +10,15 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAdminUser, AllowAny
 from rest_framework.response import Response
 
-from apps.energy_meters.models import EnergyMeter
 from apps.energy_providers.providers.abstract import MeterType
-from apps.historical_data.utils import aggregations
 from apps.locations.filtersets import OwnLocationOnlyFilterSet
+from apps.locations.live_values import get_energy_meters_live_values
 from apps.locations.models import Location
 from apps.locations.querysets import AbstractInLocationQuerySet
 from apps.locations.serializers import LocationMoodSerializer, LocationSerializer
-from apps.resources.types import ResourceDataNotAvailable, Unit
 from apps.smart_things_devices.models import SmartThingsDevice
 from apps.smart_things_devices.serializers import SmartThingsDevicesSerializer
+from utilities.pagination import OptInCursorPagination
 from .constants import ENERGY_CONSUMPTION_MOOD_MAPPING
 
 
@@ -32,6 +31,7 @@ class LocationFilterSet(OwnLocationOnlyFilterSet):
 class LocationViewSet(viewsets.ModelViewSet):
     serializer_class = LocationSerializer
     filterset_class = LocationFilterSet
+    pagination_class = OptInCursorPagination
 
     def get_queryset(self):
         queryset: AbstractInLocationQuerySet = Location.objects.all().select_related('address')
@@ -88,26 +88,21 @@ class LocationViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer: LocationSerializer):
         serializer.save(parent_location=self.request.user.location)
 
-    def get_energy_meters(self, meter_type) -> Union[QuerySet, List[EnergyMeter]]:
-        return EnergyMeter.objects.in_location(self.get_object()).filter(type=meter_type)
-
     @swagger_auto_schema(method='get', responses={HTTPStatus.OK.value: LocationMoodSerializer})
     @action(methods=['get'], detail=True, url_path='energy-mood')
     def energy_mood(self, *_, **__):
         """Return Energy Mood for Each School"""
+        location = self.get_object()
+        live_values = get_energy_meters_live_values()
         current_mood: Dict[str, int] = {
         }
 
         for energy_type in MeterType:
-            try:
-                result = aggregations.aggregate_latest_value(
-                    resources=self.get_energy_meters(energy_type),
-                    unit=Unit.WATT,
-                )
-            except ResourceDataNotAvailable:
+            live_value = live_values.get((location.id, energy_type))
+
+            if live_value is None:
                 current_mood[energy_type.value.lower()] = 5 if energy_type != MeterType.SOLAR else 0
             else:
-                live_value = result.value
                 threshold_value = min(ENERGY_CONSUMPTION_MOOD_MAPPING.keys(), key=lambda value: abs(value - live_value))
                 current_mood[energy_type.value.lower()] = ENERGY_CONSUMPTION_MOOD_MAPPING[threshold_value]
 
@@ -1,8 +1,25 @@
+from datetime import timedelta
+from typing import Dict, Iterable, NamedTuple
+
 from django.db import models
 
 from apps.hubs.models import Hub
 from apps.resources.models import Resource
 from apps.resources.types import DataCollectionMethod, ResourceChildType, TimeResolution, Unit
+from utilities.caching import LRUCache
+
+
+DATA_SETS_INDEX_SIZE = 10_000
+DATA_SETS_INDEX_TIMEOUT = timedelta(minutes=10)
+
+
+class DataSetKey(NamedTuple):
+    namespace: str
+    name: str
+    type: int
+
+
+data_sets_index = LRUCache(DATA_SETS_INDEX_SIZE, DATA_SETS_INDEX_TIMEOUT)  # (hub id, data set key) -> data set id
 
 
 class MicrobitHistoricalDataSet(Resource):
@@ -41,3 +58,70 @@ class MicrobitHistoricalDataSet(Resource):
             pass
 
         super().save(*args, **kwargs)
+
+    @property
+    def key(self) -> DataSetKey:
+        return DataSetKey(namespace=self.namespace, name=self.name, type=self.type)
+
+    @classmethod
+    def get_or_create_for_hub(
+            cls,
+            hub: Hub,
+            unit_labels: Dict[DataSetKey, str]
+    ) -> 'Dict[DataSetKey, MicrobitHistoricalDataSet]':
+        """
+        Bulk version of update_or_create of the hub data sets: known ids are taken from the index, the rest data sets
+        are looked up by one query and only the new ones are created one by one
+        """
+        cached_ids = {key: data_sets_index.get((hub.id, key)) for key in unit_labels}
+        data_sets_by_id = cls.objects.filter(hub=hub, sub_location=hub.sub_location).in_bulk(
+            list(filter(None, cached_ids.values()))
+        )
+        data_sets = {
+            key: data_sets_by_id[data_set_id]
+            for key, data_set_id in cached_ids.items()
+            if data_set_id in data_sets_by_id and data_sets_by_id[data_set_id].key == key
+        }
+
+        missed_keys = set(unit_labels) - set(data_sets)
+        if missed_keys:
+            data_sets.update(cls._get_or_create_for_hub(hub, missed_keys, unit_labels))
+
+        for key, data_set in data_sets.items():
+            if data_set.unit_label != unit_labels[key]:
+                data_set.unit_label = unit_labels[key]
+                data_set.save()  # the unit depends on the label
+
+            data_sets_index.set((hub.id, key), data_set.id)
+
+        return data_sets
+
+    @classmethod
+    def _get_or_create_for_hub(
+            cls,
+            hub: Hub,
+            keys: Iterable[DataSetKey],
+            unit_labels: Dict[DataSetKey, str]
+    ) -> 'Dict[DataSetKey, MicrobitHistoricalDataSet]':
+        keys = set(keys)
+        data_sets = {
+            data_set.key: data_set
+            for data_set in cls.objects.filter(
+                hub=hub,
+                sub_location=hub.sub_location,
+                namespace__in={key.namespace for key in keys},
+                name__in={key.name for key in keys},
+                type__in={key.type for key in keys},
+            )
+            if data_set.key in keys
+        }
+
+        for key in keys - set(data_sets):
+            data_sets[key] = cls.objects.create(
+                **key._asdict(),
+                unit_label=unit_labels[key],
+                hub=hub,
+                sub_location=hub.sub_location,
+            )
+
+        return data_sets
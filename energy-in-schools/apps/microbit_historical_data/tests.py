@@ -1,3 +1,4 @@
+import json
 from datetime import datetime, timedelta, timezone
 from http import HTTPStatus
 
@@ -50,3 +51,55 @@ class TestMicrobitHistoricalDataSet(HubBaseTestCase):
             self.assertEqual(self.hub_in_sub_location.sub_location, instance.sub_location)
 
             self.assertEqual([24., 244.], list(instance.detailed_historical_data.values_list('value', flat=True)))
+
+    def test_bulk_create(self):
+        now = datetime.now(tz=timezone.utc).replace(microsecond=0)
+        existing_data_set = MicrobitHistoricalDataSet.objects.create(
+            namespace='ns',
+            name='existing',
+            type=1,
+            unit_label='watt',
+            hub=self.hub,
+            sub_location=self.hub.sub_location,
+        )
+
+        with self.subTest('JSON'):
+            response = self.client.post(self.get_url('bulk'), json.dumps([
+                dict(namespace='ns', name='existing', type=1, unit='watt', value=1,
+                     time=self.format_datetime(now - timedelta(seconds=2))),
+                dict(namespace='ns', name='new', type=2, unit='celsius', value=20,
+                     time=self.format_datetime(now - timedelta(seconds=2))),
+                dict(namespace='ns', name='existing', type=1, unit='watt', value=2,
+                     time=self.format_datetime(now - timedelta(seconds=1))),
+            ]), content_type='application/json', **self.get_hub_headers())
+
+            self.assertResponse(response, HTTPStatus.CREATED)
+            self.assertEqual(3, response.data['count'])
+            self.assertEqual(2, MicrobitHistoricalDataSet.objects.count())
+            self.assertEqual([1., 2.], list(
+                existing_data_set.detailed_historical_data.order_by('time').values_list('value', flat=True)
+            ))
+
+            new_data_set = MicrobitHistoricalDataSet.objects.get(name='new')
+            self.assertEqual(Unit.CELSIUS, new_data_set.unit)
+            self.assertEqual(self.hub, new_data_set.hub)
+            self.assertEqual([20.], list(new_data_set.detailed_historical_data.values_list('value', flat=True)))
+
+        with self.subTest('NDJSON'):
+            response = self.client.post(self.get_url('bulk'), '\n'.join(map(json.dumps, [
+                dict(namespace='ns', name='new', type=2, unit='celsius', value=21, time=self.format_datetime(now)),
+                dict(namespace='ns', name='other', type=2, unit='celsius', value=22, time=self.format_datetime(now)),
+            ])), content_type='application/x-ndjson', **self.get_hub_headers())
+
+            self.assertResponse(response, HTTPStatus.CREATED)
+            self.assertEqual(3, MicrobitHistoricalDataSet.objects.count())
+            self.assertEqual([20., 21.], list(
+                new_data_set.detailed_historical_data.order_by('time').values_list('value', flat=True)
+            ))
+
+        with self.subTest('Invalid reading'):
+            response = self.client.post(self.get_url('bulk'), json.dumps([
+                dict(namespace='ns', name='new', type=2, unit='celsius', value='wrong'),
+            ]), content_type='application/json', **self.get_hub_headers())
+
+            self.assertResponse(response, HTTPStatus.BAD_REQUEST)
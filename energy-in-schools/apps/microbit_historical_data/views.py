@@ -1,10 +1,25 @@
+from collections import defaultdict
+from http import HTTPStatus
+from typing import Dict, List
+
+from django.db.transaction import atomic
 from rest_framework import mixins
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
+from rest_framework_csv.parsers import CSVParser
 
 from apps.hubs.authentication import RaspberryPiAuthentication
-from apps.microbit_historical_data.models import MicrobitHistoricalDataSet
+from apps.microbit_historical_data.models import DataSetKey, MicrobitHistoricalDataSet
 from apps.microbit_historical_data.serializers import MicrobitHistoricalDataAddDataSerializer
+from apps.resources.models import Resource
 from apps.resources.types import ResourceValue
+from utilities.parsers import NDJSONParser
+
+
+MAX_BULK_READINGS = 5000
 
 
 class MicrobitHistoricalDataSetView(mixins.CreateModelMixin,
@@ -16,17 +31,50 @@ class MicrobitHistoricalDataSetView(mixins.CreateModelMixin,
         return MicrobitHistoricalDataSet.objects.filter(sub_location=self.request.auth.location)
 
     def perform_create(self, serializer: MicrobitHistoricalDataAddDataSerializer):
-        data_set, _ = MicrobitHistoricalDataSet.objects.update_or_create(
-            defaults=dict(unit_label=serializer.validated_data['unit']),
-            namespace=serializer.validated_data['namespace'],
-            name=serializer.validated_data['name'],
-            type=serializer.validated_data['type'],
-            hub=self.request.auth.raspberry_hub,
-            sub_location=self.request.auth.raspberry_hub.sub_location,
+        key = self._get_data_set_key(serializer.validated_data)
+        data_set = MicrobitHistoricalDataSet.get_or_create_for_hub(
+            self.request.auth.raspberry_hub,
+            {key: serializer.validated_data['unit']}
+        )[key]
+
+        data_set.add_value(self._get_resource_value(serializer.validated_data))
+
+    @action(methods=['post'], detail=False, url_path='bulk', parser_classes=(JSONParser, NDJSONParser, CSVParser))
+    @atomic
+    def bulk_create(self, request, *args, **kwargs):
+        """
+        Add many readings of many data sets at once: a JSON array, NDJSON or CSV with the header row
+        """
+        if isinstance(request.data, list) and len(request.data) > MAX_BULK_READINGS:
+            raise ValidationError(f'Ensure there are no more than {MAX_BULK_READINGS} readings.')
+
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        # the latest unit of the data set is kept like for the separate requests
+        unit_labels = {self._get_data_set_key(reading): reading['unit'] for reading in serializer.validated_data}
+        data_sets = MicrobitHistoricalDataSet.get_or_create_for_hub(request.auth.raspberry_hub, unit_labels)
+
+        values_by_data_set: Dict[MicrobitHistoricalDataSet, List[ResourceValue]] = defaultdict(list)
+        for reading in serializer.validated_data:
+            values_by_data_set[data_sets[self._get_data_set_key(reading)]].append(self._get_resource_value(reading))
+
+        Resource.add_values_for_resources(values_by_data_set)
+
+        return Response({'count': len(serializer.validated_data)}, status=HTTPStatus.CREATED)
+
+    @staticmethod
+    def _get_data_set_key(validated_data) -> DataSetKey:
+        return DataSetKey(
+            namespace=validated_data['namespace'],
+            name=validated_data['name'],
+            type=validated_data['type'],
         )
 
-        data_set.add_value(ResourceValue(
-            time=serializer.validated_data['time'].replace(microsecond=0),
-            value=serializer.validated_data['value'],
-            unit=serializer.validated_data['unit'],
-        ))
+    @staticmethod
+    def _get_resource_value(validated_data) -> ResourceValue:
+        return ResourceValue(
+            time=validated_data['time'].replace(microsecond=0),
+            value=validated_data['value'],
+            unit=validated_data['unit'],
+        )
@@ -24,3 +24,7 @@ class NotificationsConfig(AppConfig):
             crontab(hour=8, minute=59, day_of_week='mon-fri'),
             send_schools_status_daily_email.s(),
         )
+
+        # activate listeners:
+        # noinspection PyUnresolvedReferences
+        import apps.notifications.signals
@@ -1,57 +1,79 @@
 from datetime import datetime
-from typing import Dict, Tuple, List 
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from django.conf import settings
 from django.core.mail import EmailMultiAlternatives
 from django.template.loader import get_template
 
-from apps.energy_providers.models import Provider
-from apps.energy_meters.models import EnergyMeter
 from apps.locations.models import Location
 from apps.notifications.models.daily_report_subscription import DailyReportSubscription
-from apps.schools_metrics.serializers import SchoolsMetricsSerializer
-from apps.smart_things_apps.models import SmartThingsApp
+from apps.schools_metrics.models import SchoolMetricsSnapshot
+from apps.schools_metrics.serializers import SchoolMetricsConsumptionDataSerializer, \
+    SchoolsMetricsEnergyMetersSerializer
 from apps.smart_things_apps.types import SmartAppConnectivityStatus
-from apps.smart_things_devices.types import DeviceStatus
 from apps.smart_things_devices.models import SmartThingsDevice
-from apps.smart_things_sensors.models import SmartThingsEnergyMeter
 
 
 class SchoolsStatusDailyReport:
+    """
+    The report is made from school metrics snapshots, schools without a snapshot are reported without data
+    """
+
     @staticmethod
-    def get_smart_apps_data() -> Dict[str, List]:
-        """ Since SmartThingsApp model doesn't have status field and 
-            doesn't store it on DB, we need to check status manually
-        """
-        location_queryset = Location.objects.filter(parent_location__isnull=True, is_test=False)
+    def get_schools_metrics() -> Dict[str, Dict]:
+        location_queryset = Location.objects.filter(parent_location__isnull=True, is_test=False) \
+            .select_related('metrics_snapshot')
+
+        return {location.name: SchoolsStatusDailyReport._get_snapshot_data(location) for location in location_queryset}
+
+    @staticmethod
+    def get_smart_apps_data(schools_metrics: Dict[str, Dict]) -> Dict[str, List]:
         data_template = {status.value: [] for status in SmartAppConnectivityStatus}
 
-        for location in location_queryset:
-            smart_app: SmartThingsApp = location.smart_things_apps.first()
-            if smart_app:
-                smart_app_status: SmartAppConnectivityStatus = smart_app.get_refresh_token_status()
-                data_template[smart_app_status.value].append(smart_app.location.name)
-            else:
-                data_template[SmartAppConnectivityStatus.NO_SMART_APP.value].append(location.name)
+        for location_name, metrics in schools_metrics.items():
+            smart_app_token = metrics.get('smart_things_app_token') or {}
+            smart_app_status = smart_app_token.get('status', SmartAppConnectivityStatus.NO_SMART_APP.value)
+            data_template[smart_app_status].append(location_name)
 
         return data_template
 
     @staticmethod
-    def get_energy_meters_data() -> Dict[str, Dict]:
-        location_queryset = Location.objects.filter(is_test=False)
-        energy_meters_data = {location.name: SchoolsMetricsSerializer.get_energy_meters(location)
-                              for location in location_queryset}
+    def get_energy_meters_data(schools_metrics: Dict[str, Dict]) -> Dict[str, Dict]:
+        # snapshots are stored in jsonb that doesn't keep the order of keys, but the report relies on it
+        energy_meters_data = {
+            location_name: SchoolsStatusDailyReport._order_keys(
+                metrics.get('energy_meters'),
+                SchoolsMetricsEnergyMetersSerializer.Meta.fields,
+            )
+            for location_name, metrics in schools_metrics.items()
+        }
 
         return energy_meters_data
 
     @staticmethod
-    def get_data_flow() -> Tuple[Tuple[str], Dict[str, Dict]]:
-        location_queryset = Location.objects.filter(is_test=False)
-        data_flow = {location.name: SchoolsMetricsSerializer.get_consumption(location)
-                     for location in location_queryset}
+    def get_data_flow(schools_metrics: Dict[str, Dict]) -> Tuple[Tuple[str], Dict[str, Dict]]:
+        data_flow = {
+            location_name: SchoolsStatusDailyReport._order_keys(
+                metrics.get('consumption'),
+                SchoolMetricsConsumptionDataSerializer.Meta.fields,
+            )
+            for location_name, metrics in schools_metrics.items()
+        }
 
         return ('', 'Electricity', 'Gas', 'Smart Plug', 'Unknown'), data_flow
 
+    @staticmethod
+    def _get_snapshot_data(location: Location) -> Dict:
+        try:
+            return location.metrics_snapshot.data
+
+        except SchoolMetricsSnapshot.DoesNotExist:
+            return {}
+
+    @staticmethod
+    def _order_keys(data: Optional[Dict], keys: Iterable[str]) -> Optional[Dict]:
+        return {key: data.get(key) for key in keys} if data else data
+
     @staticmethod
     def get_battery_health_data() -> Tuple[Tuple[str], List]:
         keys = ('', 'Device ID', 'Device', 'Battery health, %')
@@ -65,9 +87,10 @@ class SchoolsStatusDailyReport:
 
     @classmethod
     def send_report(cls) -> None:
-        smart_apps = SchoolsStatusDailyReport.get_smart_apps_data()
-        energy_meters = SchoolsStatusDailyReport.get_energy_meters_data()
-        data_flow = SchoolsStatusDailyReport.get_data_flow()
+        schools_metrics = SchoolsStatusDailyReport.get_schools_metrics()
+        smart_apps = SchoolsStatusDailyReport.get_smart_apps_data(schools_metrics)
+        energy_meters = SchoolsStatusDailyReport.get_energy_meters_data(schools_metrics)
+        data_flow = SchoolsStatusDailyReport.get_data_flow(schools_metrics)
         battery_health = SchoolsStatusDailyReport.get_battery_health_data()
         env = settings.CONFIGURATION_NAME.name
         time: datetime = datetime.today().date().strftime('%d, %b %Y')
@@ -1,18 +1,23 @@
+import heapq
+import json
 import logging
+import threading
+import time
+from bisect import bisect_left
 from datetime import date, datetime, timedelta, timezone
-from typing import Any, Dict, Iterator, List, Optional, Type, TypeVar, Union
+from typing import Any, Callable, Dict, Hashable, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple, Type, \
+    TypeVar, Union
 
 import funcy
-from aldjemy.orm import get_session
-from django.db import models
+from django.db import models, transaction
+from django.db.models import QuerySet
 from enumfields import Enum, EnumField
-from sqlalchemy import Boolean, Column, DateTime, Interval, and_, case, func, over
-from sqlalchemy.orm import Query
+from sqlalchemy import and_, func
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.sql.elements import or_
 
 from apps.energy_providers.providers.abstract import MeterType
-from apps.historical_data.models import AbstractHistoricalData, DetailedHistoricalData
+from apps.historical_data.models import DetailedHistoricalData
 from apps.historical_data.utils.aggregation_params_manager import AggregationParamsManager
 from apps.historical_data.utils.aggregations import TimeValuePair, aggregate_to_one, get_aggregate_by_time_query, \
     get_aggregate_to_list_query
@@ -24,6 +29,7 @@ from apps.notifications.types import *
 from apps.resources.models import Resource
 from apps.resources.types import ResourceChildType, ResourceValue, Unit
 from apps.smart_things_devices.types import Capability
+from utilities.caching import LRUCache
 
 
 logger = logging.getLogger(__name__)
@@ -32,6 +38,9 @@ ModelType = TypeVar('ModelType', bound='ParentModelMixin')
 
 DAILY_USAGE_RELATED_TO_DAYS = 5
 
+ABNORMAL_VALUE_RULES_TIMEOUT = timedelta(minutes=5)
+METER_TYPES_CACHE_SIZE = 10_000
+
 
 class ParentModelMixin:
     Type: Type[Enum]
@@ -97,15 +106,35 @@ class NotificationTrigger(ParentModelMixin, BaseModel):
 
     @classmethod
     def process_all_triggers(cls):
-        for notification_trigger in cls.objects.all():
-            notification_trigger.process_trigger()
+        cls.process_triggers(cls.objects.all())
+
+    @classmethod
+    def process_triggers(cls, triggers: QuerySet):
+        triggers = [
+            trigger
+            for trigger in triggers.select_related(*set(cls.CHILD_MODELS_FIELDS_MAP.values()))
+            if trigger.is_ready_for_processing
+        ]
+        context = TriggersProcessingContext(triggers)
+
+        for trigger in triggers:
+            try:
+                trigger.process_trigger(context)
 
-    def process_trigger(self):
-        is_accepted_frequency = self.last_action_time is None or \
-                                self.last_action_time < self.max_notification_frequency.get_current_period_start()
-        if self.is_active and is_accepted_frequency and self._is_triggered():
+            except Exception as exception:
+                logger.error(f'Notification trigger {trigger.id} is not processed. Error: {exception}')
+
+    def process_trigger(self, context: 'TriggersProcessingContext' = None):
+        if self.is_ready_for_processing and self._is_triggered(context or TriggersProcessingContext([self])):
             self._send_notification()
 
+    @property
+    def is_ready_for_processing(self) -> bool:
+        return self.is_active and (
+            self.last_action_time is None or
+            self.last_action_time < self.max_notification_frequency.get_current_period_start()
+        )
+
     def get_format_data(self) -> Dict[str, Any]:
         return dict(
             resource_name=self.source_resource.name if self.source_resource else None,
@@ -161,9 +190,9 @@ class NotificationTrigger(ParentModelMixin, BaseModel):
                 WARNING_MESSAGE_BY_TRIGGER_TYPE[self.type].format(**self.get_format_data()),
             )
 
-    def _is_triggered(self) -> bool:
+    def _is_triggered(self, context: 'TriggersProcessingContext' = None) -> bool:
         # noinspection PyProtectedMember
-        return self.concrete_instance._is_triggered()
+        return self.concrete_instance._is_triggered(context)
 
     def _save_action_log(self):
         from apps.notifications.models.notification_logs import NotificationEventLog
@@ -175,24 +204,14 @@ class NotificationTrigger(ParentModelMixin, BaseModel):
             event_time=self.last_action_time
         )
 
-    def _get_active_period_query_filter(self, sa: Any) -> Iterator[Any]:
-        if self.active_time_range_start:
-            yield or_(
-                func.date_part('hour', sa.time) > self.active_time_range_start.hour,
-                and_(
-                    func.date_part('hour', sa.time) == self.active_time_range_start.hour,
-                    func.date_part('minute', sa.time) >= self.active_time_range_start.minute
-                )
-            )
+    def _is_in_active_period(self, a_time: datetime) -> bool:
+        hour_and_minute = (a_time.astimezone(timezone.utc).hour, a_time.astimezone(timezone.utc).minute)
 
-        if self.active_time_range_end:
-            yield or_(
-                func.date_part('hour', sa.time) < self.active_time_range_end.hour,
-                and_(
-                    func.date_part('hour', sa.time) == self.active_time_range_end.hour,
-                    func.date_part('minute', sa.time) < self.active_time_range_end.minute
-                )
-            )
+        return \
+            (self.active_time_range_start is None or
+             hour_and_minute >= (self.active_time_range_start.hour, self.active_time_range_start.minute)) and \
+            (self.active_time_range_end is None or
+             hour_and_minute < (self.active_time_range_end.hour, self.active_time_range_end.minute))
 
 
 class DailyUsageTrigger(NotificationTrigger):
@@ -210,9 +229,10 @@ class DailyUsageTrigger(NotificationTrigger):
             value=self.threshold_in_percents
         )
 
-    def _is_triggered(self) -> bool:
-        average_usage = self._get_average_usage_until_this_time()
-        today_usage = self._get_today_usage()
+    def _is_triggered(self, context: 'TriggersProcessingContext' = None) -> bool:
+        context = context or TriggersProcessingContext([self])
+        average_usage = self._get_average_usage_until_this_time(context)
+        today_usage = self._get_today_usage(context)
 
         is_triggered = \
             average_usage and today_usage and \
@@ -223,66 +243,80 @@ class DailyUsageTrigger(NotificationTrigger):
 
         return is_triggered
 
-    def _get_today_usage(self) -> Optional[float]:
-        start_of_the_day = datetime.now(tz=timezone.utc).replace(hour=0, minute=0, microsecond=0)
-        try:
-            return aggregate_to_one(
-                resources=self.source_resources,
-                unit=Unit.WATT_HOUR,
-                from_=start_of_the_day
-            ).value
-        except NoResultFound:
-            return None
+    def _get_today_usage(self, context: 'TriggersProcessingContext' = None) -> Optional[float]:
+        context = context or TriggersProcessingContext([self])
+        source_resources = context.get_source_resources(self)
+        start_of_the_day = datetime.now(tz=timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+
+        def get_today_usage():
+            try:
+                return aggregate_to_one(
+                    resources=source_resources,
+                    unit=Unit.WATT_HOUR,
+                    from_=start_of_the_day
+                ).value
+            except NoResultFound:
+                return None
+
+        return context.get_or_calculate(
+            ('today_usage', context.get_resources_key(source_resources), start_of_the_day),
+            get_today_usage
+        )
 
-    def _get_average_usage_until_this_time(self):
-        days = self.get_days_for_comparison()
+    def _get_average_usage_until_this_time(self, context: 'TriggersProcessingContext' = None):
+        context = context or TriggersProcessingContext([self])
+        days = self.get_days_for_comparison(context)
         now = datetime.now(tz=timezone.utc)
 
         if len(days) < DAILY_USAGE_RELATED_TO_DAYS:
             return None
 
-        aggregation_rules = AggregationParamsManager().get_aggregation_rules(
-            resources=self.source_resources,
-            unit=Unit.WATT_HOUR,
-        )
-        sa = aggregation_rules.model.sa
+        source_resources = context.get_source_resources(self)
 
-        try:
-            aggregate_by_time_query = get_aggregate_by_time_query(
-                aggregation_rules=aggregation_rules
-            ).filter(
-                func.date(sa.time).in_(days),
-                or_(
-                    func.date_part('hour', sa.time) < now.hour,
-                    and_(
-                        func.date_part('hour', sa.time) == now.hour,
-                        func.date_part('minute', sa.time) < now.minute
+        def get_average_usage():
+            aggregation_rules = AggregationParamsManager().get_aggregation_rules(
+                resources=source_resources,
+                unit=Unit.WATT_HOUR,
+            )
+            sa = aggregation_rules.model.sa
+
+            try:
+                aggregate_by_time_query = get_aggregate_by_time_query(
+                    aggregation_rules=aggregation_rules
+                ).filter(
+                    func.date(sa.time).in_(days),
+                    or_(
+                        func.date_part('hour', sa.time) < now.hour,
+                        and_(
+                            func.date_part('hour', sa.time) == now.hour,
+                            func.date_part('minute', sa.time) < now.minute
+                        )
                     )
                 )
-            )
 
-            query = get_aggregate_to_list_query(
-                aggregate_by_time_query=aggregate_by_time_query,
-                aggregation_rules=aggregation_rules
-            )
-            daily_usage: TimeValuePair = query.one()
+                query = get_aggregate_to_list_query(
+                    aggregate_by_time_query=aggregate_by_time_query,
+                    aggregation_rules=aggregation_rules
+                )
+                daily_usage: TimeValuePair = query.one()
 
-            return daily_usage.value / DAILY_USAGE_RELATED_TO_DAYS
+                return daily_usage.value / DAILY_USAGE_RELATED_TO_DAYS
 
-        except NoResultFound:
-            return None
+            except NoResultFound:
+                return None
 
-    def get_days_for_comparison(self):
+        return context.get_or_calculate(
+            ('average_usage', context.get_resources_key(source_resources), tuple(days), now.hour, now.minute),
+            get_average_usage
+        )
+
+    def get_days_for_comparison(self, context: 'TriggersProcessingContext' = None):
         """Get list of days that will be used in filter"""
 
         today = datetime.now(tz=timezone.utc).date()
 
-        # Select all learning days(queries did not executed)
-        learning_days = LearningDay.objects \
-            .filter(location=self.location, date__lt=today) \
-            .order_by('-date') \
-            .values_list('date', flat=True) \
-            .all()
+        # Learning days before today ordered from the latest, they are selected once for all processed triggers
+        learning_days = (context or TriggersProcessingContext([self])).get_past_learning_days(self.location_id, today)
 
         # Handle different types of active_days followed enum types
 
@@ -339,121 +373,268 @@ class ValueLevelTrigger(NotificationTrigger):
             value=value
         )
 
-    def _is_triggered(self):
-        is_today_school_day = bool(LearningDay.objects.filter(location=self.location, date=date.today()).count())
-        if (self.active_days == ActiveDays.NON_SCHOOL_DAYS and is_today_school_day) or \
-                (self.active_days == ActiveDays.SCHOOL_DAYS and not is_today_school_day):
-            return False
+    def _is_triggered(self, context: 'TriggersProcessingContext' = None):
+        context = context or TriggersProcessingContext([self])
 
-        if not self.is_in_active_time_range():
+        if not self.is_active_now(context):
             return False
 
-        trigger = self._get_trigger_row()
-
-        if trigger:
+        if self._has_event(context.get_history_values(self)):
             self._save_action_log()
             return True
 
         return False
 
+    def is_active_now(self, context: 'TriggersProcessingContext') -> bool:
+        is_today_school_day = context.is_school_day(self.location_id, date.today())
+        if (self.active_days == ActiveDays.NON_SCHOOL_DAYS and is_today_school_day) or \
+                (self.active_days == ActiveDays.SCHOOL_DAYS and not is_today_school_day):
+            return False
+
+        return self.is_in_active_time_range()
+
     def is_in_active_time_range(self):
         now = datetime.now(tz=timezone.utc).time()
         return \
             (self.active_time_range_start is None or self.active_time_range_start <= now) and \
             (self.active_time_range_end is None or self.active_time_range_end >= now)
 
-    def _get_trigger_row(self):
-        mark_edges_query = self._get_mark_edges_query(
-            DetailedHistoricalData.sa,
-            self._data_query_start_time,
-            self._data_query_end_time
-        )
-        event_duration_query = self._get_event_duration_query(mark_edges_query)
-        get_trigger_query = self._get_trigger_query(event_duration_query)
-        trigger = get_trigger_query.first()
-        return trigger
+    def filter_history_values(self, values: Iterable[Tuple[datetime, float]]) -> List[Tuple[datetime, float]]:
+        start_time = self._data_query_start_time
+        end_time = self._data_query_end_time
+
+        return [
+            (a_time, value)
+            for a_time, value in values
+            if a_time >= start_time and
+               (end_time is None or a_time < end_time) and
+               self._is_in_active_period(a_time)
+        ]
+
+    def _has_event(self, values: List[Tuple[datetime, float]]) -> bool:
+        """
+        Check if there is a range of fit values not shorter than min_duration. The range duration is the time between
+        its first and last values, a single fit value is a range with zero duration.
+        """
+        is_fit = [self.condition.operator(value, self.argument) for _, value in values]
+        edges = [
+            (a_time, is_fit[index])
+            for index, (a_time, _) in enumerate(values)
+            if index in (0, len(values) - 1) or is_fit[index] != is_fit[index - 1] or is_fit[index] != is_fit[index + 1]
+        ]
+
+        for (edge_time, is_edge_fit), previous_edge in funcy.with_prev(edges):
+            if not is_edge_fit:
+                continue
+
+            if previous_edge and previous_edge[1]:
+                duration = edge_time - previous_edge[0]
+            else:
+                duration = timedelta(0)
+
+            if self.min_duration is None or duration >= self.min_duration:
+                return True
+
+        return False
 
     @property
     def _data_query_start_time(self):
+        # events of previous notification periods were notified already, leave one hour bound for background jobs:
+        start_time = self.max_notification_frequency.get_current_period_start() - timedelta(hours=1)
+
         if self.active_time_range_start:
             return max(
-                # leave one hour bound for background jobs:
-                self.max_notification_frequency.get_current_period_start() - timedelta(hours=1),
+                start_time,
                 datetime.combine(date=date.today(), time=self.active_time_range_start, tzinfo=timezone.utc)
             )
 
+        return start_time
+
     @property
     def _data_query_end_time(self):
         if self.active_time_range_end:
             return datetime.combine(date=date.today(), time=self.active_time_range_end, tzinfo=timezone.utc)
 
-    def _get_mark_edges_query(
-            self,
-            sa: Union[Any, 'AbstractHistoricalData'],
-            start_time: datetime = None,
-            end_time: datetime = None,
-    ) -> Query:
-        is_fit = funcy.rpartial(self.condition.operator, self.argument)
-        # noinspection PyUnresolvedReferences
-        mark_edges_query = sa.query(
-            sa.time,
-            is_fit(sa.value).label('is_fit'),
-            func.coalesce(
-                (is_fit(over(func.lead(sa.value), order_by=sa.time)) != is_fit(sa.value)) |
-                (is_fit(over(func.lag(sa.value), order_by=sa.time)) != is_fit(sa.value)),
-                True
-            ).label('is_on_edge')
-        ).filter(
-            sa.resource_id.in_([resource.id for resource in self.source_resources]),
-            *((sa.time >= start_time,) if start_time else ()),
-            *((sa.time < end_time,) if end_time else ()),
-            *self._get_active_period_query_filter(sa)
-        )
-        return mark_edges_query
+
+class TriggersProcessingContext:
+    """
+    Data shared by triggers processed together. Learning days are selected once per batch, source resources once per
+    source, detailed history is scanned once for all value level triggers and usages are aggregated once per set of
+    source resources, so processing cost depends on the count of distinct resources rather than on triggers count.
+    """
+
+    def __init__(self, triggers: Iterable[NotificationTrigger]):
+        self.triggers = list(triggers)
+        self._calculated_values: Dict[Hashable, Any] = {}
+
+    def get_or_calculate(self, key: Hashable, calculate: Callable[[], Any]) -> Any:
+        if key not in self._calculated_values:
+            self._calculated_values[key] = calculate()
+
+        return self._calculated_values[key]
 
     @staticmethod
-    def _get_event_duration_query(mark_edges_query: Query) -> Query:
-        time_field = Column(name='marked.time', type_=DateTime, quote=False).label('time')
-        is_current_row_fit_col = Column(name='marked.is_fit', type_=Boolean, quote=False)
-        is_on_edge_field = Column(name='marked.is_on_edge', type_=Boolean, quote=False)
-        is_prev_row_fit_col = over(func.lag(is_current_row_fit_col), order_by=time_field)
-        event_duration_query = get_session().query(
-            time_field,
-            case(
-                (
-                    (
-                        and_(is_current_row_fit_col, is_prev_row_fit_col),  # if there two edges of fit range
-                        time_field - over(func.lag(time_field), order_by=time_field)  # then calculate duration
-                    ),
-                    (
-                        is_current_row_fit_col,  # if there only one edge of fit range
-                        timedelta(0)  # then the duration is 0
-                    ),
-                ),
-                else_=None,
-            ).label('duration')
-        ).select_from(
-            mark_edges_query.subquery('marked')
-        ).filter(
-            is_on_edge_field
+    def get_resources_key(resources: Iterable[Resource]) -> Tuple[int, ...]:
+        return tuple(sorted(resource.id for resource in resources))
+
+    def get_source_resources(self, trigger: NotificationTrigger) -> List[Resource]:
+        return self.get_or_calculate(
+            ('source_resources', trigger.type, trigger.source_location_id, trigger.source_resource_id),
+            lambda: trigger.source_resources
         )
-        return event_duration_query
-
-    def _get_trigger_query(self, event_duration_query: Query) -> Query:
-        trigger_time_field = Column(name='durations.time', type_=DateTime, quote=False, key='time')
-        duration_field = Column(name='durations.duration', type_=Interval, quote=False)
-        get_trigger_query = get_session().query(
-            trigger_time_field,
-        ).select_from(
-            event_duration_query.subquery('durations')
-        ).filter(
-            *((duration_field.isnot(None),)
-              if self.min_duration is None else
-              (duration_field >= self.min_duration,))
-        ).order_by(
-            trigger_time_field.desc()
+
+    def is_school_day(self, location_id: int, day: date) -> bool:
+        school_days_location_ids: Set[int] = self.get_or_calculate(('school_days', day), lambda: set(
+            LearningDay.objects.filter(
+                location_id__in={trigger.location_id for trigger in self.triggers} | {location_id},
+                date=day,
+            ).values_list('location_id', flat=True)
+        ))
+        return location_id in school_days_location_ids
+
+    def get_past_learning_days(self, location_id: int, today: date) -> List[date]:
+        learning_days_by_location_id: Dict[int, List[date]] = self.get_or_calculate(
+            ('past_learning_days', today),
+            lambda: funcy.group_values(
+                LearningDay.objects.filter(
+                    location_id__in={trigger.location_id for trigger in self.triggers} | {location_id},
+                    date__lt=today,
+                ).order_by('location_id', '-date').values_list('location_id', 'date')
+            )
         )
-        return get_trigger_query
+        return learning_days_by_location_id.get(location_id, [])
+
+    def get_history_values(self, trigger: ValueLevelTrigger) -> List[Tuple[datetime, float]]:
+        """
+        Detailed history values of the trigger source resources in the trigger window ordered by time
+        """
+        history_by_resource_id = self.get_or_calculate('history', lambda: self._get_history_by_resource_id(trigger))
+        start_time = trigger._data_query_start_time
+
+        return trigger.filter_history_values(heapq.merge(*(
+            history[bisect_left(history, (start_time,)):]
+            for history in (
+                history_by_resource_id.get(resource.id, ())
+                for resource in self.get_source_resources(trigger)
+            )
+        )))
+
+    def _get_history_by_resource_id(self, trigger: ValueLevelTrigger) -> Dict[int, List[Tuple[datetime, float]]]:
+        value_level_triggers = {
+            other_trigger.id: other_trigger if isinstance(other_trigger, ValueLevelTrigger) else other_trigger.value_level
+            for other_trigger in self.triggers
+            if NotificationTrigger.CHILD_MODELS_FIELDS_MAP.get(other_trigger.type) == 'value_level'
+        }
+        value_level_triggers[trigger.id] = trigger
+        value_level_triggers = [
+            value_level_trigger
+            for value_level_trigger in value_level_triggers.values()
+            if value_level_trigger is trigger or value_level_trigger.is_active_now(self)
+        ]
+        resource_ids = {
+            resource.id
+            for value_level_trigger in value_level_triggers
+            for resource in self.get_source_resources(value_level_trigger)
+        }
+        start_times = [value_level_trigger._data_query_start_time for value_level_trigger in value_level_triggers]
+        end_times = [value_level_trigger._data_query_end_time for value_level_trigger in value_level_triggers]
+
+        queryset = DetailedHistoricalData.objects.filter(resource_id__in=resource_ids, time__gte=min(start_times))
+        if all(end_times):
+            queryset = queryset.filter(time__lt=max(end_times))
+
+        return funcy.group_values(
+            (resource_id, (a_time, value))
+            for resource_id, a_time, value in queryset.order_by('time').values_list('resource_id', 'time', 'value')
+        )
+
+
+class AbnormalValueRule(NamedTuple):
+    trigger_id: int
+    abnormal_min_value: float
+    abnormal_max_value: float
+
+    def is_abnormal(self, value: float) -> bool:
+        return value <= self.abnormal_min_value or value >= self.abnormal_max_value
+
+
+class PendingAbnormalValueLog(NamedTuple):
+    trigger_id: int
+    resource_id: int
+    location_id: int
+    abnormal_value: float
+    event_time: datetime
+
+    def to_json(self) -> str:
+        return json.dumps([*self[:-1], self.event_time.timestamp()])
+
+    @classmethod
+    def from_json(cls, data: str) -> 'PendingAbnormalValueLog':
+        *fields, event_timestamp = json.loads(data)
+        return cls(*fields, datetime.fromtimestamp(event_timestamp, tz=timezone.utc))
+
+
+class AbnormalValueRulesTable:
+    """
+    Per process table of abnormal value bounds by meter type. All triggers are loaded by one query and reloaded after
+    the timeout or after a trigger is changed, meter types of resources are cached, so checking a value makes no queries.
+    """
+
+    def __init__(self, timeout: timedelta = ABNORMAL_VALUE_RULES_TIMEOUT):
+        self.timeout = timeout
+        self._rules: Optional[Dict[AbnormalValueTriggerType, AbnormalValueRule]] = None
+        self._expires_at = 0
+        self._lock = threading.Lock()
+        self._meter_types = LRUCache(METER_TYPES_CACHE_SIZE, timeout)
+
+    def get_rule(self, resource: Resource) -> Optional[AbnormalValueRule]:
+        if resource.child_type not in (ResourceChildType.ENERGY_METER, ResourceChildType.SMART_THINGS_ENERGY_METER):
+            return None
+
+        meter_type = self._get_meter_type(resource)
+        if not meter_type:
+            return None
+
+        trigger_type = RESOURCE_TYPE_TO_ABNORMAL_VALUE_TRIGGER_TYPE__MAP[meter_type]
+        rule = self._get_rules().get(trigger_type)
+
+        if not rule:
+            logger.error(f'Abnormal value trigger for type {trigger_type} doesn\'t exist')
+
+        return rule
+
+    def invalidate(self):
+        with self._lock:
+            self._rules = None
+
+    def _get_rules(self) -> Dict[AbnormalValueTriggerType, AbnormalValueRule]:
+        with self._lock:
+            if self._rules is None or self._expires_at <= time.monotonic():
+                self._rules = {
+                    trigger.type: AbnormalValueRule(trigger.id, trigger.abnormal_min_value, trigger.abnormal_max_value)
+                    for trigger in AbnormalValueTrigger.objects.all()
+                }
+                self._expires_at = time.monotonic() + self.timeout.total_seconds()
+
+            return self._rules
+
+    def _get_meter_type(self, resource: Resource) -> Optional[MeterType]:
+        meter_type = getattr(resource, 'type', None)  # the resource is a meter already
+        if isinstance(meter_type, MeterType):
+            return meter_type
+
+        meter_type = self._meter_types.get(resource.id)
+        if meter_type is None:
+            meter = getattr(resource, 'energy_meter', None) or getattr(resource, 'smart_things_energy_meter', None)
+            meter_type = meter.type if meter else None
+
+            if meter_type:
+                self._meter_types.set(resource.id, meter_type)
+
+        return meter_type
+
+
+abnormal_value_rules = AbnormalValueRulesTable()
 
 
 class AbnormalValueTrigger(BaseModel):
@@ -468,57 +649,63 @@ class AbnormalValueTrigger(BaseModel):
     abnormal_min_value = models.FloatField(null=False, blank=False)
 
     @staticmethod
-    def get_trigger_for_resource(resource: Resource) -> 'Optional[AbnormalValueTrigger]':
-        if resource.child_type in (ResourceChildType.ENERGY_METER,
-                                   ResourceChildType.SMART_THINGS_ENERGY_METER):
-            try:
-                meter = getattr(resource, 'energy_meter', None) or \
-                    getattr(resource, 'smart_things_energy_meter', None)
-                
-                if not meter:
-                    return
-
-                trigger_type = RESOURCE_TYPE_TO_ABNORMAL_VALUE_TRIGGER_TYPE__MAP[meter.type]
-
-                trigger = AbnormalValueTrigger.objects.get(type=trigger_type)
-                return trigger
-
-            except AbnormalValueTrigger.DoesNotExist:
-                logger.error(f'Abnormal value trigger for type {trigger_type} doesn\'t exist')
-
-            except Exception as err:
-                logger.error(
-                    f'Error appeared while getting trigger for resource. Error: {str(err)}')
-
-        return
-
-    def check_value(self, resource: Resource, resource_value: ResourceValue):
+    def check_values(resource: Resource, resource_values: Sequence[ResourceValue]) -> List[PendingAbnormalValueLog]:
+        """
+        Check values by the in-memory rules table, logs for abnormal values are returned to be saved by
+        save_logs_on_commit
+        """
         # Code wrapping with try-except blocks is really necessary because adding resource value to database
         # is one of the main feature and creating notification logs is just additional bonus for portal users
         try:
-            value = resource_value.value
-
-            if value <= self.abnormal_min_value or value >= self.abnormal_max_value:
-                self.create_notification_log(value, resource)
+            rule = abnormal_value_rules.get_rule(resource)
+            if not rule:
+                return []
+
+            return [
+                PendingAbnormalValueLog(
+                    trigger_id=rule.trigger_id,
+                    resource_id=resource.id,
+                    location_id=resource.sub_location_id,
+                    abnormal_value=resource_value.value,
+                    event_time=datetime.now(timezone.utc),
+                )
+                for resource_value in resource_values
+                if rule.is_abnormal(resource_value.value)
+            ]
 
         except Exception as err:
-            logger.error(
-                f'Error appeared while triggering abnormal value. Error: {str(err)}')
+            logger.error(f'Error appeared while triggering abnormal value. Error: {str(err)}')
+            return []
+
+    @staticmethod
+    def save_logs_on_commit(pending_logs: Iterable[PendingAbnormalValueLog]):
+        """
+        Logs are saved by a background task after the commit, so the ingestion doesn't wait for them
+        and rolled back values don't produce notifications
+        """
+        from apps.notifications.tasks import save_abnormal_value_logs
+
+        pending_logs = [pending_log.to_json() for pending_log in pending_logs]
+        if pending_logs:
+            transaction.on_commit(lambda: save_abnormal_value_logs.delay(pending_logs))
 
-    def create_notification_log(self, abnormal_value: float, resource: Resource):
+    @staticmethod
+    def save_logs(pending_logs: Iterable[PendingAbnormalValueLog]):
         from apps.notifications.models.notification_logs import UserNotificationEventLog
-        from apps.notifications.serializers.notification_trigger import TriggerDataSerializer
 
-        serializer = TriggerDataSerializer(data=dict(
-            trigger_id=self.id,
-            resource_id=resource.id,
-            abnormal_value=abnormal_value,
-        ))
-        serializer.is_valid(True)
+        for pending_log in pending_logs:
+            try:
+                # bulk_create doesn't support multi-table inheritance of UserNotificationEventLog
+                with transaction.atomic():  # a failed insert mustn't break the outer transaction
+                    UserNotificationEventLog.objects.create(
+                        event_time=pending_log.event_time,
+                        location_id=pending_log.location_id,
+                        trigger_data=dict(
+                            trigger_id=pending_log.trigger_id,
+                            resource_id=pending_log.resource_id,
+                            abnormal_value=pending_log.abnormal_value,
+                        ),
+                    )
 
-        notification_log = UserNotificationEventLog.objects.create(
-            event_time=datetime.now(timezone.utc),
-            location=resource.sub_location,
-            trigger_data=serializer.data
-        )
-        return notification_log
+            except Exception as err:
+                logger.error(f'Abnormal value notification log is not saved. Error: {str(err)}')
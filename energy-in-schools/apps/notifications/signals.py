@@ -0,0 +1,9 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.notifications.models.notification_triggers import AbnormalValueTrigger, abnormal_value_rules
+
+
+@receiver((post_save, post_delete), sender=AbnormalValueTrigger, dispatch_uid='invalidate_abnormal_value_rules')
+def invalidate_abnormal_value_rules(**__):
+    abnormal_value_rules.invalidate()
@@ -1,15 +1,34 @@
-from apps.notifications.models.notification_triggers import NotificationTrigger
+from typing import List
+
+import funcy
+
+from apps.notifications.models.notification_triggers import AbnormalValueTrigger, NotificationTrigger, \
+    PendingAbnormalValueLog
 from apps.notifications.models.notification_logs import UserNotificationEventLog
 from apps.notifications.daily_report import SchoolsStatusDailyReport
 from samsung_school import celery_app
 from utilities.sqlalchemy_helpers import close_sa_session
 
 
+TRIGGERS_PER_TASK = 200
+
+
 @celery_app.task(ignore_result=True)
 @close_sa_session
 def process_all_triggers_task():
-    for notification_trigger in NotificationTrigger.objects.all():
-        process_trigger.delay(notification_trigger.id)
+    # triggers with the same source go to the same batch for sharing history and aggregations
+    trigger_ids = NotificationTrigger.objects.filter(is_active=True).order_by(
+        'source_location_id', 'source_resource_id', 'type', 'id'
+    ).values_list('id', flat=True)
+
+    for trigger_ids_chunk in funcy.chunks(TRIGGERS_PER_TASK, trigger_ids):
+        process_triggers.delay(trigger_ids_chunk)
+
+
+@celery_app.task(ignore_result=True)
+@close_sa_session
+def process_triggers(trigger_ids: List[int]):
+    NotificationTrigger.process_triggers(NotificationTrigger.objects.filter(id__in=trigger_ids))
 
 
 @celery_app.task(ignore_result=True)
@@ -18,6 +37,12 @@ def process_trigger(trigger_id: int):
     NotificationTrigger.objects.get(id=trigger_id).process_trigger()
 
 
+@celery_app.task(ignore_result=True)
+@close_sa_session
+def save_abnormal_value_logs(pending_logs: List[str]):
+    AbnormalValueTrigger.save_logs(map(PendingAbnormalValueLog.from_json, pending_logs))
+
+
 @celery_app.task(ignore_result=True)
 @close_sa_session
 def resolve_expired_abnormal_value_notifications():
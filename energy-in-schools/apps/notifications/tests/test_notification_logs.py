@@ -7,8 +7,10 @@ from unittest.mock import patch
 from apps.accounts.permissions import RoleName
 from apps.notifications.base_test_case import NotificationBaseTestCase
 from apps.notifications.models.notification_logs import NotificationEventLog, UserNotificationEventLog
-from apps.notifications.models.notification_triggers import AbnormalValueTrigger
+from apps.notifications.models.notification_triggers import AbnormalValueTrigger, PendingAbnormalValueLog, \
+    abnormal_value_rules
 from apps.notifications.serializers.notification_trigger import NotificationTriggerSerializer
+from apps.notifications.tasks import save_abnormal_value_logs
 from apps.notifications.types import (
     NotificationStatus, NotificationsType,
     AbnormalValueTriggerType, TRIGGER_DATA_RESPONSE_MESSAGE
@@ -46,6 +48,8 @@ class TestNotificationLogs(NotificationBaseTestCase):
         self.assertEqual(0, len(logs))
 
 
+# on_commit callbacks are not called inside of test case transactions
+@patch.object(AbnormalValueTrigger, 'save_logs_on_commit', AbnormalValueTrigger.save_logs)
 class TestAbnormalValueNotificationEventLog(EnergyProviderBaseTestCase,
                                             SmartThingsSensorsBaseTestCase):
     URL = '/api/v1/notifications/abnormal-usage/'
@@ -82,6 +86,51 @@ class TestAbnormalValueNotificationEventLog(EnergyProviderBaseTestCase,
 
             self._check_notification_data(notifications_created)
 
+    def test_abnormal_value_rules_refresh(self):
+        self.addCleanup(abnormal_value_rules.invalidate)  # the rolled back change is not signaled
+        trigger = AbnormalValueTrigger.objects.get(type=AbnormalValueTriggerType.ELECTRICITY)
+        value = ResourceValue(time=datetime.now(timezone.utc), value=trigger.abnormal_max_value - 1)
+
+        self.energy_meter_electricity.add_value(value)
+        self.assertEqual(0, UserNotificationEventLog.objects.count())
+
+        trigger.abnormal_max_value = value.value - 1
+        trigger.save()
+        self.energy_meter_electricity.add_value(value._replace(time=value.time + timedelta(minutes=1)))
+
+        self.assertEqual(
+            [dict(trigger_id=trigger.id, resource_id=self.energy_meter_electricity.id, abnormal_value=value.value)],
+            list(UserNotificationEventLog.objects.values_list('trigger_data', flat=True))
+        )
+
+    def test_duplicated_value(self):
+        value = self._get_abnormal_value(self.energy_meter_electricity)
+
+        self.energy_meter_electricity.add_value(value)
+        self.energy_meter_electricity.add_value(value)
+        self.energy_meter_electricity.add_values([value])
+
+        self.assertEqual(1, UserNotificationEventLog.objects.count())
+
+    def test_save_logs_task(self):
+        trigger = AbnormalValueTrigger.objects.get(type=AbnormalValueTriggerType.ELECTRICITY)
+        pending_log = PendingAbnormalValueLog(
+            trigger_id=trigger.id,
+            resource_id=self.energy_meter_electricity.id,
+            location_id=self.energy_meter_electricity.sub_location_id,
+            abnormal_value=trigger.abnormal_max_value + 1,
+            event_time=datetime(2000, 10, 10, 10, 10, tzinfo=timezone.utc),
+        )
+
+        save_abnormal_value_logs([pending_log.to_json()])
+
+        log = UserNotificationEventLog.objects.get()
+        self.assertEqual(pending_log.event_time, log.event_time)
+        self.assertEqual(
+            dict(trigger_id=trigger.id, resource_id=pending_log.resource_id, abnormal_value=pending_log.abnormal_value),
+            log.trigger_data
+        )
+
     def test_update(self):
         notification = UserNotificationEventLog.objects.create(
             location=self.location,
@@ -162,8 +211,8 @@ class TestAbnormalValueNotificationEventLog(EnergyProviderBaseTestCase,
         return index + 1
 
     def _get_abnormal_value(self, resource: Resource):
-        trigger = AbnormalValueTrigger.get_trigger_for_resource(resource)
-        return ResourceValue(time=datetime.now(timezone.utc), value=trigger.abnormal_max_value + 0.5)
+        rule = abnormal_value_rules.get_rule(resource)
+        return ResourceValue(time=datetime.now(timezone.utc), value=rule.abnormal_max_value + 0.5)
 
     @patch('apps.notifications.views.AbnormalValueNotificationPagination.page_size', 2)
     def _check_notification_data(self, notifications_created):
@@ -124,6 +124,37 @@ class TestNotificationTriggers(NotificationBaseTestCase, EnergyHistoryBaseTestCa
 
                 self.assertEqual(triggered, trigger._is_triggered())
 
+    def test_process_triggers_by_batch(self):
+        now = datetime.now(tz=timezone.utc).replace(second=0, microsecond=0)
+        for index, value in enumerate((1, 1, 1, 5, 5, 1)):
+            DetailedHistoricalData.objects.create(
+                resource=self.energy_meter,
+                time=now - timedelta(minutes=index),
+                value=value
+            )
+
+        triggers = [
+            ValueLevelTrigger.objects.create(
+                location=self.location,
+                source_location=self.location,
+                condition=NotificationTrigger.Condition.GREATER,
+                type=NotificationTrigger.Type.ELECTRICITY_CONSUMPTION_LEVEL,
+                max_notification_frequency=NotificationTrigger.MaxNotifyFrequency.ONE_PER_HOUR,
+                argument=argument,
+                min_duration=timedelta(minutes=1),
+            )
+            for argument in (0.5, 2, 10)
+        ]
+
+        NotificationTrigger.process_triggers(NotificationTrigger.objects.filter(id__in=[
+            trigger.id for trigger in triggers
+        ]))
+
+        self.assertEqual(
+            [True, True, False],
+            [NotificationTrigger.objects.get(id=trigger.id).last_action_time is not None for trigger in triggers]
+        )
+
     @patch('apps.notifications.models.notification_triggers.datetime', new=datetime_mock)
     def test__get_average_usage_until_this_time(self):
         trigger, today = self._init_daily_trigger_values()
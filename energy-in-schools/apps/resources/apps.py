@@ -11,6 +11,7 @@ class ResourcesConfig(AppConfig):
         from apps.resources.tasks import \
             select_resources_for_collecting_new_values, \
             select_resources_for_saving_values_to_long_term_history, \
+            select_resources_for_refreshing_history_rollups, \
             detailed_energy_history_remove_old_rows
 
         celery_app.add_periodic_task(
@@ -21,7 +22,15 @@ class ResourcesConfig(AppConfig):
             crontab(minute='6,36'),  # after received new data with 5 minutes time resolution
             select_resources_for_saving_values_to_long_term_history.s(),
         )
+        celery_app.add_periodic_task(
+            crontab(),  # new values of resources without detailed history are rolled up once per minute
+            select_resources_for_refreshing_history_rollups.s(),
+        )
         celery_app.add_periodic_task(
             crontab(hour=1),
             detailed_energy_history_remove_old_rows.s(),
         )
+
+        # activate listeners:
+        # noinspection PyUnresolvedReferences
+        import apps.resources.signals
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0012_resource_deleted_by_cascade'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resource',
+            name='history_rollups_ready',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0013_resource_history_rollups_ready'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resource',
+            name='history_rollups_dirty_since',
+            field=models.DateTimeField(default=None, null=True),
+        ),
+    ]
@@ -1,20 +1,26 @@
+import bisect
+from collections import defaultdict
 from datetime import datetime, timedelta, timezone
-from typing import Any, Iterable, Optional, Sequence, TYPE_CHECKING, Tuple, Union, Collection
+from typing import Any, Collection, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, TYPE_CHECKING, \
+    Tuple, Union
 
 import django.db
-import funcy
 from django.apps import apps
 from django.contrib.postgres.fields import ArrayField
 from django.db import models
-from django.db.models import Q, QuerySet
+from django.db.models import Case, DateTimeField, DurationField, Exists, ExpressionWrapper, F, FloatField, Func, \
+    OuterRef, Q, QuerySet, Value, When
+from django.db.models.functions import Least
+from django.db.models.signals import post_save
 from django.db.transaction import atomic
 from enumfields import EnumField
 from safedelete.managers import SafeDeleteAllManager, SafeDeleteDeletedManager, SafeDeleteManager
 
 from apps.energy_providers.models import Provider
 from apps.energy_providers.providers.abstract import MeterType
-from apps.historical_data.constants import DETAILED_HISTORY_LIVE_TIME, MAX_MISSED_PERIODS_FOR_INTERPOLATION, \
-    MAX_PERIODS_FOR_INTERPOLATION
+from apps.historical_data.constants import DETAILED_HISTORY_LIVE_TIME, HISTORY_BULK_CREATE_BATCH_SIZE, \
+    MAX_MISSED_PERIODS_FOR_INTERPOLATION, MAX_PERIODS_FOR_INTERPOLATION
+from apps.historical_data.utils.long_term_rollup import calculate_period_averages
 from apps.locations.models import Location
 from apps.locations.querysets import AbstractInLocationQuerySet, InSubLocationSafeDeleteQuerySet
 from apps.main.models import SafeDeleteBaseModel
@@ -23,7 +29,26 @@ from apps.resources.types import DataCollectionMethod, InterpolationType, Resour
 from utilities.interpolations import get_line_coefficients
 
 if TYPE_CHECKING:
-    from apps.historical_data.models import DetailedHistoricalData, AbstractHistoricalData
+    from apps.historical_data.models import AbstractHistoricalData
+
+
+def _get_duration_expression(time_resolution_field_name: str) -> Case:
+    return Case(
+        *(
+            When(**{time_resolution_field_name: time_resolution}, then=Value(time_resolution.duration))
+            for time_resolution in TimeResolution
+        ),
+        output_field=DurationField(),
+    )
+
+
+class _DiscretePeriodNumber(Func):
+    """
+    SQL version of round_timestamp_to_lower_discrete_period, but returns the number of the period instead of the time
+    """
+    template = 'FLOOR(EXTRACT(EPOCH FROM %(expressions)s))'
+    arg_joiner = ') / EXTRACT(EPOCH FROM '
+    output_field = FloatField()
 
 
 class Resource(SafeDeleteBaseModel):
@@ -60,6 +85,8 @@ class Resource(SafeDeleteBaseModel):
     last_detailed_data_add_time = models.DateTimeField(default=None, null=True)
     last_long_term_data_add_time = models.DateTimeField(default=None, null=True)
     last_value = models.FloatField(null=True)
+    history_rollups_ready = models.BooleanField(default=False)  # rollups are calculated for the whole long term history
+    history_rollups_dirty_since = models.DateTimeField(default=None, null=True)  # new values are not rolled up yet
 
     def delete(self, **kwargs):
         DetailedHistoricalData = apps.get_model('historical_data.DetailedHistoricalData')
@@ -69,6 +96,9 @@ class Resource(SafeDeleteBaseModel):
         DetailedHistoricalData.objects.filter(resource=self, time__lte=(today - timedelta(days=3))).delete()
         LongTermHistoricalData.objects.filter(resource=self, time__lte=(today - timedelta(days=180))).delete()
 
+        if self.history_rollups_ready:
+            self.refresh_history_rollups()
+
         super(Resource, self).delete(**kwargs)
 
     def save(self, **kwargs):
@@ -121,13 +151,6 @@ class Resource(SafeDeleteBaseModel):
             ResourceChildType.SMART_THINGS_ENERGY_METER.value
         )
 
-    @property
-    def abnormal_value_trigger(self):
-        from apps.notifications.models.notification_triggers import AbnormalValueTrigger
-
-        trigger = AbnormalValueTrigger.get_trigger_for_resource(self)
-        return trigger
-
     def get_latest_state(self) -> Optional[ResourceState]:
         latest_value = self.get_latest_value()
 
@@ -147,10 +170,7 @@ class Resource(SafeDeleteBaseModel):
         )
 
     def add_value(self, new_value: ResourceValue):
-        abnormal_value_trigger = self.abnormal_value_trigger
-
-        if abnormal_value_trigger:
-            abnormal_value_trigger.check_value(self, new_value)
+        from apps.notifications.models.notification_triggers import AbnormalValueTrigger
 
         new_value_timestamp = new_value.time.timestamp()
         target_time = datetime.fromtimestamp(
@@ -170,14 +190,147 @@ class Resource(SafeDeleteBaseModel):
             if prev_value:
                 new_latest_value = self._interpolate_prev_values(prev_value, new_value, target_time)
 
-        new_latest_value = self._interpolate_and_commit_new_value(
+        committed_value = self._interpolate_and_commit_new_value(
             prev_value,
             new_value,
             target_time
-        ) or new_latest_value
+        )
+        new_latest_value = committed_value or new_latest_value
 
         self._save_latest_value_to_resource(new_latest_value)
 
+        if new_latest_value and not self.detailed_time_resolution:
+            self.mark_history_rollups_dirty(from_=min(prev_value.time, target_time) if prev_value else target_time)
+
+        if committed_value:  # a value for the time might be added already
+            AbnormalValueTrigger.save_logs_on_commit(AbnormalValueTrigger.check_values(self, [new_value]))
+
+    def add_values(self, new_values: Sequence[ResourceValue]):
+        """
+        Batched version of add_value: the interpolation is made in memory and new rows are written by one bulk insert
+        """
+        self.add_values_for_resources({self: new_values})
+
+    @classmethod
+    @atomic
+    def add_values_for_resources(cls, values_by_resource: 'Mapping[Resource, Sequence[ResourceValue]]'):
+        from apps.notifications.models.notification_triggers import AbnormalValueTrigger
+
+        new_rows_by_model: 'Dict[Any, List[AbstractHistoricalData]]' = defaultdict(list)
+        latest_rows: 'Dict[Resource, AbstractHistoricalData]' = {}
+        earliest_times: 'Dict[Resource, datetime]' = {}
+        inserted_values: 'Dict[Resource, List[ResourceValue]]' = {}
+
+        for resource, new_values in values_by_resource.items():
+            new_rows = resource._get_new_live_data_rows(new_values)
+
+            if new_rows:
+                inserted_values[resource] = resource._get_inserted_values(new_values, new_rows)
+                new_rows_by_model[resource._live_data.model].extend(new_rows)
+                latest_rows[resource] = max(new_rows, key=lambda row: row.time)
+                earliest_times[resource] = min(row.time for row in new_rows)
+
+        for model, new_rows in new_rows_by_model.items():
+            model.objects.bulk_create(new_rows, batch_size=HISTORY_BULK_CREATE_BATCH_SIZE, ignore_conflicts=True)
+
+        for resource, latest_row in latest_rows.items():
+            resource._save_latest_value_to_resource(latest_row)
+
+            if not resource.detailed_time_resolution:
+                resource.mark_history_rollups_dirty(from_=earliest_times[resource])
+
+            # bulk_create doesn't send signals, but state subscribers are interested only in the newest row
+            post_save.send(sender=latest_row.__class__, instance=latest_row, created=True, raw=False,
+                           using=django.db.DEFAULT_DB_ALIAS, update_fields=None)
+
+        # abnormal values are checked by the in-memory rules and their logs are saved once per batch
+        AbnormalValueTrigger.save_logs_on_commit([
+            abnormal_value_log
+            for resource, new_values in inserted_values.items()
+            for abnormal_value_log in AbnormalValueTrigger.check_values(resource, new_values)
+        ])
+
+    def _get_inserted_values(
+            self,
+            new_values: Sequence[ResourceValue],
+            new_rows: 'Sequence[AbstractHistoricalData]'
+    ) -> List[ResourceValue]:
+        """
+        Values which rows are inserted, the first value of a period is taken like add_value does it
+        """
+        new_times = {row.time for row in new_rows}
+        inserted_values = []
+
+        for new_value in sorted(new_values, key=lambda item: item.time):
+            target_time = self.round_time_to_lower_discrete_period(new_value.time, self._live_time_resolution)
+
+            if target_time in new_times:
+                new_times.remove(target_time)
+                inserted_values.append(new_value)
+
+        return inserted_values
+
+    def _get_new_live_data_rows(self, new_values: Sequence[ResourceValue]) -> 'List[AbstractHistoricalData]':
+        """
+        Repeat add_value for every new value, but keep committed rows in memory instead of the database
+        """
+        if not new_values:
+            return []
+
+        new_values = sorted(new_values, key=lambda item: item.time)
+
+        use_interpolation = self._live_time_resolution is not TimeResolution.SECOND \
+            and self.interpolation_type != InterpolationType.DISABLED
+
+        known_values = self._get_known_live_values(new_values[0].time, new_values[-1].time, use_interpolation)
+        known_times = sorted(known_values)
+        new_rows = []
+
+        def commit(a_time: datetime, value: Optional[float]):
+            if value is None or a_time in known_values:
+                return  # value for the time is already in the database
+
+            known_values[a_time] = value
+            bisect.insort(known_times, a_time)
+            new_rows.append(self._live_data.model(resource=self, time=a_time, value=round(value, 6)))
+
+        for new_value in new_values:
+            target_time = datetime.fromtimestamp(
+                self.round_timestamp_to_lower_discrete_period(new_value.time.timestamp(), self._live_time_resolution),
+                tz=timezone.utc
+            )
+            prev_value = None
+
+            if use_interpolation:
+                prev_index = bisect.bisect_right(known_times, new_value.time)
+
+                if prev_index:
+                    prev_time = known_times[prev_index - 1]
+                    prev_value = ResourceValue(time=prev_time, value=known_values[prev_time])
+
+                    for missed_time in self._get_missed_periods_times(prev_value, target_time):
+                        commit(missed_time, self._interpolate_new_value(prev_value, new_value, missed_time))
+
+            commit(target_time, self._interpolate_new_value(prev_value, new_value, target_time))
+
+        return new_rows
+
+    def _get_known_live_values(self, from_: datetime, to: datetime, with_previous: bool) -> Dict[datetime, float]:
+        known_values = dict(
+            self._live_data
+                .filter(time__gte=self.round_time_to_lower_discrete_period(from_, self._live_time_resolution),
+                        time__lte=to)
+                .values_list('time', 'value')
+        )
+
+        if with_previous:
+            previous_value = self.get_latest_value(until_to=from_)
+
+            if previous_value:
+                known_values.setdefault(previous_value.time, previous_value.value)
+
+        return known_values
+
     def _interpolate_and_commit_new_value(
             self,
             latest_value: ResourceValue,
@@ -231,40 +384,61 @@ class Resource(SafeDeleteBaseModel):
             if period_start < previous_detailed_value.time:
                 previous_detailed_value = None
 
-        period_end = period_start + self.long_term_time_resolution.duration
-        integral_per_period = 0
-        value_exists = False
-        latest_time = None
-
-        for new_value, previous_new_value in funcy.with_prev(new_values_query.all(), previous_detailed_value):
-            if new_value.time < period_start:
-                continue
-
-            while new_value.time >= period_end:  # XXX TODO refactor
-                # unfinished sequence shouldn't be saved
-                if value_exists:
-                    if previous_new_value.time != period_end:
-                        integral_per_period += \
-                            self._get_integral_value(previous_new_value, new_value, period_start, period_end)
-
-                    self.long_term_historical_data.create(
-                        resource=self,
-                        time=period_start,
-                        value=integral_per_period / self.long_term_time_resolution.duration.total_seconds()
-                    )
-                    latest_time = period_start
-
-                value_exists = False
-                integral_per_period = 0
-                period_start = period_end
-                period_end += self.long_term_time_resolution.duration
-
-            integral_per_period += self._get_integral_value(previous_new_value, new_value, period_start, period_end)
-            value_exists = True
-
-        if latest_time:
-            self.last_long_term_data_add_time = latest_time
-            self.save()
+        new_long_term_values = calculate_period_averages(
+            values=(ResourceValue(*row) for row in new_values_query.values_list('time', 'value').iterator()),
+            previous_value=previous_detailed_value,
+            period_start=period_start,
+            period_duration=self.long_term_time_resolution.duration,
+            max_interpolation_range=self._max_long_term_interpolation_range,
+        )
+        new_rows = [
+            self.long_term_historical_data.model(resource=self, time=value.time, value=round(value.value, 6))
+            for value in new_long_term_values
+        ]
+
+        if new_rows:
+            self.long_term_historical_data.model.objects.bulk_create(
+                new_rows,
+                batch_size=HISTORY_BULK_CREATE_BATCH_SIZE
+            )
+
+            self.last_long_term_data_add_time = new_rows[-1].time
+            self.save(update_fields=['last_long_term_data_add_time'])
+            self.refresh_history_rollups(from_=new_rows[0].time)
+
+    def refresh_history_rollups(self, from_: datetime = None):
+        """
+        Recalculate rollups from the time, the whole long term history is rolled up at the first call
+        """
+        from apps.historical_data.utils.history_rollups import refresh_history_rollups
+
+        refresh_history_rollups([self.id], from_ if self.history_rollups_ready else None)
+
+        if not self.history_rollups_ready:
+            Resource.objects.filter(id=self.id).update(history_rollups_ready=True)
+            self.history_rollups_ready = True
+
+    def mark_history_rollups_dirty(self, from_: datetime):
+        """
+        Rollups are refreshed from the earliest marked time by the periodic task instead of every new value
+        """
+        Resource.objects.filter(id=self.id).update(
+            # NULL is ignored by LEAST in PostgreSQL
+            history_rollups_dirty_since=Least('history_rollups_dirty_since', Value(from_, DateTimeField()))
+        )
+
+    @classmethod
+    def refresh_dirty_history_rollups(cls, resource_ids: Iterable[int]):
+        for resource_id in resource_ids:
+            with atomic():  # new values of the locked resource wait for the refresh and mark it again
+                resource = cls.objects.select_for_update().filter(
+                    id=resource_id,
+                    history_rollups_dirty_since__isnull=False,
+                ).first()
+
+                if resource:
+                    resource.refresh_history_rollups(from_=resource.history_rollups_dirty_since)
+                    cls.objects.filter(id=resource_id).update(history_rollups_dirty_since=None)
 
     @atomic
     def add_missed_data(self, values: Sequence[ResourceValue]):
@@ -273,8 +447,7 @@ class Resource(SafeDeleteBaseModel):
 
         values = sorted(values, key=lambda item: item.time)
 
-        for value in values:
-            self.add_value(value)
+        self.add_values(values)
 
         self.save_data_to_long_term_history(
             time_range_start=self.round_time_to_lower_discrete_period(
@@ -298,51 +471,54 @@ class Resource(SafeDeleteBaseModel):
         )
 
     @classmethod
-    def get_resources_for_collecting_new_value(cls) -> 'Iterable[Resource]':
-        for resource in cls.objects.all():
-            if resource.preferred_data_collection_method != DataCollectionMethod.PULL:
-                continue
-
-            if resource.detailed_time_resolution:
-                time_resolution = resource.detailed_time_resolution
-                last_data_time = resource.last_detailed_data_add_time
-
-            else:
-                time_resolution = resource.long_term_time_resolution
-                last_data_time = resource.last_long_term_data_add_time
+    def get_resource_ids_for_collecting_new_value(cls) -> 'QuerySet':
+        live_time_resolution_duration = Case(
+            When(detailed_time_resolution__isnull=False, then=_get_duration_expression('detailed_time_resolution')),
+            default=_get_duration_expression('long_term_time_resolution'),
+            output_field=DurationField(),
+        )
+        last_live_data_add_time = Case(
+            When(detailed_time_resolution__isnull=False, then=F('last_detailed_data_add_time')),
+            default=F('last_long_term_data_add_time'),
+            output_field=DateTimeField(),
+        )
 
-            if not last_data_time or (datetime.now(tz=timezone.utc) - last_data_time) >= time_resolution.duration:
-                yield resource
+        return cls.objects.filter(
+            preferred_data_collection_method=DataCollectionMethod.PULL,
+        ).annotate(
+            last_live_data_add_time=last_live_data_add_time,
+            due_time=ExpressionWrapper(
+                Value(datetime.now(tz=timezone.utc), output_field=DateTimeField()) - live_time_resolution_duration,
+                output_field=DateTimeField(),
+            ),
+        ).filter(
+            Q(last_live_data_add_time__isnull=True) | Q(last_live_data_add_time__lte=F('due_time'))
+        ).values_list('id', flat=True)
 
     @classmethod
-    def get_resources_for_saving_values_for_long_term(cls) -> 'Iterable[Resource]':
-        for resource in cls.objects.all():
-            if not resource.detailed_time_resolution or \
-                    not resource.long_term_time_resolution or \
-                    not resource.last_detailed_data_add_time:
-                continue
-
-            if resource.child_type == ResourceChildType.ENERGY_METER and \
-                    not resource.energy_meter.is_half_hour_meter:
-                EnergyMeter = apps.get_model('energy_meters.EnergyMeter')
-                try:
-                    EnergyMeter.objects.get(live_values_meter=resource.id)
-                    continue
-                except EnergyMeter.DoesNotExist:
-                    pass
-
-            if not resource.last_long_term_data_add_time or (
-                    resource.round_time_to_lower_discrete_period(
-                        resource.last_long_term_data_add_time,
-                        resource.long_term_time_resolution,
-                    )
-                    <
-                    resource.round_time_to_lower_discrete_period(
-                        resource.last_detailed_data_add_time,
-                        resource.long_term_time_resolution,
-                    )
-            ):
-                yield resource
+    def get_resource_ids_for_saving_values_for_long_term(cls) -> 'QuerySet':
+        EnergyMeter = apps.get_model('energy_meters.EnergyMeter')
+        long_term_time_resolution_duration = _get_duration_expression('long_term_time_resolution')
+
+        return cls.objects.filter(
+            detailed_time_resolution__isnull=False,
+            long_term_time_resolution__isnull=False,
+            last_detailed_data_add_time__isnull=False,
+        ).annotate(
+            # live values of half hour meters are saved to the long term history of the half hour meter
+            is_live_values_meter=Exists(
+                EnergyMeter.objects
+                    .filter(live_values_meter=OuterRef('id'))
+                    .exclude(live_values_meter__is_half_hour_meter=True)
+            ),
+            last_long_term_period=_DiscretePeriodNumber('last_long_term_data_add_time',
+                                                        long_term_time_resolution_duration),
+            last_detailed_period=_DiscretePeriodNumber('last_detailed_data_add_time',
+                                                       long_term_time_resolution_duration),
+        ).filter(
+            Q(last_long_term_data_add_time__isnull=True) | Q(last_long_term_period__lt=F('last_detailed_period')),
+            is_live_values_meter=False,
+        ).values_list('id', flat=True)
 
     @property
     def _max_long_term_interpolation_range(self) -> timedelta:
@@ -373,43 +549,6 @@ class Resource(SafeDeleteBaseModel):
         else:
             self.last_long_term_data_add_time = value
 
-    def _get_integral_value(
-            self,
-            left: 'Optional[DetailedHistoricalData]',
-            right: 'DetailedHistoricalData',
-            period_start: datetime,
-            period_end: datetime
-    ) -> float:
-        if left and max(period_start - left.time,
-                        right.time - period_end) < self._max_long_term_interpolation_range:
-            if left.time < period_start or right.time > period_end:
-                # if one row is out of the period we should interpolate the point on the end of the period
-                # maximal interpolation range is equal to self._max_long_term_interpolation_range
-                a, b = get_line_coefficients(
-                    left.time.timestamp(),
-                    left.value,
-                    right.time.timestamp(),
-                    right.value
-                )
-                left_time = max(period_start, left.time)
-                left_value = a + b * left_time.timestamp()
-                right_time = min(period_end, right.time)
-                right_value = a + b * right_time.timestamp()
-
-            else:
-                left_time = left.time
-                left_value = left.value
-                right_time = right.time
-                right_value = right.value
-
-            return (left_value + right_value) / 2 * (right_time - left_time).total_seconds()
-
-        elif right.time <= period_end:
-            return right.value * (min(period_end, right.time) - period_start).total_seconds()
-
-        else:
-            return left.value * (period_end - left.time).total_seconds()
-
     def _interpolate_new_value(
             self,
             latest_value: Optional[ResourceValue],
@@ -456,22 +595,26 @@ class Resource(SafeDeleteBaseModel):
              ^              ^-value for period 3; *value for period 2 will be interpolated between this and period 1
              ^-value for period 1
         """
-        missed_periods = int((target_time - latest_value.time) / self._live_time_resolution.duration) - 1
-
-        if missed_periods > MAX_MISSED_PERIODS_FOR_INTERPOLATION:
-            return
-
         new_latest_value = None
 
-        for periods_offset in range(1, missed_periods + 1):
+        for missed_period_time in self._get_missed_periods_times(latest_value, target_time):
             new_latest_value = self._interpolate_and_commit_new_value(
                 latest_value,
                 new_value,
-                latest_value.time + periods_offset * self._live_time_resolution.duration
+                missed_period_time
             ) or new_latest_value
 
         return new_latest_value
 
+    def _get_missed_periods_times(self, latest_value: ResourceValue, target_time: datetime) -> Iterator[datetime]:
+        missed_periods = int((target_time - latest_value.time) / self._live_time_resolution.duration) - 1
+
+        if missed_periods > MAX_MISSED_PERIODS_FOR_INTERPOLATION:
+            return
+
+        for periods_offset in range(1, missed_periods + 1):
+            yield latest_value.time + periods_offset * self._live_time_resolution.duration
+
     def _save_latest_value_to_resource(self, new_latest_value: 'Optional[AbstractHistoricalData]'):
         if not new_latest_value:
             return
@@ -534,7 +677,11 @@ class Resource(SafeDeleteBaseModel):
 
     @staticmethod
     def get_location_energy_meters(location: Location, meter_type: MeterType = None, include_dummy=False):
-        queryset = Resource.objects.in_location(location=location).filter(
+        return Resource.filter_energy_meters(Resource.objects.in_location(location=location), meter_type, include_dummy)
+
+    @staticmethod
+    def filter_energy_meters(queryset: QuerySet, meter_type: MeterType = None, include_dummy=False):
+        queryset = queryset.filter(
             Q(child_type=ResourceChildType.ENERGY_METER) |
             Q(child_type=ResourceChildType.SMART_THINGS_ENERGY_METER)
         ).filter(
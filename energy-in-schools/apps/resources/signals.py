@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from safedelete.signals import post_softdelete
+
+from apps.resources.models import Resource
+from apps.resources.utils import invalidate_resource_child_type
+
+
+# child type of a resource is never changed, so only removed resources are invalidated
+# sender isn't specified because signals are sent by the concrete child models
+@receiver((post_delete, post_softdelete), dispatch_uid='invalidate_resource_child_type')
+def invalidate_resource_child_type_cache(instance, **__):
+    if isinstance(instance, Resource):
+        invalidate_resource_child_type(instance.id)
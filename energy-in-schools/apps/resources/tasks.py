@@ -1,21 +1,51 @@
+from typing import List
+
+import funcy
+from celery import group
+
+from apps.energy_meters.models import EnergyMeter
+from apps.energy_providers.providers.abstract import ProviderAuthError
 from apps.historical_data.models import DetailedHistoricalData
-from apps.resources.models import PullSupportedResource, Resource
+from apps.resources.models import Resource
+from apps.resources.utils import get_resource_child_model
 from apps.smart_things_apps.types import AuthCredentialsError
+from apps.weather.models import WeatherTemperatureHistory
 from samsung_school import celery_app
 from utilities.sqlalchemy_helpers import close_sa_session
 
 
-def get_resource_child_model(resource_id: int) -> PullSupportedResource:  # todo: add cache
-    resource: Resource = Resource.objects.get(id=resource_id)
-
-    return getattr(resource, resource.child_type.value)
+RESOURCES_PER_GROUP = 500
+ENERGY_METERS_PER_TASK = 50
+WEATHER_HISTORIES_PER_TASK = 500
+HISTORY_ROLLUPS_PER_TASK = 50
 
 
 @celery_app.task(ignore_result=True)
 @close_sa_session
 def select_resources_for_collecting_new_values():
-    for resource in Resource.get_resources_for_collecting_new_value():
-        fetch_new_values.delay(resource.id)
+    resource_ids = list(Resource.get_resource_ids_for_collecting_new_value())
+    energy_meter_ids_by_provider_account = funcy.group_values(
+        EnergyMeter.objects.filter(id__in=resource_ids).values_list('provider_account_id', 'id')
+    )
+    energy_meter_ids = set(funcy.cat(energy_meter_ids_by_provider_account.values()))
+    # ordered by coordinates, so histories of one weather grid cell mostly get to one task
+    weather_history_ids = list(WeatherTemperatureHistory.objects.filter(id__in=resource_ids).order_by(
+        'sub_location__address__latitude', 'sub_location__address__longitude'
+    ).values_list('id', flat=True))
+    batched_resource_ids = energy_meter_ids | set(weather_history_ids)
+
+    # meters of one provider account are fetched together for reusing the provider session
+    signatures = [
+        *(fetch_energy_meters_new_values.s(energy_meter_ids_chunk)
+          for energy_meter_ids_of_account in energy_meter_ids_by_provider_account.values()
+          for energy_meter_ids_chunk in funcy.chunks(ENERGY_METERS_PER_TASK, energy_meter_ids_of_account)),
+        *(fetch_weather_histories_new_values.s(weather_history_ids_chunk)
+          for weather_history_ids_chunk in funcy.chunks(WEATHER_HISTORIES_PER_TASK, weather_history_ids)),
+        *(fetch_new_values.s(resource_id) for resource_id in resource_ids if resource_id not in batched_resource_ids),
+    ]
+
+    for signatures_chunk in funcy.chunks(RESOURCES_PER_GROUP, signatures):
+        group(signatures_chunk).apply_async()
 
 
 @celery_app.task(ignore_result=True, autoretry_for=(AuthCredentialsError,), retry_kwargs={'max_retries': 3, 'countdown': 0.5})
@@ -24,6 +54,22 @@ def fetch_new_values(resource_id: int):
     get_resource_child_model(resource_id).collect_new_values()
 
 
+@celery_app.task(ignore_result=True, autoretry_for=(AuthCredentialsError, ProviderAuthError), retry_kwargs={'max_retries': 3, 'countdown': 0.5})
+@close_sa_session
+def fetch_energy_meters_new_values(energy_meter_ids: List[int]):
+    EnergyMeter.collect_new_values_for_meters(
+        EnergyMeter.objects.filter(id__in=energy_meter_ids).select_related('provider_account')
+    )
+
+
+@celery_app.task(ignore_result=True)
+@close_sa_session
+def fetch_weather_histories_new_values(weather_history_ids: List[int]):
+    WeatherTemperatureHistory.collect_new_values_for_histories(
+        WeatherTemperatureHistory.objects.filter(id__in=weather_history_ids).select_related('sub_location__address')
+    )
+
+
 @celery_app.task(ignore_result=True)
 @close_sa_session
 def detailed_energy_history_remove_old_rows():
@@ -33,11 +79,28 @@ def detailed_energy_history_remove_old_rows():
 @celery_app.task(ignore_result=True)
 @close_sa_session
 def select_resources_for_saving_values_to_long_term_history():
-    for resource in Resource.get_resources_for_saving_values_for_long_term():
-        save_values_to_long_term_history.delay(resource.id)
+    resource_ids = Resource.get_resource_ids_for_saving_values_for_long_term()
+
+    for resource_ids_chunk in funcy.chunks(RESOURCES_PER_GROUP, resource_ids):
+        group(save_values_to_long_term_history.s(resource_id) for resource_id in resource_ids_chunk).apply_async()
 
 
 @celery_app.task(ignore_result=True)
 @close_sa_session
 def save_values_to_long_term_history(resource_id: int):
     get_resource_child_model(resource_id).save_data_to_long_term_history()
+
+
+@celery_app.task(ignore_result=True)
+@close_sa_session
+def select_resources_for_refreshing_history_rollups():
+    resource_ids = Resource.objects.filter(history_rollups_dirty_since__isnull=False).values_list('id', flat=True)
+
+    for resource_ids_chunk in funcy.chunks(HISTORY_ROLLUPS_PER_TASK, resource_ids):
+        refresh_history_rollups.delay(resource_ids_chunk)
+
+
+@celery_app.task(ignore_result=True)
+@close_sa_session
+def refresh_history_rollups(resource_ids: List[int]):
+    Resource.refresh_dirty_history_rollups(resource_ids)
@@ -6,7 +6,9 @@ from unittest.mock import MagicMock, Mock, patch
 
 import factory
 import funcy
+from django.db import connection
 from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
 from faker import Factory
 
 from apps.accounts.permissions import RoleName
@@ -16,6 +18,8 @@ from apps.energy_providers.tests.base_test_case import EnergyProviderBaseTestCas
 from apps.historical_data.models import DetailedHistoricalData, LongTermHistoricalData
 from apps.hubs.base_test_case import HubBaseTestCase
 from apps.resources.models import Resource
+from apps.resources.tasks import fetch_energy_meters_new_values, select_resources_for_collecting_new_values
+from apps.resources.utils import get_resource_child_model, get_resource_child_models, resource_child_types_cache
 from apps.resources.types import ButtonState, ContactState, DataCollectionMethod, MotionState, ResourceValue, \
     TimeResolution, Unit
 from apps.smart_things_devices.types import Capability, DeviceStatus
@@ -188,7 +192,7 @@ class TestResourcesViewSet(HubBaseTestCase, SmartThingsSensorsBaseTestCase, Ener
 
         self.assertEqual(
             sorted([without_value_meter.id, old_value_meter.id, old_value_meter_long_term_only.id]),
-            sorted([resource.id for resource in Resource.get_resources_for_collecting_new_value()])
+            sorted(Resource.get_resource_ids_for_collecting_new_value())
         )
 
     def test_get_resources_for_saving_values(self):
@@ -219,12 +223,67 @@ class TestResourcesViewSet(HubBaseTestCase, SmartThingsSensorsBaseTestCase, Ener
                 'long_term_none__detailed_new',
                 'long_term_old__detailed_new',
             ]),
-            sorted([
-                resource.name
-                for resource in Resource.get_resources_for_saving_values_for_long_term()
-            ])
+            sorted(Resource.objects.filter(
+                id__in=Resource.get_resource_ids_for_saving_values_for_long_term()
+            ).values_list('name', flat=True))
+        )
+
+    def test_get_resources_for_saving_values_skips_live_values_meters(self):
+        half_hour_meter = self.create_energy_meter()
+        live_values_meter = self.create_energy_meter()
+        EnergyMeter.objects.filter(id=half_hour_meter.id).update(
+            is_half_hour_meter=True,
+            live_values_meter=live_values_meter,
+        )
+        Resource.objects.filter(id__in=(half_hour_meter.id, live_values_meter.id)).update(
+            last_detailed_data_add_time=datetime(2000, 10, 10, tzinfo=timezone.utc)
+        )
+
+        with self.assertNumQueries(1):
+            resource_ids = list(Resource.get_resource_ids_for_saving_values_for_long_term())
+
+        self.assertIn(half_hour_meter.id, resource_ids)
+        self.assertNotIn(live_values_meter.id, resource_ids)
+
+    @patch('apps.resources.tasks.group')
+    def test_select_resources_for_collecting_new_values(self, group_mock: MagicMock):
+        select_resources_for_collecting_new_values()
+
+        group_mock.assert_called_once()
+        self.assertEqual(
+            [(fetch_energy_meters_new_values.name, [self.energy_meter.id])],
+            [(signature.task, signature.args[0]) for signature in group_mock.call_args[0][0]]
         )
 
+    def test_get_resource_child_model(self):
+        resource_child_types_cache.clear()
+
+        for label in ('Not cached child type', 'Cached child type'):
+            with self.subTest(label), self.assertNumQueries(1):
+                child_model = get_resource_child_model(self.energy_meter.id)
+
+                self.assertIsInstance(child_model, EnergyMeter)
+                self.assertEqual(self.energy_meter.meter_id, child_model.meter_id)
+
+        with self.subTest('Removed resource'):
+            resource_id = self.energy_meter.id
+            self.energy_meter.delete()
+
+            with self.assertRaises(Resource.DoesNotExist):
+                get_resource_child_model(resource_id)
+
+    def test_get_resource_child_models(self):
+        st_energy_meter = self.create_smart_things_energy_meter()
+        resource_child_types_cache.clear()
+        get_resource_child_model(self.energy_meter.id)
+
+        with self.assertNumQueries(2):  # one for cached child types and one for not cached
+            child_models = get_resource_child_models([self.energy_meter.id, st_energy_meter.id, -1])
+
+        self.assertEqual({self.energy_meter.id, st_energy_meter.id}, set(child_models))
+        self.assertIsInstance(child_models[self.energy_meter.id], EnergyMeter)
+        self.assertIsInstance(child_models[st_energy_meter.id], SmartThingsEnergyMeter)
+
     @patch('apps.energy_meters.models.EnergyMeter.fetch_current_value', side_effect=[
         ResourceValue(time=datetime(2000, 10, 10, second=5, tzinfo=timezone.utc), value=10, unit=Unit.WATT),
         ResourceValue(time=datetime(2000, 10, 10, second=30, tzinfo=timezone.utc), value=40, unit=Unit.WATT),
@@ -307,6 +366,48 @@ class TestResourcesViewSet(HubBaseTestCase, SmartThingsSensorsBaseTestCase, Ener
             tuple(self.energy_meter.long_term_historical_data.order_by('time').values_list('value', flat=True))
         )
 
+    def test_add_values_is_equal_to_add_value(self):
+        values = [
+            self._get_resource_value(time_index, value)
+            for time_index, value in ((1, 1), (2, 20), (2, 25), (7, 70), (40, 400), (41, 410), (90, 900), (3, 30))
+        ]
+        sequential_meter = self.create_energy_meter()
+        batched_meter = self.create_energy_meter()
+
+        for value in values:
+            sequential_meter.add_value(value)
+
+        with CaptureQueriesContext(connection) as queries:
+            batched_meter.add_values(values)
+
+        self.assertLess(len(queries), len(values))
+
+        self.assertEqual(
+            list(sequential_meter.detailed_historical_data.order_by('time').values_list('time', 'value')),
+            list(batched_meter.detailed_historical_data.order_by('time').values_list('time', 'value')),
+        )
+
+        sequential_meter.refresh_from_db()
+        batched_meter.refresh_from_db()
+        self.assertEqual(sequential_meter.get_latest_value(), batched_meter.get_latest_value())
+
+    def test_add_values_for_resources(self):
+        another_meter = self.create_energy_meter()
+        self.energy_meter.add_value(self._get_resource_value(0, 10))
+
+        Resource.add_values_for_resources({
+            self.energy_meter: [self._get_resource_value(0, 11), self._get_resource_value(2, 30)],
+            another_meter: [self._get_resource_value(1, 42)],
+        })
+
+        self.assertEqual(
+            [10, 20, 30],
+            list(self.energy_meter.detailed_historical_data.order_by('time').values_list('value', flat=True))
+        )
+        self.assertEqual([42], list(another_meter.detailed_historical_data.values_list('value', flat=True)))
+        self.assertEqual(30, Resource.objects.get(id=self.energy_meter.id).last_value)
+        self.assertEqual(42, Resource.objects.get(id=another_meter.id).last_value)
+
     @patch('apps.resources.models.Resource.add_missed_data')
     def test_add_missed_values_view(self, add_missed_data_mock):
         self.client.force_login(self.admin)
@@ -470,7 +571,9 @@ class TestResourcesViewSet(HubBaseTestCase, SmartThingsSensorsBaseTestCase, Ener
         smart_things_energy_meter = self.create_smart_things_energy_meter()
 
         with self.subTest('Collecting new values'):
-            resources_for_collecting = list(Resource.get_resources_for_collecting_new_value())
+            resources_for_collecting = list(Resource.objects.filter(
+                id__in=Resource.get_resource_ids_for_collecting_new_value()
+            ))
             self.assertEqual(1, len(resources_for_collecting))  # self.energy_meter
             self.assertEqual(Resource.ChildType.ENERGY_METER, resources_for_collecting[0].child_type)
 
@@ -479,7 +582,9 @@ class TestResourcesViewSet(HubBaseTestCase, SmartThingsSensorsBaseTestCase, Ener
             smart_things_energy_meter.add_value(resource_value)
             self.energy_meter.add_value(resource_value)
 
-            resources_for_saving_to_long_term = list(Resource.get_resources_for_saving_values_for_long_term())
+            resources_for_saving_to_long_term = list(Resource.objects.filter(
+                id__in=Resource.get_resource_ids_for_saving_values_for_long_term()
+            ).order_by('child_type'))
 
             self.assertEqual(2, len(resources_for_saving_to_long_term))
             self.assertListEqual(
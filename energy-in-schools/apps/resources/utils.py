@@ -0,0 +1,67 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+from apps.resources.models import Resource
+from apps.resources.types import ResourceChildType
+from utilities.caching import LRUCache
+
+
+RESOURCE_CHILD_TYPES_CACHE_SIZE = 100_000
+
+resource_child_types_cache = LRUCache(max_size=RESOURCE_CHILD_TYPES_CACHE_SIZE)
+
+_CHILD_MODELS_RELATED_PATHS = [
+    ResourceChildType.ENERGY_METER.value,
+    f'{ResourceChildType.SMART_THINGS_SENSOR.value}__{ResourceChildType.SMART_THINGS_ENERGY_METER.value}',
+    ResourceChildType.MICROBIT_HISTORICAL_DATA_SET.value,
+    ResourceChildType.WEATHER_TEMPERATURE.value,
+]
+
+
+def get_resource_child_model(resource_id: int) -> Resource:
+    """
+    Load the concrete child of the resource by one query: by the child model if the child type is cached or by the
+    resource with all child models joined otherwise
+    """
+    child_type: ResourceChildType = resource_child_types_cache.get(resource_id)
+
+    if child_type:
+        return child_type.model.objects.get(id=resource_id)
+
+    resource = Resource.objects.select_related(*_CHILD_MODELS_RELATED_PATHS).get(id=resource_id)
+    resource_child_types_cache.set(resource.id, resource.child_type)
+
+    return getattr(resource, resource.child_type.value)
+
+
+def get_resource_child_models(resource_ids: Iterable[int]) -> Dict[int, Resource]:
+    """
+    Bulk version of get_resource_child_model, not existing resources are skipped
+    """
+    resource_ids_by_child_type: Dict[ResourceChildType, List[int]] = defaultdict(list)
+    not_cached_resource_ids = []
+
+    for resource_id in set(resource_ids):
+        child_type = resource_child_types_cache.get(resource_id)
+
+        if child_type:
+            resource_ids_by_child_type[child_type].append(resource_id)
+        else:
+            not_cached_resource_ids.append(resource_id)
+
+    child_models = {}
+
+    for child_type, child_type_resource_ids in resource_ids_by_child_type.items():
+        child_models.update(child_type.model.objects.in_bulk(child_type_resource_ids))
+
+    if not_cached_resource_ids:
+        for resource in Resource.objects.select_related(*_CHILD_MODELS_RELATED_PATHS) \
+                .filter(id__in=not_cached_resource_ids):
+            resource_child_types_cache.set(resource.id, resource.child_type)
+            child_models[resource.id] = getattr(resource, resource.child_type.value)
+
+    return child_models
+
+
+def invalidate_resource_child_type(resource_id: int):
+    resource_child_types_cache.delete(resource_id)
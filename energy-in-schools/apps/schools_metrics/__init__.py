@@ -0,0 +1 @@
+default_app_config = 'apps.schools_metrics.apps.SchoolsMetricsConfig'
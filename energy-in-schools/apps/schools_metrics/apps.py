@@ -1,5 +1,16 @@
+from celery.schedules import crontab
 from django.apps import AppConfig
 
 
 class SchoolsMetricsConfig(AppConfig):
-    name = 'schools_metrics'
+    name = 'apps.schools_metrics'
+
+    def ready(self):
+        from samsung_school import celery_app
+
+        from apps.schools_metrics.tasks import refresh_schools_metrics_snapshots
+
+        celery_app.add_periodic_task(
+            crontab(minute='*/30'),
+            refresh_schools_metrics_snapshots.s(),
+        )
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.28 on 2026-10-18 12:00
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.db.models.deletion
+import rest_framework.utils.encoders
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('locations', '0017_auto_20220412_1216'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchoolMetricsSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('data', django.contrib.postgres.fields.jsonb.JSONField(encoder=rest_framework.utils.encoders.JSONEncoder)),
+                ('location', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='metrics_snapshot', to='locations.Location')),
+            ],
+        ),
+    ]
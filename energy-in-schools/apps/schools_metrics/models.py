@@ -0,0 +1,22 @@
+from django.contrib.postgres.fields import JSONField
+from django.db import models
+from rest_framework.utils.encoders import JSONEncoder
+
+from apps.locations.models import Location
+from apps.main.models import BaseModel
+
+
+class SchoolMetricsSnapshot(BaseModel):
+    location = models.OneToOneField(Location, on_delete=models.CASCADE, related_name='metrics_snapshot')
+    data = JSONField(encoder=JSONEncoder)  # the representation of SchoolsMetricsDataSerializer
+
+    @classmethod
+    def refresh_for_location(cls, location: Location) -> 'SchoolMetricsSnapshot':
+        from apps.schools_metrics.serializers import SchoolsMetricsDataSerializer
+
+        snapshot, _ = cls.objects.update_or_create(
+            location=location,
+            defaults=dict(data=SchoolsMetricsDataSerializer(location).data),
+        )
+        return snapshot
+
@@ -4,6 +4,7 @@ from django.db.models import Q, Count, Case, When, Value
 from drf_yasg.utils import swagger_serializer_method
 from datetime import datetime, timedelta, timezone
 
+import pytz
 from enumfields.drf import EnumSupportSerializerMixin, EnumField
 from rest_framework import serializers
 from django.core.exceptions import ObjectDoesNotExist
@@ -270,7 +271,10 @@ class MUGDataSerialiser(serializers.Serializer):
                    for energy_meter_billing_info in energy_meters_billing_infos)
 
 
-class SchoolsMetricsSerializer(LocationSerializer):
+class SchoolsMetricsDataSerializer(serializers.Serializer):
+    """
+    Metrics that are expensive to calculate, they are stored in SchoolMetricsSnapshot
+    """
     smart_things_app_token = serializers.SerializerMethodField(read_only=True)
     tariffs = serializers.SerializerMethodField(read_only=True)
     consumption = serializers.SerializerMethodField(read_only=True)
@@ -278,17 +282,14 @@ class SchoolsMetricsSerializer(LocationSerializer):
     mug_data = serializers.SerializerMethodField(read_only=True)
     last_dashboard_ping = serializers.SerializerMethodField(read_only=True)
 
-    class Meta(LocationSerializer.Meta):
-        model = Location
-        fields = LocationSerializer.Meta.fields + get_serializer_fields(
+    class Meta:
+        fields = (
             'smart_things_app_token',
             'tariffs',
             'consumption',
             'energy_meters',
             'mug_data',
             'last_dashboard_ping',
-            model.is_test,
-            model.pupils_count,
         )
 
     @staticmethod
@@ -312,7 +313,12 @@ class SchoolsMetricsSerializer(LocationSerializer):
 
     @swagger_serializer_method(serializer_or_field=SchoolMetricsConsumptionDataSerializer)
     def get_consumption(self, location: Location):
-        timezone_offset = self.context['request'].query_params.get('timezone_offset', None)
+        request = self.context.get('request')
+        timezone_offset = request.query_params.get('timezone_offset', None) if request else None
+
+        if timezone_offset is None:  # snapshots are calculated for the local day of the school
+            timezone_offset = -datetime.now(tz=pytz.timezone(location.timezone)).utcoffset() // timedelta(minutes=1)
+
         serializer = SchoolMetricsConsumptionDataSerializer(location, context={'timezone_offset': timezone_offset})
         return serializer.data
 
@@ -337,3 +343,34 @@ class SchoolsMetricsSerializer(LocationSerializer):
             ), many=True
         )
         return serializer.data
+
+
+class SchoolsMetricsSerializer(SchoolsMetricsDataSerializer, LocationSerializer):
+    class Meta(LocationSerializer.Meta):
+        model = Location
+        fields = LocationSerializer.Meta.fields + SchoolsMetricsDataSerializer.Meta.fields + get_serializer_fields(
+            model.is_test,
+            model.pupils_count,
+            add_id=False,
+        )
+
+
+def _get_snapshot_field(field_name: str) -> serializers.JSONField:
+    return serializers.JSONField(source=f'metrics_snapshot.data.{field_name}', read_only=True, allow_null=True)
+
+
+class SchoolsMetricsSnapshotSerializer(LocationSerializer):
+    """
+    Reads metrics from SchoolMetricsSnapshot, use it with select_related('address', 'metrics_snapshot')
+    """
+    smart_things_app_token = _get_snapshot_field('smart_things_app_token')
+    tariffs = _get_snapshot_field('tariffs')
+    consumption = _get_snapshot_field('consumption')
+    energy_meters = _get_snapshot_field('energy_meters')
+    mug_data = _get_snapshot_field('mug_data')
+    last_dashboard_ping = _get_snapshot_field('last_dashboard_ping')
+    metrics_refreshed_at = serializers.DateTimeField(source='metrics_snapshot.updated_at', read_only=True,
+                                                     allow_null=True)
+
+    class Meta(SchoolsMetricsSerializer.Meta):
+        fields = SchoolsMetricsSerializer.Meta.fields + ('metrics_refreshed_at',)
@@ -0,0 +1,17 @@
+from apps.locations.models import Location
+from apps.schools_metrics.models import SchoolMetricsSnapshot
+from samsung_school import celery_app
+from utilities.sqlalchemy_helpers import close_sa_session
+
+
+@celery_app.task(ignore_result=True)
+@close_sa_session
+def refresh_schools_metrics_snapshots():
+    for location_id in Location.get_schools().values_list('id', flat=True):
+        refresh_school_metrics_snapshot.delay(location_id)
+
+
+@celery_app.task(ignore_result=True)
+@close_sa_session
+def refresh_school_metrics_snapshot(location_id: int):
+    SchoolMetricsSnapshot.refresh_for_location(Location.objects.get(id=location_id))
@@ -2,9 +2,12 @@ from datetime import datetime, timezone, date, timedelta
 from unittest.mock import patch, Mock, PropertyMock
 from collections import OrderedDict
 
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 
 from apps.accounts.permissions import RoleName
+from apps.addresses.models import Address
 from apps.cashback.models import OffPeakyPoint
 from apps.energy_dashboard.models import DashboardPing, DashboardType
 from apps.energy_meters.models import EnergyMeter
@@ -16,6 +19,7 @@ from apps.energy_tariffs.models import EnergyTariff
 from apps.historical_data.models import LongTermHistoricalData, DetailedHistoricalData
 from apps.locations.models import Location
 from apps.resources.types import ResourceChildType, Unit
+from apps.schools_metrics.models import SchoolMetricsSnapshot
 from apps.smart_things_apps.models import SmartThingsApp
 from apps.smart_things_apps.settings import REFRESH_TOKEN_LIVE_TIME, REFRESH_TOKEN_CYCLE
 from apps.smart_things_apps.tests.test_utilities import SmartThingsAppFactory
@@ -449,6 +453,35 @@ class TestSchoolsMetricsViewSet(EnergyTariffBaseTestCase, SmartThingsSensorsBase
             self.assertEqual((index + 1) * 100, school['pupils_count'])
 
 
+    def test_metrics_snapshots(self):
+        with self.subTest('Not refreshed'):
+            response = self.client.get(self.get_url())
+            self.assertResponse(response)
+            school_metrics = next(item for item in response.data if item['id'] == self.location.id)
+            self.assertIsNone(school_metrics['metrics_refreshed_at'])
+            self.assertIsNone(school_metrics['smart_things_app_token'])
+
+        with self.subTest('Refresh on demand'):
+            response = self.client.post(self.get_url(self.location.id, 'refresh'))
+            self.assertResponse(response)
+            self.assertIsNotNone(response.data['metrics_refreshed_at'])
+            self.assertEqual(
+                self.client.get(self.get_url(self.location.id)).data['smart_things_app_token'],
+                response.data['smart_things_app_token'],
+            )
+
+        with self.subTest('Constant count of queries'):
+            def get_list_queries_count():
+                with CaptureQueriesContext(connection) as context:
+                    self.assertResponse(self.client.get(self.get_url()))
+                return len(context.captured_queries)
+
+            queries_count = get_list_queries_count()
+            SchoolMetricsSnapshot.refresh_for_location(
+                Location.objects.create(name='new school', address=Address.objects.create(line_1='new address'))
+            )
+            self.assertEqual(queries_count, get_list_queries_count())
+
     @staticmethod
     def mug_sites_to_dict(location):
         mug_sites = []
@@ -1,12 +1,41 @@
+from drf_yasg.utils import no_body, swagger_auto_schema
+from rest_framework.decorators import action
 from rest_framework.mixins import ListModelMixin, RetrieveModelMixin
 from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
 from apps.locations.models import Location
-from apps.schools_metrics.serializers import SchoolsMetricsSerializer
+from apps.schools_metrics.models import SchoolMetricsSnapshot
+from apps.schools_metrics.serializers import SchoolsMetricsSerializer, SchoolsMetricsSnapshotSerializer
+from utilities.pagination import OptInCursorPagination
 
 
 class SchoolsMetricsViewSet(ListModelMixin, RetrieveModelMixin, GenericViewSet):
-    serializer_class = SchoolsMetricsSerializer
+    """
+    The list is read from metrics snapshots refreshed periodically, the retrieve calculates metrics of the school
+    """
     queryset = Location.objects.filter(parent_location__isnull=True)
     permission_classes = [IsAdminUser]
+    pagination_class = OptInCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+
+        if self.action in ('list', 'refresh'):
+            queryset = queryset.select_related('address', 'metrics_snapshot')
+
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action in ('list', 'refresh'):
+            return SchoolsMetricsSnapshotSerializer
+
+        return SchoolsMetricsSerializer
+
+    @swagger_auto_schema(request_body=no_body)
+    @action(methods=['post'], detail=True)
+    def refresh(self, request, *_, **__):
+        SchoolMetricsSnapshot.refresh_for_location(self.get_object())
+
+        return Response(self.get_serializer(self.get_object()).data)
@@ -8,12 +8,17 @@ class SmartThingsC2CEnergyMeterConfig(AppConfig):
     def ready(self):
         from samsung_school import celery_app
 
-        from apps.smart_things_c2c.tasks import reconcile_device_list_for_all_c2c_apps
+        from apps.smart_things_c2c.state_publisher import PUBLISH_INTERVAL
+        from apps.smart_things_c2c.tasks import publish_cloud_device_states, reconcile_device_list_for_all_c2c_apps
 
         celery_app.add_periodic_task(
             crontab(hour=1, minute=30),
             reconcile_device_list_for_all_c2c_apps.s(),  # fail over
         )
+        celery_app.add_periodic_task(
+            PUBLISH_INTERVAL,
+            publish_cloud_device_states.s(),
+        )
 
         # activate listeners:
         # noinspection PyUnresolvedReferences
@@ -1,6 +1,5 @@
 import logging
-from datetime import timedelta
-from typing import Optional, List
+from typing import List
 
 import funcy
 from django.db.models.signals import post_save, pre_delete
@@ -10,6 +9,7 @@ from apps.energy_meters.models import EnergyMeter
 from apps.historical_data.models import DetailedHistoricalData
 from apps.smart_things_apps.models import SmartThingsApp
 from apps.smart_things_c2c.models import C2CDeviceToEnergyMeterMap
+from apps.smart_things_c2c.state_publisher import put_cloud_device_state
 from apps.smart_things_c2c.tasks import reconcile_device_list
 from apps.smart_things_c2c.utils import CloudDeviceManager
 from apps.smart_things_web_hooks.models import SmartThingsConnector
@@ -58,22 +58,9 @@ def remove_energy_meter_from_cloud(sender, instance: EnergyMeter, **_):
             .remove_energy_meter_from_cloud(mapper.device_id)
 
 
-@receiver(post_save, sender=DetailedHistoricalData, dispatch_uid='reconcile_device_list_for_removed_energy_meter')
+@receiver(post_save, sender=DetailedHistoricalData, dispatch_uid='put_cloud_device_state')
 @funcy.silent
 @funcy.log_errors(logger.error)
 def update_cloud_device_state(sender, instance: DetailedHistoricalData, **_):
-    # noinspection PyTypeChecker
-    c2c_device_mappers = get_c2c_device_mappers(instance.resource_id)
-
-    if c2c_device_mappers:
-        for mapper in c2c_device_mappers:
-            mapper.set_cloud_device_consumption(instance.value)
-
-
-@funcy.cache(timedelta(minutes=10))
-@funcy.ignore((C2CDeviceToEnergyMeterMap.DoesNotExist, EnergyMeter.DoesNotExist))
-def get_c2c_device_mappers(
-        energy_meter_id: int,
-) -> List[C2CDeviceToEnergyMeterMap]:
-    energy_meter = EnergyMeter.objects.get(id=energy_meter_id)
-    return energy_meter.smart_things_c2c_mappers.all()
+    # the state is published by the periodic task, so saving of values doesn't wait for the SmartThings API
+    put_cloud_device_state(instance.resource_id, instance.value, instance.time)
@@ -0,0 +1,105 @@
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, NamedTuple, Set
+
+import funcy
+from cacheops.redis import redis_client
+
+from apps.smart_things_c2c.models import C2CDeviceToEnergyMeterMap
+from apps.smart_things_c2c.utils import CloudDeviceManager
+from apps.smart_things_devices.utilities.connectors import run_concurrently
+
+
+PENDING_STATES_KEY = 'c2c_device_states:pending'
+PUBLISH_INTERVAL = timedelta(seconds=10)
+MAX_PENDING_STATES = 10_000
+MAX_PUBLISH_ATTEMPTS = 3
+MAPPED_ENERGY_METERS_CACHE_TIME = timedelta(minutes=10)
+
+logger = logging.getLogger(__name__)
+
+
+class PendingState(NamedTuple):
+    timestamp: float
+    value: float
+    attempts: int = 0
+
+    def to_json(self) -> str:
+        return json.dumps(self)
+
+    @classmethod
+    def from_json(cls, data: bytes) -> 'PendingState':
+        return cls(*json.loads(data))
+
+
+@funcy.cache(MAPPED_ENERGY_METERS_CACHE_TIME)
+def get_mapped_energy_meter_ids() -> Set[int]:
+    return set(C2CDeviceToEnergyMeterMap.objects.values_list('energy_meter_id', flat=True))
+
+
+def put_cloud_device_state(energy_meter_id: int, value: float, time: datetime):
+    """
+    Remember the latest value of the energy meter for the next publishing, a newer value replaces the pending one
+    """
+    if energy_meter_id in get_mapped_energy_meter_ids():
+        redis_client.hset(PENDING_STATES_KEY, energy_meter_id, PendingState(time.timestamp(), value).to_json())
+
+
+def publish_pending_cloud_device_states():
+    """
+    Send all pending states to the cloud devices concurrently. Failed states are returned to the pending ones unless
+    there is a newer value already or they have used all attempts. When there are too many pending states, the oldest
+    ones are dropped.
+    """
+    states = _pop_pending_states()
+
+    if len(states) > MAX_PENDING_STATES:
+        dropped_meter_ids = sorted(states, key=lambda meter_id: states[meter_id].timestamp)[:-MAX_PENDING_STATES]
+        logger.warning(f'Too many pending C2C device states, {len(dropped_meter_ids)} oldest ones are dropped')
+        states = funcy.omit(states, dropped_meter_ids)
+
+    mappers = list(
+        C2CDeviceToEnergyMeterMap.objects.filter(energy_meter_id__in=states).select_related('smart_things_app')
+    )
+    managers: Dict[int, CloudDeviceManager] = {}
+    results: Dict[C2CDeviceToEnergyMeterMap, Exception] = {}
+
+    for mapper in mappers:
+        if mapper.smart_things_app_id not in managers:
+            managers[mapper.smart_things_app_id] = CloudDeviceManager(mapper.smart_things_app)
+
+            try:  # the expired token is refreshed here, the worker threads only make API requests
+                mapper.smart_things_app.auth_token
+            except Exception as exception:
+                results.update({
+                    app_mapper: exception
+                    for app_mapper in mappers
+                    if app_mapper.smart_things_app_id == mapper.smart_things_app_id
+                })
+
+    results.update(run_concurrently(
+        lambda mapper: managers[mapper.smart_things_app_id].set_cloud_device_state(
+            mapper.device_id,
+            states[mapper.energy_meter_id].value
+        ),
+        (mapper for mapper in mappers if mapper not in results),
+    ))
+
+    for mapper, result in results.items():
+        if isinstance(result, Exception):
+            logger.error(f'State of C2C device "{mapper.device_id}" is not published. Error: {result}')
+            state = states[mapper.energy_meter_id]
+
+            if state.attempts + 1 < MAX_PUBLISH_ATTEMPTS:
+                redis_client.hsetnx(PENDING_STATES_KEY, mapper.energy_meter_id,
+                                    state._replace(attempts=state.attempts + 1).to_json())
+
+
+def _pop_pending_states() -> Dict[int, PendingState]:
+    with redis_client.pipeline() as pipeline:
+        pipeline.hgetall(PENDING_STATES_KEY)
+        pipeline.delete(PENDING_STATES_KEY)
+        raw_states, _ = pipeline.execute()
+
+    return {int(meter_id): PendingState.from_json(state) for meter_id, state in raw_states.items()}
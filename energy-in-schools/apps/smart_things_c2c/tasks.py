@@ -1,5 +1,6 @@
 from samsung_school import celery_app
 from apps.smart_things_apps.models import SmartThingsApp
+from apps.smart_things_c2c.state_publisher import PUBLISH_INTERVAL, publish_pending_cloud_device_states
 from apps.smart_things_c2c.utils import CloudDeviceManager
 from apps.smart_things_web_hooks.models import SmartThingsConnector
 from utilities.sqlalchemy_helpers import close_sa_session
@@ -22,3 +23,9 @@ def reconcile_device_list(smart_things_app_id: int):
     smart_things_app = SmartThingsApp.objects.get(id=smart_things_app_id)
 
     CloudDeviceManager(smart_things_app).reconcile_device_list()
+
+
+@celery_app.task(ignore_result=True, expires=PUBLISH_INTERVAL.total_seconds())
+@close_sa_session
+def publish_cloud_device_states():
+    publish_pending_cloud_device_states()
@@ -1,11 +1,16 @@
+from datetime import datetime, timezone
 from unittest.mock import MagicMock, patch
 
 import factory
+from cacheops.redis import redis_client
 from django.db.models.signals import post_save, pre_delete
 
 from apps.energy_providers.tests.base_test_case import EnergyProviderBaseTestCase
 from apps.smart_things_c2c.base_test_case import SmartThingsC2CBaseTestCase
+from apps.smart_things_apps.types import SmartThingsError
 from apps.smart_things_c2c.models import C2CDeviceToEnergyMeterMap
+from apps.smart_things_c2c.state_publisher import PENDING_STATES_KEY, get_mapped_energy_meter_ids, \
+    publish_pending_cloud_device_states, put_cloud_device_state
 from apps.smart_things_c2c.utils import CloudDeviceManager
 from apps.smart_things_devices.types import App, Attribute, Capability, DTH, DeviceDetail, DeviceProfile
 
@@ -112,3 +117,43 @@ class TestCloudDeviceManager(SmartThingsC2CBaseTestCase, EnergyProviderBaseTestC
             Attribute.ENERGY,
             12.346
         )
+
+
+class TestCloudDeviceStatePublisher(SmartThingsC2CBaseTestCase, EnergyProviderBaseTestCase):
+    def setUp(self):
+        super().setUp()
+        get_mapped_energy_meter_ids.invalidate_all()
+        redis_client.delete(PENDING_STATES_KEY)
+
+    @patch('apps.smart_things_c2c.utils.CloudDeviceManager.api_connector')
+    def test_publish_cloud_device_states(self, api_connector_mock: MagicMock):
+        with factory.django.mute_signals(post_save, pre_delete):
+            not_mapped_energy_meter = self.create_energy_meter()
+            C2CDeviceToEnergyMeterMap.objects.create(
+                smart_things_app=self.c2c_smart_things_app,
+                device_id='the device id',
+                device_label='the label',
+                device_profile_id=self._c2c_device_profile_id,
+                energy_meter=self.energy_meter,
+            )
+
+        now = datetime.now(tz=timezone.utc)
+        for energy_meter_id, value in (
+                (self.energy_meter.id, 1000),
+                (self.energy_meter.id, 2000),
+                (not_mapped_energy_meter.id, 3000),
+        ):
+            put_cloud_device_state(energy_meter_id, value, now)
+
+        api_connector_mock.send_event.side_effect = [SmartThingsError('The API is not available'), None]
+
+        for label, expected_calls_count in (
+                ('Failed', 1),
+                ('Retried', 2),
+                ('Nothing to publish', 2),
+        ):
+            with self.subTest(label):
+                publish_pending_cloud_device_states()
+                self.assertEqual(expected_calls_count, api_connector_mock.send_event.call_count)
+
+        api_connector_mock.send_event.assert_called_with('the device id', Capability.ENERGY_METER, Attribute.ENERGY, 2)
@@ -1,7 +1,7 @@
 import logging
 from datetime import datetime, timezone, timedelta
 from itertools import chain
-from typing import Any, List, Optional, Generator, TYPE_CHECKING
+from typing import Any, Dict, List, Optional, Generator, TYPE_CHECKING, Tuple, Union
 
 from apps.smart_things_devices.settings import REFRESH_DEVICES_STATUSES_HOURS
 from django.apps import apps
@@ -22,7 +22,7 @@ from apps.smart_things_apps.models import SmartThingsApp
 from apps.smart_things_apps.types import SmartThingsAppNotConnected, BadRequest
 from apps.smart_things_devices.exceptions import DeviceNotConnected, CapabilitiesMismatchException
 from apps.smart_things_devices.types import Capability, DeviceDetail, DeviceStatus
-from apps.smart_things_devices.utilities.connectors import SmartThingsApiConnector
+from apps.smart_things_devices.utilities.connectors import SmartThingsApiConnector, run_concurrently
 from apps.smart_things_sensors.settings import SMART_THINGS_SENSOR_MAP
 from apps.smart_things_web_hooks.models import SmartThingsConnector
 
@@ -99,14 +99,26 @@ class SmartThingsDevice(SafeDeleteBaseModel):
     def delete(self, **kwargs):
         DetailedHistoricalData = apps.get_model('historical_data.DetailedHistoricalData')
         LongTermHistoricalData = apps.get_model('historical_data.LongTermHistoricalData')
+        RollupHistoricalData = apps.get_model('historical_data.RollupHistoricalData')
         SmartThingsSensor = apps.get_model('smart_things_sensors.SmartThingsSensor')
 
         sensors = SmartThingsSensor.objects.filter(device=self)
 
         for sensor in sensors:
-            today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-            DetailedHistoricalData.objects.filter(resource=sensor.resource_ptr, time__lte=(today - timedelta(days=3))).delete()
-            LongTermHistoricalData.objects.filter(resource=sensor.resource_ptr, time__lte=(today - timedelta(days=180))).delete()
+            today = datetime.now(tz=timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+            long_term_history_end = today - timedelta(days=180)
+            DetailedHistoricalData.objects.filter(
+                resource=sensor.resource_ptr,
+                time__lte=today - timedelta(days=3)
+            ).delete()
+            LongTermHistoricalData.objects.filter(
+                resource=sensor.resource_ptr,
+                time__lte=long_term_history_end
+            ).delete()
+
+            # rollups of the removed periods are removed too, the period of the history end is recalculated:
+            RollupHistoricalData.objects.filter(resource=sensor.resource_ptr, time__lt=long_term_history_end).delete()
+            sensor.refresh_history_rollups(from_=long_term_history_end)
 
         super(SmartThingsDevice, self).delete(**kwargs)
 
@@ -164,19 +176,50 @@ class SmartThingsDevice(SafeDeleteBaseModel):
         if settings.DELETE_DEVICES_ON_REFRESH:
             cls.objects.in_location(location).exclude(smart_things_id__in=devices_details).delete()
 
-        for old_device in cls.all_objects.in_location(location).filter(
-                smart_things_id__in=devices_details).select_for_update():
-            device_details = devices_details.pop(old_device.smart_things_id)
-            old_device.update_from_details(device_details)
-            old_device.update_status()
+        old_devices = list(cls.all_objects.in_location(location).filter(
+            smart_things_id__in=devices_details).select_for_update())
 
-            if old_device.deleted:
-                old_device.save()  # restore the device
+        for old_device in old_devices:
+            old_device.update_from_details(devices_details.pop(old_device.smart_things_id))
 
+        new_devices = []
         for new_device_details in devices_details.values():
             new_device = cls(sub_location=location)
             new_device.update_from_details(new_device_details)
-            new_device.update_status()
+            new_devices.append(new_device)
+
+        statuses = cls.fetch_statuses(old_devices + new_devices)
+
+        for old_device in old_devices:
+            old_device.update_status(statuses.get(old_device.smart_things_id))
+
+            if old_device.deleted:
+                old_device.save()  # restore the device
+
+        for new_device in new_devices:
+            new_device.update_status(statuses.get(new_device.smart_things_id))
+
+    @staticmethod
+    def fetch_statuses(
+            devices: List['SmartThingsDevice']
+    ) -> Dict[str, Union[Tuple[str, datetime], Exception]]:
+        """
+        Request statuses of the devices concurrently, the connectors and their tokens are resolved in the current thread
+        """
+        api_connectors: Dict[str, SmartThingsApiConnector] = {}
+
+        for device in devices:
+            try:
+                api_connector = device.api_connector
+                api_connector.smart_things_app.auth_token  # the expired token is refreshed here, not by worker threads
+                api_connectors[device.smart_things_id] = api_connector
+            except SmartThingsAppNotConnected:
+                pass
+
+        return run_concurrently(
+            lambda smart_things_id: api_connectors[smart_things_id].get_device_status(smart_things_id),
+            api_connectors
+        )
 
     @classmethod
     def get_devices_ids_for_refresh_status(cls) -> Generator[int, None, None]:
@@ -187,10 +230,13 @@ class SmartThingsDevice(SafeDeleteBaseModel):
         ).values_list('id', flat=True):
             yield device_id
 
-    def update_status(self) -> None:
+    def update_status(self, fetched_status: Union[Tuple[str, datetime], Exception, None] = None) -> None:
         status_updated_at = None
         try:
-            status, status_updated_at = self.api_connector.get_device_status(self.smart_things_id)
+            if isinstance(fetched_status, Exception):
+                raise fetched_status
+
+            status, status_updated_at = fetched_status or self.api_connector.get_device_status(self.smart_things_id)
             new_status = getattr(DeviceStatus, status)
         except (AttributeError, SmartThingsAppNotConnected):
             new_status = DeviceStatus.UNKNOWN
@@ -14,7 +14,7 @@ from apps.smart_things_apps.types import BadGateway, SmartThingsError
 from apps.smart_things_devices.base_test_case import SmartThingsDevicesBaseTestCase
 from apps.smart_things_devices.models import SmartThingsDevice, SmartThingsCapability
 from apps.smart_things_devices.types import Attribute, Capability, DeviceDetail, SmartThingsRoomDetail, DeviceStatus
-from apps.smart_things_devices.utilities.connectors import SmartThingsApiConnector
+from apps.smart_things_devices.utilities.connectors import SmartThingsApiConnector, run_concurrently
 from utilities.requests_mock import RequestMock
 
 
@@ -418,6 +418,46 @@ class TestSmartThingsDevicesConnector(SmartThingsDevicesBaseTestCase):
             expected_device_details
         )
 
+    @RequestMock.assert_requests([
+        RequestMock(
+            request_url=SmartThingsApiConnector.Endpoint.DEVICES,
+            response_json={'_links': {'next': None, 'previous': None}, 'items': [
+                SmartThingsDevicesBaseTestCase.SmartThingsDeviceDetailsResponse.SWITCH_WITH_ROOM,
+                {**SmartThingsDevicesBaseTestCase.SmartThingsDeviceDetailsResponse.SWITCH_WITH_ROOM,
+                 'deviceId': 'other_device_id'},
+            ]},
+            request_headers={'Authorization': 'Bearer auth token'}
+        ),
+        RequestMock(
+            request_url=f'{SmartThingsApiConnector.Endpoint.LOCATIONS}/4383b05c-5dda-42f5/rooms',
+            response_json={'_links': {'next': None, 'previous': None}, 'items': [
+                SmartThingsDevicesBaseTestCase.SmartThingsDeviceRoomDetailsResponse.KITCHEN,
+            ]},
+            request_headers={'Authorization': 'Bearer auth token'}
+        )
+    ])
+    def test_list_devices_details_with_rooms(self):
+        devices_details = list(self.smart_things_devices_connector.list_devices_details())
+        room_details = SmartThingsRoomDetail.from_json(self.SmartThingsDeviceRoomDetailsResponse.KITCHEN)
+
+        self.assertListEqual(
+            ['8d975a53-0196-4917-ad59-aacf9d34a592', 'other_device_id'],
+            [device_details.device_id for device_details in devices_details]
+        )
+        self.assertTrue(all(device_details.room == room_details for device_details in devices_details))
+
+    def test_run_concurrently(self):
+        error = ValueError('the error')
+
+        def square(value: int) -> int:
+            if value < 0:
+                raise error
+
+            return value ** 2
+
+        self.assertDictEqual({1: 1, 2: 4, -1: error}, run_concurrently(square, [1, 2, -1]))
+        self.assertDictEqual({}, run_concurrently(square, []))
+
     @RequestMock.assert_requests([
         request_mock_get_device_status(
             response_json={
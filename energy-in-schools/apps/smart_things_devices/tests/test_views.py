@@ -188,8 +188,10 @@ class TestSmartThingsDevices(SmartThingsDevicesBaseTestCase):
             request_headers={'Authorization': 'Bearer auth token'},
         ),
         RequestMock(
-            request_url='https://api.smartthings.com/v1/locations/4383b05c-5dda-42f5/rooms/afedba4f-d198-4349',
-            response_json=SmartThingsDevicesBaseTestCase.SmartThingsDeviceRoomDetailsResponse.KITCHEN,
+            request_url='https://api.smartthings.com/v1/locations/4383b05c-5dda-42f5/rooms',
+            response_json={'_links': {'next': None, 'previous': None}, 'items': [
+                SmartThingsDevicesBaseTestCase.SmartThingsDeviceRoomDetailsResponse.KITCHEN,
+            ]},
             request_headers={'Authorization': 'Bearer auth token'}
         ),
         RequestMock(
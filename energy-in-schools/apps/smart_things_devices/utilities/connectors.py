@@ -1,23 +1,31 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from http import HTTPStatus
-from typing import Any, Collection, Iterable, Iterator, Tuple
+from typing import Any, Callable, Collection, Dict, Hashable, Iterable, Iterator, Optional, Tuple, TypeVar, Union
 import dateutil.parser
 
 import funcy
 import requests
 import requests.auth
+from django.db import connections
+
 from apps.smart_things_apps.types import BadGateway, BadRequest, ValidationError, SmartThingsAPIResponse
 from apps.smart_things_apps.utilities import SmartThingsAuthApiConnector
 from apps.smart_things_devices.settings import CAPABILITY_RULES
 from apps.smart_things_devices.types import Attribute, Capability, DeviceDetail, DeviceStatus, SmartThingsRoomDetail
 from cacheops.redis import redis_client
 from utilities.caching import NotNoneRedisCache
+from utilities.http_sessions import get_http_session
 from utilities.types import JsonObject
 
 ANY = '*'
+MAX_CONCURRENT_REQUESTS = 8
 
 cache = NotNoneRedisCache(redis_client)
 
+ItemType = TypeVar('ItemType', bound=Hashable)
+ResultType = TypeVar('ResultType')
+
 
 class SmartThingsApiConnector(SmartThingsAuthApiConnector):
     ROOM_DETAILS_CACHE_TIMEOUT = int(timedelta(hours=1).total_seconds())
@@ -29,7 +37,10 @@ class SmartThingsApiConnector(SmartThingsAuthApiConnector):
 
     def _get_all_pages(self, url: str, *, check_field_paths: Iterable[Collection[str]] = ()) -> Iterator[JsonObject]:
         while url:
-            response = SmartThingsAPIResponse(requests.get(url, headers=self._auth_headers), self.smart_things_app)
+            response = SmartThingsAPIResponse(
+                self._http_session.get(url, headers=self._auth_headers),
+                self.smart_things_app
+            )
             response_data = self._check_response(response)
 
             try:
@@ -45,7 +56,7 @@ class SmartThingsApiConnector(SmartThingsAuthApiConnector):
     def get_room_detail(self, location_id: str, room_id: str) -> SmartThingsRoomDetail:
         @cache.cached(timeout=self.ROOM_DETAILS_CACHE_TIMEOUT)
         def _get_room_detail(_location_id: str, _room_id: str):
-            response = SmartThingsAPIResponse(requests.get(
+            response = SmartThingsAPIResponse(self._http_session.get(
                 self._get_url(
                     self.Endpoint.LOCATIONS,
                     location_id,
@@ -61,26 +72,57 @@ class SmartThingsApiConnector(SmartThingsAuthApiConnector):
 
         return _get_room_detail(location_id, room_id)
 
+    def get_location_rooms(self, location_id: str) -> Optional[Dict[str, SmartThingsRoomDetail]]:
+        """
+        Return all rooms of the location by room ids, it is one request instead of a request per room
+        """
+        @cache.cached(timeout=self.ROOM_DETAILS_CACHE_TIMEOUT)
+        def _get_location_rooms(_location_id: str):
+            try:
+                return {
+                    room_detail.room_id: room_detail
+                    for room_detail in map(
+                        SmartThingsRoomDetail.from_json,
+                        self._get_all_pages(self._get_url(self.Endpoint.LOCATIONS, location_id, 'rooms'))
+                    )
+                }
+            # TODO: to get locations additional smart app permission is required, which may not be in old locations
+            except BadRequest:
+                return None
+
+        return _get_location_rooms(location_id)
+
     def list_devices_details(
             self,
             *,
             ignore_mobile_devices: bool = True,
             ignore_unknown_device_type: bool = False,
     ) -> Iterator[DeviceDetail]:
+        rooms_by_location_id: Dict[str, Optional[Dict[str, SmartThingsRoomDetail]]] = {}
+
         for raw_device_detail in self._get_all_pages(self._get_url(self.Endpoint.DEVICES)):
             device_detail = DeviceDetail.from_json(raw_device_detail)
-            if device_detail.room_id:
-                device_detail = device_detail._replace(
-                    room=self.get_room_detail(device_detail.location_id, device_detail.room_id))
             if ignore_mobile_devices and device_detail.dth.device_type_name == 'Mobile Presence' or \
                     ignore_unknown_device_type and device_detail.dth.device_type_id is None:
                 continue
 
+            if device_detail.room_id:
+                if device_detail.location_id not in rooms_by_location_id:
+                    rooms_by_location_id[device_detail.location_id] = \
+                        self.get_location_rooms(device_detail.location_id)
+
+                rooms = rooms_by_location_id[device_detail.location_id]
+                if rooms is not None:
+                    device_detail = device_detail._replace(
+                        room=rooms.get(device_detail.room_id) or
+                        self.get_room_detail(device_detail.location_id, device_detail.room_id)  # a new room
+                    )
+
             yield device_detail
 
     def create_device(self, label: str, profile_id: str, external_id: str) -> DeviceDetail:
         response = SmartThingsAPIResponse(
-            requests.post(self._get_url(self.Endpoint.DEVICES), headers=self._auth_headers, json=dict(
+            self._http_session.post(self._get_url(self.Endpoint.DEVICES), headers=self._auth_headers, json=dict(
                 label=label,
                 locationId=self.smart_things_app.app_location_id,
                 app=dict(
@@ -98,13 +140,13 @@ class SmartThingsApiConnector(SmartThingsAuthApiConnector):
 
     def destroy_device(self, device_id: str):
         response = SmartThingsAPIResponse(
-            requests.delete(self._get_url(self.Endpoint.DEVICES, device_id), headers=self._auth_headers),
+            self._http_session.delete(self._get_url(self.Endpoint.DEVICES, device_id), headers=self._auth_headers),
             self.smart_things_app)
         self._check_response(response)
 
     def get_device_detail(self, device_id: str) -> DeviceDetail:
         response = SmartThingsAPIResponse(
-            requests.get(self._get_url(self.Endpoint.DEVICES, device_id), headers=self._auth_headers),
+            self._http_session.get(self._get_url(self.Endpoint.DEVICES, device_id), headers=self._auth_headers),
             self.smart_things_app)
         self._check_response(response)
 
@@ -114,7 +156,7 @@ class SmartThingsApiConnector(SmartThingsAuthApiConnector):
         return device_detail
 
     def get_device_states(self, device_id: str, capability: Capability) -> Any:
-        response = SmartThingsAPIResponse(requests.get(
+        response = SmartThingsAPIResponse(self._http_session.get(
             self._get_url(
                 self.Endpoint.DEVICES,
                 device_id,
@@ -134,8 +176,11 @@ class SmartThingsApiConnector(SmartThingsAuthApiConnector):
             raise BadGateway from error
 
     def get_device_status(self, device_id: str) -> Tuple[str, datetime]:
-        response = SmartThingsAPIResponse(requests.get(self._get_url(self.Endpoint.DEVICES, device_id, 'health'),
-                                                       headers=self._auth_headers), self.smart_things_app)
+        response = SmartThingsAPIResponse(
+            self._http_session.get(self._get_url(self.Endpoint.DEVICES, device_id, 'health'),
+                                   headers=self._auth_headers),
+            self.smart_things_app
+        )
         if response.status_code in (HTTPStatus.NOT_FOUND, HTTPStatus.INTERNAL_SERVER_ERROR):
             return DeviceStatus.UNKNOWN.value, datetime.now(tz=timezone.utc)
 
@@ -152,13 +197,13 @@ class SmartThingsApiConnector(SmartThingsAuthApiConnector):
         if not label:
             return
 
-        response = SmartThingsAPIResponse(requests.put(self._get_url(self.Endpoint.DEVICES, device_id),
-                                                       headers=self._auth_headers,
-                                                       json={'label': label}), self.smart_things_app)
+        response = SmartThingsAPIResponse(self._http_session.put(self._get_url(self.Endpoint.DEVICES, device_id),
+                                                                 headers=self._auth_headers,
+                                                                 json={'label': label}), self.smart_things_app)
         self._check_response(response)
 
     def execute_command(self, device_id: str, capability: Capability, value: Any) -> None:
-        response = SmartThingsAPIResponse(requests.post(
+        response = SmartThingsAPIResponse(self._http_session.post(
             self._get_url(self.Endpoint.DEVICES, device_id, 'commands'),
             headers=self._auth_headers,
             json={"commands": [CAPABILITY_RULES[capability].get_command_body(value)]}
@@ -167,7 +212,7 @@ class SmartThingsApiConnector(SmartThingsAuthApiConnector):
         self._check_response(response)
 
     def send_event(self, device_id: str, capability: Capability, attribute: Attribute, value: Any):
-        response = SmartThingsAPIResponse(requests.post(
+        response = SmartThingsAPIResponse(self._http_session.post(
             self._get_url(self.Endpoint.DEVICES, device_id, 'events'),
             headers=self._auth_headers,
             json={
@@ -191,7 +236,7 @@ class SmartThingsApiConnector(SmartThingsAuthApiConnector):
             attribute: Attribute = None,
             state_change_only: bool = True
     ) -> str:
-        response = SmartThingsAPIResponse(requests.post(
+        response = SmartThingsAPIResponse(self._http_session.post(
             self._get_url(self.Endpoint.SUBSCRIPTION),
             headers=self._auth_headers,
             json=dict(
@@ -211,7 +256,7 @@ class SmartThingsApiConnector(SmartThingsAuthApiConnector):
         return response_data['id']
 
     def unsubscribe_for_device_events(self, subscription_id: str):
-        response = SmartThingsAPIResponse(requests.delete(
+        response = SmartThingsAPIResponse(self._http_session.delete(
             self._get_url(self.Endpoint.SUBSCRIPTION, subscription_id),
             headers=self._auth_headers,
         ), self.smart_things_app)
@@ -227,7 +272,7 @@ class SmartThingsApiConnector(SmartThingsAuthApiConnector):
                 yield raw_subscription['id']
 
     def get_location(self) -> dict:
-        response = SmartThingsAPIResponse(requests.get(
+        response = SmartThingsAPIResponse(self._http_session.get(
             self._get_url(self.Endpoint.LOCATIONS, self.smart_things_app.app_location_id),
             headers=self._auth_headers
         ), self.smart_things_app)
@@ -235,6 +280,10 @@ class SmartThingsApiConnector(SmartThingsAuthApiConnector):
         response_data = self._check_response(response)
         return response_data
 
+    @property
+    def _http_session(self) -> requests.Session:
+        return get_http_session((type(self).__name__, self.smart_things_app.id))
+
     @funcy.joining('')
     def _get_url(self, endpoint: str, item_id: str = None, *sub_urls: str, **parameters: str) -> str:
         yield endpoint.format(installed_app_id=self.smart_things_app.app_id, **parameters)
@@ -246,3 +295,29 @@ class SmartThingsApiConnector(SmartThingsAuthApiConnector):
         if sub_urls:
             yield '/'
             yield '/'.join(sub_urls)
+
+
+def run_concurrently(
+        function: Callable[[ItemType], ResultType],
+        items: Iterable[ItemType],
+) -> Dict[ItemType, Union[ResultType, Exception]]:
+    """
+    Call the function for every item by the bounded pool of threads, errors are returned as results.
+    The function should do only API requests, the database changes of the calling thread are not visible there.
+    """
+    def call(item: ItemType) -> Union[ResultType, Exception]:
+        try:
+            return function(item)
+
+        except Exception as exception:
+            return exception
+
+        finally:
+            connections.close_all()
+
+    items = list(items)
+    if not items:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_REQUESTS, len(items))) as executor:
+        return dict(zip(items, executor.map(call, items)))
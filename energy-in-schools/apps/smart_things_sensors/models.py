@@ -67,13 +67,13 @@ class SmartThingsSensor(PullSupportedResource):
         self.add_value(self._parse_event(event))
 
     @staticmethod
-    def _parse_event(event: DeviceEvent) -> ResourceValue:
+    def _parse_event(event: DeviceEvent, event_time: datetime = None) -> ResourceValue:
         value = event.value
         if isinstance(value, IntValueEnumMixin):
             value = value.int_value
 
         return ResourceValue(
-            time=datetime.now(tz=timezone.utc),
+            time=event_time or datetime.now(tz=timezone.utc),
             value=value,
             unit=event.capability.unit
         )
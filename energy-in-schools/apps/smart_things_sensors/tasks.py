@@ -1,17 +1,19 @@
+import logging
 from datetime import datetime, timezone
 
-import funcy
-
 from apps.energy_providers.providers.abstract import MeterType
 from apps.resources.types import DataCollectionMethod, ResourceValue
 from apps.smart_things_apps.models import SmartThingsApp
 from apps.smart_things_devices.types import DeviceStatus
-from apps.smart_things_devices.utilities.connectors import SmartThingsApiConnector
+from apps.smart_things_devices.utilities.connectors import SmartThingsApiConnector, run_concurrently
 from apps.smart_things_sensors.models import SmartThingsSensor, SmartThingsEnergyMeter
 from samsung_school import celery_app
 from utilities.sqlalchemy_helpers import close_sa_session
 
 
+logger = logging.getLogger(__name__)
+
+
 @celery_app.task(ignore_result=True)
 @close_sa_session
 def subscribe_sensor_for_events(smart_things_sensor_id: int):
@@ -46,9 +48,16 @@ def update_all_subscriptions_for_app(smart_things_app_id):
             .values_list('events_subscription_id', flat=True)
     )
 
-    for unused_subscription_id in all_subscriptions_ids - used_subscriptions_ids:
-        with funcy.suppress():
-            unsubscribe_for_events(smart_things_app.id, unused_subscription_id)
+    smart_things_app.auth_token  # the expired token is refreshed here, not by worker threads
+    unsubscribe_results = run_concurrently(
+        api_connector.unsubscribe_for_device_events,
+        all_subscriptions_ids - used_subscriptions_ids
+    )
+
+    for subscription_id, result in unsubscribe_results.items():
+        if isinstance(result, Exception):
+            logger.error(f'Unsubscribing of "{subscription_id}" for SmartThings app {smart_things_app_id} is failed: '
+                         f'{result}')
 
     for sensor_id_to_subscribe in (
             sensors_in_location
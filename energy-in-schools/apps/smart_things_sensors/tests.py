@@ -262,7 +262,7 @@ class TestSmartThingsSensor(SmartThingsSensorsBaseTestCase):
 
     @patch('apps.smart_things_devices.utilities.connectors.SmartThingsApiConnector.get_all_subscriptions_ids',
            return_value=['correct', 'unused'])
-    @patch('apps.smart_things_sensors.tasks.unsubscribe_for_events')
+    @patch('apps.smart_things_devices.utilities.connectors.SmartThingsApiConnector.unsubscribe_for_device_events')
     @patch('apps.smart_things_sensors.tasks.subscribe_sensor_for_events.delay')
     def test_fail_over_reconnection(self, subscribe_mock: MagicMock, unsubscribe_mock: MagicMock, _):
         without_sub_sensor = self.smart_things_sensor
@@ -282,7 +282,7 @@ class TestSmartThingsSensor(SmartThingsSensorsBaseTestCase):
             call(without_sub_sensor.id),
             call(wrong_sub_sensor.id),
         ], any_order=True)
-        unsubscribe_mock.assert_called_once_with(self._smart_things_app_id, 'unused')
+        unsubscribe_mock.assert_called_once_with('unused')
 
     def test_crud_action(self):
         response = self.client.get(self.get_url(self.smart_things_sensor.id))
@@ -1,6 +1,7 @@
 import logging
-from typing import Any, Dict, List, NamedTuple, Optional, Tuple, TYPE_CHECKING
-from datetime import datetime, timezone
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple, TYPE_CHECKING
+from datetime import datetime, timedelta, timezone
 
 import requests
 import stringcase
@@ -10,11 +11,14 @@ from rest_framework.exceptions import ValidationError
 from rest_framework_simplejwt.exceptions import AuthenticationFailed
 
 from apps.accounts.permissions import RoleName
+from apps.resources.models import Resource
+from apps.resources.types import ResourceValue
 from apps.smart_things_apps.models import SmartThingsApp
-from apps.smart_things_devices.types import DeviceEvent
+from apps.smart_things_devices.types import Capability, DeviceEvent
 from apps.smart_things_sensors.models import SmartThingsSensor
 from apps.smart_things_web_hooks.models import SmartThingsConnector
 from apps.smart_things_web_hooks.settings import get_config_page_data, get_initialize_page_data
+from utilities.caching import LRUCache
 from utilities.types import JsonObject
 
 if TYPE_CHECKING:
@@ -22,6 +26,11 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+SENSORS_INDEX_SIZE = 10_000
+SENSORS_INDEX_TIMEOUT = timedelta(minutes=10)
+
+sensors_index = LRUCache(SENSORS_INDEX_SIZE, SENSORS_INDEX_TIMEOUT)  # (device id, capability) -> sensor id
+
 
 class SmartAppInfo(NamedTuple):
     app_id: str
@@ -185,23 +194,64 @@ class SmartAppWebHookHandler(AbstractSmartThingsWebHookHandler):
     )
 
     def handle_event(self) -> JsonObject:
-        events = self.data['events']
+        from apps.smart_things_web_hooks.tasks import process_device_events_task
 
-        for event in events:
-            if event.get('eventType') == 'DEVICE_EVENT':
-                self.process_device_event(DeviceEvent.parse(event['deviceEvent']))
+        device_events = [
+            event['deviceEvent']
+            for event in self.data['events']
+            if event.get('eventType') == 'DEVICE_EVENT'
+        ]
+
+        # the events are processed in background for answering at once, so SmartThings doesn't retry them
+        if device_events:
+            process_device_events_task.delay(device_events, datetime.now(tz=timezone.utc).timestamp())
 
         return {'eventData': {}}
 
-    @staticmethod
-    def process_device_event(device_event: DeviceEvent):
-        smart_things_sensor: SmartThingsSensor = SmartThingsSensor.objects.filter(
-            device__smart_things_id=device_event.device_id,
-            capability=device_event.capability
-        ).first()
-
-        if smart_things_sensor:
-            smart_things_sensor.process_event(device_event)
+
+def process_device_events(device_events: List[DeviceEvent], event_time: datetime = None):
+    sensor_ids = get_sensor_ids({(device_event.device_id, device_event.capability) for device_event in device_events})
+    sensors = SmartThingsSensor.objects.in_bulk(set(sensor_ids.values()))
+    values_by_sensor: Dict[SmartThingsSensor, List[ResourceValue]] = defaultdict(list)
+
+    for device_event in device_events:
+        sensor_key = device_event.device_id, device_event.capability
+        sensor = sensors.get(sensor_ids.get(sensor_key))
+
+        if sensor:
+            # noinspection PyProtectedMember
+            values_by_sensor[sensor].append(sensor._parse_event(device_event, event_time))
+
+        elif sensor_key in sensor_ids:
+            sensors_index.delete(sensor_key)  # the sensor is removed
+
+    Resource.add_values_for_resources(values_by_sensor)
+
+
+def get_sensor_ids(sensor_keys: Set[Tuple[str, Capability]]) -> Dict[Tuple[str, Capability], int]:
+    """
+    Get sensor ids by device ids and capabilities, the sensors that are not in the index are selected by one query
+    """
+    sensor_ids = {}
+
+    for sensor_key in sensor_keys:
+        sensor_id = sensors_index.get(sensor_key)
+
+        if sensor_id is not None:
+            sensor_ids[sensor_key] = sensor_id
+
+    missed_sensor_keys = sensor_keys - sensor_ids.keys()
+
+    if missed_sensor_keys:
+        for sensor_id, device_id, capability in SmartThingsSensor.objects.filter(
+                device__smart_things_id__in={device_id for device_id, _ in missed_sensor_keys},
+                capability__in={capability for _, capability in missed_sensor_keys},
+        ).values_list('id', 'device__smart_things_id', 'capability'):
+            if (device_id, capability) in missed_sensor_keys and (device_id, capability) not in sensor_ids:
+                sensor_ids[device_id, capability] = sensor_id
+                sensors_index.set((device_id, capability), sensor_id)
+
+    return sensor_ids
 
 
 class C2CDeviceWebHookHandler(AbstractSmartThingsWebHookHandler):
@@ -0,0 +1,27 @@
+import logging
+from datetime import datetime, timezone
+from typing import List
+
+from apps.smart_things_devices.types import DeviceEvent
+from apps.smart_things_web_hooks.handlers import process_device_events
+from samsung_school import celery_app
+from utilities.sqlalchemy_helpers import close_sa_session
+from utilities.types import JsonObject
+
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(ignore_result=True)
+@close_sa_session
+def process_device_events_task(device_events: List[JsonObject], received_at: float):
+    parsed_device_events = []
+
+    for device_event in device_events:
+        try:
+            parsed_device_events.append(DeviceEvent.parse(device_event))
+
+        except Exception as exception:
+            logger.error(f'SmartThings device event is skipped: {exception}')
+
+    process_device_events(parsed_device_events, datetime.fromtimestamp(received_at, tz=timezone.utc))
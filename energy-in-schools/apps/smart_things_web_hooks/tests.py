@@ -1,12 +1,16 @@
 import json
+from datetime import datetime, timezone
 from unittest.mock import MagicMock, patch
 
 from rest_framework import status
 
 from apps.smart_things_apps.models import SmartThingsApp
+from apps.resources.types import MotionState
+from apps.smart_things_devices.types import Capability
 from apps.smart_things_sensors.base_test_case import SmartThingsSensorsBaseTestCase
-from apps.smart_things_web_hooks.handlers import SmartAppWebHookHandler
+from apps.smart_things_web_hooks.handlers import SmartAppWebHookHandler, sensors_index
 from apps.smart_things_web_hooks.settings import get_config_page_data, get_initialize_page_data
+from apps.smart_things_web_hooks.tasks import process_device_events_task
 
 
 header_verifier_mock = MagicMock(name='header_verifier_mock')
@@ -84,14 +88,30 @@ class TestSmartThingsClientApi(SmartThingsSensorsBaseTestCase):
             self.assertDictEqual({"uninstallData": {}}, response.json())
 
     # @patch('apps.smart_things_web_hooks.handlers.HeaderVerifier', new=header_verifier_class_mock)
-    def test_handle_device_events(self):
+    @patch('apps.smart_things_web_hooks.tasks.process_device_events_task.delay')
+    def test_handle_device_events(self, delay_mock: MagicMock):
+        request_data = self._get_device_event_request()
         response = self.client.post(
             self.get_url(self.smart_things_connector.connector_name),
-            json.dumps(self._get_device_event_request()),
+            json.dumps(request_data),
             content_type="application/json"
         )
         self.assertResponse(response)
         self.assertDictEqual({'eventData': {}}, response.json())
+        self.assertEqual(
+            [event['deviceEvent'] for event in request_data['eventData']['events']],
+            delay_mock.call_args[0][0]
+        )
+
+    def test_process_device_events(self):
+        received_at = datetime.now(tz=timezone.utc).replace(microsecond=0)
+        device_events = [event['deviceEvent'] for event in self._get_device_event_request()['eventData']['events']]
+
+        process_device_events_task(device_events + [{'deviceId': 'broken event'}], received_at.timestamp())
+
+        sensor = self.smart_things_sensor
+        self.assertEqual(MotionState.ACTIVE.int_value, sensor.last_value)
+        self.assertEqual(sensor.id, sensors_index.get((self.smart_things_device.smart_things_id, Capability.MOTION_SENSOR)))
 
     @staticmethod
     def _get_ping_request():
@@ -1,4 +1,5 @@
-from datetime import datetime, timezone
+import json
+from datetime import datetime, timedelta, timezone
 from http import HTTPStatus
 
 from apps.accounts.permissions import RoleName
@@ -36,6 +37,45 @@ class TestHistoricalDataVariables(HubBaseTestCase):
         )
         self.assertEqual(len(response.content), 45)
 
+    def test_stream_historical_data(self):
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        for seconds_ago, value in ((30, 1), (20, 2), (10, 3)):
+            DetailedHistoricalData.objects.create(
+                resource=self.data_set,
+                time=now - timedelta(days=1, seconds=seconds_ago),
+                value=value,
+            )
+
+        with self.subTest('CSV'):
+            response = self.client.get(self.get_url(self.data_set.id, 'data', query_param={
+                'stream': 'csv',
+                'to': self.format_datetime(now - timedelta(hours=1)),
+                'limit': 2,
+            }))
+            self.assertResponse(response)
+            self.assertEqual('text/csv; charset=utf-8', response['Content-Type'])
+            self.assertEqual(
+                'attachment; filename=the namespace_test_32_historical_data.csv',
+                response['Content-Disposition']
+            )
+            self.assertEqual(
+                ['time,value', f'{self.format_datetime(now - timedelta(days=1, seconds=30))},1.0',
+                 f'{self.format_datetime(now - timedelta(days=1, seconds=20))},2.0'],
+                b''.join(response.streaming_content).decode().splitlines()
+            )
+
+        with self.subTest('NDJSON'):
+            response = self.client.get(self.get_url(self.data_set.id, 'data', query_param={
+                'stream': 'ndjson',
+                'from': self.format_datetime(now - timedelta(days=1, seconds=15)),
+                'to': self.format_datetime(now - timedelta(hours=1)),
+            }))
+            self.assertResponse(response)
+            self.assertEqual(
+                [{'time': self.format_datetime(now - timedelta(days=1, seconds=10)), 'value': 3.0}],
+                list(map(json.loads, b''.join(response.streaming_content).decode().splitlines()))
+            )
+
     def test_create_data_set(self):
         body = dict(
             namespace='the name space',
@@ -121,6 +161,21 @@ class TestHistoricalDataVariables(HubBaseTestCase):
         self.assertResponse(response)
         self.assertEqual(2, len(response.data))
 
+    def test_add_values_to_data_set_by_bulk(self):
+        now = datetime.now(timezone.utc)
+        body = [
+            {'value': 10, 'time': self.format_datetime(now - timedelta(seconds=10))},
+            {'value': 20, 'time': self.format_datetime(now - timedelta(seconds=5))},
+        ]
+        response = self.client.post(self.get_url(self.data_set.id, 'data', 'bulk'), json.dumps(body),
+                                    content_type='application/json')
+        self.assertResponse(response, HTTPStatus.CREATED)
+        self.assertEqual(2, response.data['count'])
+
+        response = self.client.get(self.get_url(self.data_set.id, 'data'))
+        self.assertResponse(response)
+        self.assertEqual(3, len(response.data))
+
     def test_remove_variable(self):
         response = self.client.delete(self.get_url(self.data_set.id))
         self.assertResponse(response, HTTPStatus.NO_CONTENT)
@@ -1,9 +1,16 @@
+from http import HTTPStatus
+
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.mixins import CreateModelMixin, ListModelMixin
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
+from apps.historical_data.serializers import StreamQuerySerializer
+from apps.historical_data.utils.streaming_export import EXPORT_CHUNK_SIZE, get_streaming_response
 from apps.locations.decorators import own_location_only
 from apps.microbit_historical_data.models import MicrobitHistoricalDataSet
+from apps.microbit_historical_data.views import MAX_BULK_READINGS
 from apps.resources.types import ResourceValue
 from apps.storage.serializers.historical import MicrobitHistoricalDataSerializer
 
@@ -20,6 +27,9 @@ class HistoricalStorageDataViewSet(ListModelMixin,
     def list(self, request, *args, **kwargs):
         data_set: MicrobitHistoricalDataSet = self.get_object()
 
+        if 'stream' in self.request.query_params:
+            return self._get_streaming_response(data_set)
+
         serializer = MicrobitHistoricalDataSerializer(
             data=data_set.detailed_historical_data.order_by('time').all(),
             many=True
@@ -34,6 +44,29 @@ class HistoricalStorageDataViewSet(ListModelMixin,
             }
         return Response(serializer.data, headers=headers)
 
+    def _get_streaming_response(self, data_set: MicrobitHistoricalDataSet):
+        query_serializer = StreamQuerySerializer(data=self.request.query_params)
+        query_serializer.is_valid(True)
+        query_params = query_serializer.validated_data
+
+        history = data_set.detailed_historical_data.order_by('time')
+
+        if query_params.get('from_'):
+            history = history.filter(time__gte=query_params['from_'])
+
+        if query_params.get('to'):
+            history = history.filter(time__lt=query_params['to'])
+
+        if query_params['limit']:
+            history = history[:query_params['limit']]
+
+        return get_streaming_response(
+            history.values('time', 'value').iterator(chunk_size=EXPORT_CHUNK_SIZE),
+            ('time', 'value'),
+            query_params['stream'],
+            filename=f'{data_set.namespace}_{data_set.name}_{data_set.type}_historical_data',
+        )
+
     def perform_create(self, serializer: MicrobitHistoricalDataSerializer):
         dataset: MicrobitHistoricalDataSet = self.get_object()
         dataset.add_value(ResourceValue(
@@ -41,3 +74,23 @@ class HistoricalStorageDataViewSet(ListModelMixin,
             value=serializer.validated_data['value'],
             unit=dataset.unit,
         ))
+
+    @action(methods=['post'], detail=False, url_path='bulk')
+    def bulk_create(self, request, *args, **kwargs):
+        dataset: MicrobitHistoricalDataSet = self.get_object()
+
+        if isinstance(request.data, list) and len(request.data) > MAX_BULK_READINGS:
+            raise ValidationError(f'Ensure there are no more than {MAX_BULK_READINGS} readings.')
+
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        dataset.add_values([
+            ResourceValue(
+                time=item['time'].replace(microsecond=0),
+                value=item['value'],
+                unit=dataset.unit,
+            ) for item in serializer.validated_data
+        ])
+
+        return Response({'count': len(serializer.validated_data)}, status=HTTPStatus.CREATED)
@@ -1,12 +1,18 @@
+import logging
 from datetime import datetime, timezone
-from typing import Any, Union
+from typing import Any, Iterable, Union
 
+import funcy
 from django.db import models
 
+from apps.addresses.models import GeoCoordinates
 from apps.resources.models import PullSupportedResource, Resource
 from apps.resources.types import DataCollectionMethod, ResourceChildType, ResourceValue, TimeResolution, Unit
 
 
+logger = logging.getLogger(__name__)
+
+
 class WeatherTemperatureHistory(PullSupportedResource):
     class Meta:
         verbose_name_plural = "Weather temperature history"
@@ -35,9 +41,37 @@ class WeatherTemperatureHistory(PullSupportedResource):
     def fetch_current_value(self):
         from apps.weather.utils import get_owm
 
-        observation = get_owm().weather_at_coords(self.sub_location.address.latitude,
-                                                  self.sub_location.address.longitude)
-        weather = observation.get_weather()
+        return self._fetch_temperature(get_owm(), self.sub_location.address.coordinates)
+
+    @classmethod
+    def collect_new_values_for_histories(cls, histories: Iterable['WeatherTemperatureHistory'], owm=None):
+        """
+        Fetch the weather once per grid cell by one client and save values of all histories of the cell by one batch
+        """
+        from apps.weather.utils import get_grid_cell, get_owm
+
+        owm = owm or get_owm()
+        histories_by_cell = funcy.group_by(
+            lambda history: get_grid_cell(history.sub_location.address.coordinates),
+            (history for history in histories if history.sub_location.address)
+        )
+        values_by_history = {}
+
+        for cell, cell_histories in histories_by_cell.items():
+            try:
+                value = cls._fetch_temperature(owm, cell)
+
+            except Exception as exception:
+                logger.error(f'Weather for {len(cell_histories)} histories near {cell} is not fetched: {exception}')
+                continue
+
+            values_by_history.update((history, [value]) for history in cell_histories)
+
+        Resource.add_values_for_resources(values_by_history)
+
+    @staticmethod
+    def _fetch_temperature(owm, coordinates: GeoCoordinates) -> ResourceValue:
+        weather = owm.weather_at_coords(coordinates.latitude, coordinates.longitude).get_weather()
         return ResourceValue(
             value=weather.get_temperature(unit='celsius')['temp'],
             time=datetime.now(tz=timezone.utc),
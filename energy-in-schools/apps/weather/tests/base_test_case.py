@@ -1,8 +1,29 @@
+from collections import Counter
+from unittest.mock import MagicMock
+
 import apps.weather.pyowm_config as pyowm_config
 from apps.accounts.permissions import RoleName
 from apps.main.base_test_case import BaseTestCase
 
 
+class FakeOWM:
+    """
+    Local replacement of the pyowm client: returns the configured temperature and counts requests per coordinates
+    """
+
+    def __init__(self, temperature_celsius: float = 10.0):
+        self.temperature_celsius = temperature_celsius
+        self.requested_coordinates = Counter()
+
+    def weather_at_coords(self, latitude: float, longitude: float):
+        self.requested_coordinates[(latitude, longitude)] += 1
+
+        weather = MagicMock()
+        weather.get_temperature.return_value = {'temp': self.temperature_celsius}
+
+        return MagicMock(**{'get_weather.return_value': weather})
+
+
 class WeatherBaseTestCase(BaseTestCase):
     FORCE_LOGIN_AS = RoleName.ES_USER
 
@@ -2,10 +2,12 @@ from datetime import datetime, timezone
 from http import HTTPStatus
 
 from apps.accounts.permissions import RoleName
+from apps.addresses.models import Address
 from apps.historical_data.models import LongTermHistoricalData
+from apps.locations.models import Location
 from apps.resources.types import Unit
 from apps.weather.models import WeatherTemperatureHistory
-from apps.weather.tests.base_test_case import WeatherBaseTestCase
+from apps.weather.tests.base_test_case import FakeOWM, WeatherBaseTestCase
 
 
 class TestTemperatureHistoryByLocation(WeatherBaseTestCase):
@@ -74,6 +76,28 @@ class TestTemperatureHistoryByLocation(WeatherBaseTestCase):
         self.assertEqual(Unit.CELSIUS, resource_value.unit)
         self.assertEqual(2.63, resource_value.value)
 
+    def test_collect_new_values_for_histories(self):
+        nearby_history = WeatherTemperatureHistory.objects.create(sub_location=self._create_location(51.51, -0.11))
+        far_history = WeatherTemperatureHistory.objects.create(sub_location=self._create_location(53.48, -2.24))
+        owm = FakeOWM(temperature_celsius=5.5)
+
+        WeatherTemperatureHistory.collect_new_values_for_histories(
+            WeatherTemperatureHistory.objects.select_related('sub_location__address'), owm
+        )
+
+        self.assertEqual({(51.5, -0.1): 1, (53.5, -2.25): 1}, dict(owm.requested_coordinates))
+        self.assertEqual(
+            {self._history_resource_id: 5.5, nearby_history.id: 5.5, far_history.id: 5.5},
+            dict(LongTermHistoricalData.objects.values_list('resource_id', 'value'))
+        )
+
+    @staticmethod
+    def _create_location(latitude: float, longitude: float) -> Location:
+        return Location.objects.create(
+            name=f'school at {latitude}, {longitude}',
+            address=Address.objects.create(line_1='the address', latitude=latitude, longitude=longitude),
+        )
+
     def create_weather_temperature_history_resource(self):
         resource = WeatherTemperatureHistory.objects.create(
             sub_location=self.location,
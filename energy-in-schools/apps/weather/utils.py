@@ -8,9 +8,11 @@ from pyowm.weatherapi25.configuration25 import THREE_HOURS_FORECAST_URL
 from rest_framework.exceptions import ValidationError
 
 import apps.weather.pyowm_config
+from apps.addresses.models import GeoCoordinates
 from utilities.exceptions import BadGatewayError
 from utilities.logger import logger
 BASE_WEATHER_API_ENDPOINT = f'http://api.openweathermap.org/data/2.5/'
+WEATHER_GRID_STEP = 0.05  # degrees, about 5 km: the current weather doesn't differ for schools inside one cell
 
 
 def get_owm():
@@ -20,6 +22,16 @@ def get_owm():
     )
 
 
+def get_grid_cell(coordinates: GeoCoordinates) -> GeoCoordinates:
+    """
+    Snap the coordinates to the nearest node of the weather grid
+    """
+    return GeoCoordinates(*(
+        round(round(coordinate / WEATHER_GRID_STEP) * WEATHER_GRID_STEP, 2)
+        for coordinate in coordinates
+    ))
+
+
 def three_hours_forecast_at_zip_code(self, zipcode, country):
     # todo: make a PR to pyowm!
     assert isinstance(zipcode, str), "Value must be a string"
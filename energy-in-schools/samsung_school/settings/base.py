@@ -88,6 +88,7 @@ class Base(Configuration):
         'apps.forum',
         'apps.historical_data',
         'apps.hubs',
+        'apps.leaderboard',
         'apps.learning_days',
         'apps.lesson_plans',
         'apps.locations',
@@ -311,7 +312,8 @@ class Base(Configuration):
     DAILY_REPORT_EMAIL_SUBJECT = 'EnergyInSchools Daily Report ({})'
     DAILY_REPORT_EMAIL_TITLE = 'Schools status daily report ({}) ({})'
     NOTIFICATION_SENDING_EMAIL = 'no-reply@energyinschools.co.uk'
-    RASPBERRY_PI_AUTH_CACHE_TIME = timedelta(seconds=30)
+    RASPBERRY_PI_AUTH_CACHE_TIME = timedelta(seconds=30)  # per process
+    RASPBERRY_PI_AUTH_SHARED_CACHE_TIME = timedelta(minutes=10)  # invalidated on changes of hubs, locations and pupils
 
     class LINKS:
         UNSUBSCRIBE = f'{ROOT_URL}ban-email/'
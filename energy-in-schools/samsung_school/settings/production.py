@@ -40,6 +40,14 @@ class Production(Staging):
 
     TEST_MODE = False
 
+    REST_FRAMEWORK = {
+        **Staging.REST_FRAMEWORK,
+        'DEFAULT_RENDERER_CLASSES': (
+            'rest_framework.renderers.JSONRenderer',
+            'rest_framework_csv.renderers.CSVRenderer',
+        ),
+    }
+
     CREDENTIALS_RECEIVERS_TRAINING_PERIOD = (
         "zerk.shaban@myutilitygenius.co.uk",
         "shaik.arshad@myutilitygenius.co.uk"
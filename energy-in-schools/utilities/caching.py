@@ -1,6 +1,12 @@
+import functools
+import threading
+import time
+from collections import OrderedDict, defaultdict
 from datetime import timedelta
+from typing import Any, Callable, Collection, Dict, Hashable, NamedTuple, Optional, Tuple
 
 from cacheops import CacheMiss, RedisCache, cache as redis_cache
+from cacheops.redis import redis_client
 
 EMPTY = object()
 
@@ -23,6 +29,29 @@ class DefaultTimeoutRedisCache:
     def delete(cache_key):
         redis_cache.delete(cache_key)
 
+    @classmethod
+    def delete_by_prefix(cls, prefix: str):
+        cls.delete_by_pattern(f'{prefix}*')
+
+    @staticmethod
+    def delete_by_pattern(pattern: str):
+        for cache_key in redis_client.scan_iter(match=pattern):
+            redis_client.delete(cache_key)
+
+    def add_to_tag(self, cache_key, tag_key):
+        """
+        Remember the key in the set of the tag, the set lives not shorter than the keys
+        """
+        with redis_client.pipeline() as pipeline:
+            pipeline.sadd(tag_key, cache_key)
+            pipeline.expire(tag_key, self.default_timeout)
+            pipeline.execute()
+
+    @staticmethod
+    def delete_by_tag(tag_key):
+        cache_keys = redis_client.smembers(tag_key)
+        redis_client.delete(tag_key, *cache_keys)
+
 
 class NotNoneRedisCache(RedisCache):
     """
@@ -33,3 +62,218 @@ class NotNoneRedisCache(RedisCache):
         if data is None:
             return
         super().set(cache_key, data, timeout)
+
+
+class LRUCache:
+    """
+    Bounded in-process cache, the least recently used item is dropped when max_size is reached.
+    Items expire after timeout if it is specified. It is thread safe.
+    """
+
+    def __init__(self, max_size: int, timeout: Optional[timedelta] = None):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                expires_at, value = self._items[key]
+            except KeyError:
+                return default
+
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._items[key]
+                return default
+
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        expires_at = time.monotonic() + self.timeout.total_seconds() if self.timeout else None
+
+        with self._lock:
+            self._items[key] = expires_at, value
+            self._items.move_to_end(key)
+
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class TwoTierCacheStats(NamedTuple):
+    local_hits: int
+    remote_hits: int
+    misses: int
+    coalesced_calls: int
+
+
+class TwoTierCache:
+    """
+    Bounded in-process LRU cache in front of the shared one (Redis by default), so a value computed by one process
+    is reused by the others. Concurrent misses of the same key in a process wait for the single computation.
+    None values are not cached. Deletions reach local caches of other processes only after local_timeout.
+    """
+
+    def __init__(
+            self,
+            prefix: str,
+            timeout: timedelta,
+            max_size: int = 10_000,
+            remote_cache: Optional[DefaultTimeoutRedisCache] = EMPTY,
+            local_timeout: Optional[timedelta] = None,
+    ):
+        self.prefix = prefix
+        self.local_cache = LRUCache(max_size, local_timeout or timeout)
+        self.remote_cache = DefaultTimeoutRedisCache(timeout) if remote_cache is EMPTY else remote_cache
+
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Hashable, Tuple[threading.Lock, int]] = {}
+        self._counters = defaultdict(int)
+
+    def get_or_set(self, key: Hashable, compute: Callable[[], Any], tags: Collection[str] = ()) -> Any:
+        value = self._get(key)
+
+        if value is not EMPTY:
+            return value
+
+        key_lock = self._acquire_key_lock(key)
+
+        try:
+            with key_lock:
+                value = self._get(key, count_hits=False)
+
+                if value is not EMPTY:
+                    self._count('coalesced_calls')
+                    return value
+
+                self._count('misses')
+                value = compute()
+                self.set(key, value, tags)
+
+                return value
+
+        finally:
+            self._release_key_lock(key)
+
+    def set(self, key: Hashable, value: Any, tags: Collection[str] = ()):
+        """
+        Tags allow to delete all keys of some object without scanning of the shared cache
+        """
+        if value is None:
+            return
+
+        self.local_cache.set(key, value)
+
+        if self.remote_cache:
+            self.remote_cache.set(self._get_remote_key(key), value)
+
+            for tag in tags:
+                self.remote_cache.add_to_tag(self._get_remote_key(key), self._get_tag_key(tag))
+
+    def delete(self, key: Hashable):
+        self.local_cache.delete(key)
+
+        if self.remote_cache:
+            self.remote_cache.delete(self._get_remote_key(key))
+
+    def delete_tagged(self, tag: str):
+        """
+        Delete remote keys set with the tag, the local cache is cleared entirely
+        """
+        self.local_cache.clear()
+
+        if self.remote_cache:
+            self.remote_cache.delete_by_tag(self._get_tag_key(tag))
+
+    def clear(self):
+        self.local_cache.clear()
+
+        if self.remote_cache:
+            self.remote_cache.delete_by_prefix(f'{self.prefix}:')
+
+    @property
+    def stats(self) -> TwoTierCacheStats:
+        with self._lock:
+            return TwoTierCacheStats(**{field: self._counters[field] for field in TwoTierCacheStats._fields})
+
+    def _get(self, key: Hashable, count_hits: bool = True) -> Any:
+        value = self.local_cache.get(key, EMPTY)
+
+        if value is not EMPTY:
+            if count_hits:
+                self._count('local_hits')
+
+            return value
+
+        if self.remote_cache:
+            value = self.remote_cache.get(self._get_remote_key(key))
+
+            if value is not None:
+                self.local_cache.set(key, value)
+
+                if count_hits:
+                    self._count('remote_hits')
+
+                return value
+
+        return EMPTY
+
+    def _get_remote_key(self, key: Hashable) -> str:
+        return f'{self.prefix}:{key}'
+
+    def _get_tag_key(self, tag: str) -> str:
+        return f'{self.prefix}:tag:{tag}'
+
+    def _acquire_key_lock(self, key: Hashable) -> threading.Lock:
+        with self._lock:
+            key_lock, users_count = self._key_locks.get(key, (None, 0))
+            key_lock = key_lock or threading.Lock()
+            self._key_locks[key] = key_lock, users_count + 1
+
+            return key_lock
+
+    def _release_key_lock(self, key: Hashable):
+        with self._lock:
+            key_lock, users_count = self._key_locks[key]
+
+            if users_count > 1:
+                self._key_locks[key] = key_lock, users_count - 1
+            else:
+                del self._key_locks[key]
+
+    def _count(self, counter_name: str):
+        with self._lock:
+            self._counters[counter_name] += 1
+
+
+def two_tier_cache(cache: TwoTierCache, key_func: Callable[..., Hashable]):
+    """
+    Cache the function results in the cache. It adds invalidate_all() like funcy.cache does
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return cache.get_or_set(
+                (func.__qualname__, *key_func(*args, **kwargs)),
+                lambda: func(*args, **kwargs),
+            )
+
+        wrapper.cache = cache
+        wrapper.invalidate_all = cache.clear
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,28 @@
+from typing import Hashable
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utilities.caching import LRUCache
+
+
+HTTP_POOL_SIZE = 10
+HTTP_SESSIONS_CACHE_SIZE = 1000
+
+http_sessions_cache = LRUCache(max_size=HTTP_SESSIONS_CACHE_SIZE)
+
+
+def get_http_session(key: Hashable) -> requests.Session:
+    """
+    Return the shared session for the key, so keep-alive connections are reused between the requests and the tasks
+    """
+    session = http_sessions_cache.get(key)
+
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        http_sessions_cache.set(key, session)
+
+    return session
@@ -0,0 +1,18 @@
+from rest_framework.pagination import CursorPagination
+
+
+class OptInCursorPagination(CursorPagination):
+    """
+    Keyset pagination by id. It is applied only when the client passes `cursor` or `page_size` query params,
+    otherwise the whole list is returned as before.
+    """
+    ordering = 'id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not {self.cursor_query_param, self.page_size_query_param} & request.query_params.keys():
+            return None
+
+        return super().paginate_queryset(queryset, request, view)
@@ -0,0 +1,24 @@
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parses newline delimited JSON: one JSON object per line, empty lines are skipped
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+
+        try:
+            return [
+                json.loads(line)
+                for line in stream.read().decode(encoding).splitlines()
+                if line.strip()
+            ]
+        except ValueError as exception:
+            raise ParseError(f'NDJSON parse error - {exception}')
@@ -1,6 +1,8 @@
-from typing import Any
+from collections import OrderedDict
+from typing import Any, Optional, Set
 
 import funcy
+from rest_framework.serializers import ListSerializer
 
 
 def get_serializer_field(field: Any) -> str:
@@ -24,3 +26,31 @@ def get_serializer_fields(*args, add_id: bool = True):
 
 def get_serializer_kwargs(kwargs):
     return funcy.walk_keys(get_serializer_field, kwargs)
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    Leaves only the fields listed in the comma separated `fields` query param on GET requests.
+    Nested serializers are not affected.
+    """
+    FIELDS_QUERY_PARAM = 'fields'
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested_fields = self._get_requested_fields()
+
+        if requested_fields is None:
+            return fields
+
+        return OrderedDict((name, field) for name, field in fields.items() if name in requested_fields)
+
+    def _get_requested_fields(self) -> Optional[Set[str]]:
+        request = self.context.get('request')
+
+        if request is None or request.method != 'GET' or self.FIELDS_QUERY_PARAM not in request.query_params:
+            return None
+
+        if self.parent is not None and not (isinstance(self.parent, ListSerializer) and self.parent.parent is None):
+            return None
+
+        return set(filter(None, map(str.strip, request.query_params[self.FIELDS_QUERY_PARAM].split(','))))